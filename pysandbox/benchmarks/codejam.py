@@ -0,0 +1,257 @@
+import argparse
+import itertools
+import logging
+import math
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from pysandbox.codejam.y2021.qualification_moons_umbrellas import (
+    calc,
+    minimize,
+    minimize_dp,
+)
+from pysandbox.codejam.y2021.qualification_reversort import calc_cost, calc_cost_treap
+
+"""Stress and scaling harness for the codejam solvers.
+
+Each solver is cross-checked against a brute-force reference on many small random instances, then timed and
+memory-profiled (with tracemalloc) on random instances of growing size. A least-squares line through log(size) and
+log(seconds) gives the empirical exponent, e.g. ~1 for O(n), ~2 for O(n^2), so an asymptotic regression shows up as a
+jump in the fitted exponent.
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRIALS: int = 300
+DEFAULT_INSTANCES: int = 3
+DEFAULT_REPEAT: int = 3
+MAX_BRUTE_FORCE_QUESTIONS: int = 12  # 2^12 fillings per Moons and Umbrellas instance
+
+MoonsCase = tuple[int, int, str]
+
+
+def random_permutation(size: int, rng: random.Random) -> list[int]:
+    return rng.sample(range(1, size + 1), size)
+
+
+def random_mural(size: int, rng: random.Random) -> MoonsCase:
+    """Costs in Code Jam's [-1000, 1000] and a mural of C's, J's and ?'s"""
+    return rng.randint(-1000, 1000), rng.randint(-1000, 1000), "".join(rng.choice("CJ?") for _ in range(size))
+
+
+def brute_force_reversort(int_list: list[int]) -> int:
+    """Reversort exactly as the problem states it"""
+    values = list(int_list)
+    cost = 0
+    for ndx in range(len(values) - 1):
+        end = values.index(min(values[ndx:])) + 1
+        values[ndx:end] = reversed(values[ndx:end])
+        cost += end - ndx
+    return cost
+
+
+def brute_force_moons(case: MoonsCase) -> int:
+    """Tries every way of filling the ?'s"""
+    cj_cost, jc_cost, mural = case
+    questions = [ndx for ndx, let in enumerate(mural) if let == "?"]
+    if len(questions) > MAX_BRUTE_FORCE_QUESTIONS:
+        raise RuntimeError(f"Too many ?'s to brute force: {len(questions)}")
+    costs = []
+    for letters in itertools.product("CJ", repeat=len(questions)):
+        filled = list(mural)
+        for ndx, let in zip(questions, letters):
+            filled[ndx] = let
+        costs.append(calc(cj_cost, jc_cost, filled))
+    return min(costs)
+
+
+@dataclass(frozen=True)
+class Solver:
+    name: str
+    solve: Callable[[Any], Any]
+    generate: Callable[[int, random.Random], Any]  # a random instance of a size
+    reference: Callable[[Any], Any]
+    stress_max_size: int  # instance sizes for cross-checking against `reference`
+    sizes: tuple[int, ...]  # instance sizes for timing
+
+
+SOLVERS: dict[str, Solver] = {
+    solver.name: solver
+    for solver in [
+        Solver("calc_cost", calc_cost, random_permutation, brute_force_reversort, 50, (250, 500, 1000, 2000)),
+        Solver("calc_cost_treap", calc_cost_treap, random_permutation, brute_force_reversort, 50, (2000, 8000, 32000)),
+        Solver(
+            "minimize",
+            lambda case: minimize(case[0], case[1], list(case[2])),
+            random_mural,
+            brute_force_moons,
+            MAX_BRUTE_FORCE_QUESTIONS,
+            (250, 500, 1000, 2000),
+        ),
+        Solver(
+            "minimize_dp",
+            lambda case: minimize_dp(*case),
+            random_mural,
+            brute_force_moons,
+            MAX_BRUTE_FORCE_QUESTIONS,
+            (10_000, 100_000, 1_000_000),
+        ),
+    ]
+}
+
+
+@dataclass(frozen=True)
+class Mismatch:
+    case: Any
+    expected: Any
+    actual: Any
+
+
+def stress(solver: Solver, trials: int, seed: int = 0) -> list[Mismatch]:
+    """The random instances (of sizes 1 through `solver.stress_max_size`) where `solver` disagrees with its reference"""
+    rng = random.Random(seed)
+    mismatches = []
+    for _ in range(trials):
+        case = solver.generate(rng.randint(1, solver.stress_max_size), rng)
+        expected, actual = solver.reference(case), solver.solve(case)
+        if actual != expected:
+            mismatches.append(Mismatch(case, expected, actual))
+    return mismatches
+
+
+@dataclass(frozen=True)
+class SizeResult:
+    size: int
+    seconds: float  # per instance, best of the repetitions
+    peak_bytes: int  # most memory allocated while solving an instance
+
+    def __str__(self) -> str:
+        return f"{self.size:>10}  {self.seconds * 1000:>12.3f} ms  {self.peak_bytes / 1024:>12.1f} KiB"
+
+
+def fit_exponent(sizes: list[int], values: list[float]) -> float:
+    """The slope of the least-squares line through (log size, log value): k when value ~ size^k"""
+    slope, _ = statistics.linear_regression([math.log(size) for size in sizes], [math.log(value) for value in values])
+    return slope
+
+
+@dataclass(frozen=True)
+class ScalingResult:
+    solver: str
+    sizes: list[SizeResult]
+
+    @property
+    def time_exponent(self) -> float:
+        return fit_exponent([result.size for result in self.sizes], [result.seconds for result in self.sizes])
+
+    @property
+    def memory_exponent(self) -> float:
+        return fit_exponent(
+            [result.size for result in self.sizes], [max(result.peak_bytes, 1) for result in self.sizes]
+        )
+
+    def __str__(self) -> str:
+        header = f"{self.solver}: time ~ n^{self.time_exponent:.2f}, peak memory ~ n^{self.memory_exponent:.2f}"
+        return "\n".join([header] + [f"{result}" for result in self.sizes])
+
+
+def measure(solve: Callable[[Any], Any], size: int, cases: list[Any], repeat: int) -> SizeResult:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for case in cases:
+            solve(case)
+        best = min(best, time.perf_counter() - start)
+
+    # separately, since tracing slows allocations down
+    peak_bytes = 0
+    for case in cases:
+        tracemalloc.start()
+        try:
+            solve(case)
+            peak_bytes = max(peak_bytes, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return SizeResult(size, best / len(cases), peak_bytes)
+
+
+def scale(
+    solver: Solver,
+    sizes: Optional[list[int]] = None,
+    instances: int = DEFAULT_INSTANCES,
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 0,
+) -> ScalingResult:
+    """Times `solver` on `instances` random instances of each size (default: `solver.sizes`)"""
+    rng = random.Random(seed)
+    results = []
+    for size in sizes or solver.sizes:
+        cases = [solver.generate(size, rng) for _ in range(instances)]
+        results.append(measure(solver.solve, size, cases, repeat))
+        logger.debug(f"{solver.name}: {results[-1]}")
+    return ScalingResult(solver.name, results)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser("Stress tests the codejam solvers and fits how they scale")
+    parser.add_argument(
+        "--solvers",
+        nargs="+",
+        choices=list(SOLVERS),
+        default=list(SOLVERS),
+        help="Solvers to check. Default: all of them",
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", help="Instance sizes to time. Default: each solver's own (see SOLVERS)"
+    )
+    parser.add_argument(
+        "--trials",
+        type=int,
+        default=DEFAULT_TRIALS,
+        help=f"Small random instances to cross-check against brute force. Default: {DEFAULT_TRIALS}",
+    )
+    parser.add_argument(
+        "--instances",
+        type=int,
+        default=DEFAULT_INSTANCES,
+        help=f"Random instances timed per size. Default: {DEFAULT_INSTANCES}",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help=f"Timing repetitions. Default: {DEFAULT_REPEAT}"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    parser.add_argument(
+        "--max-exponent", type=float, help="Fail if a solver's fitted time exponent is above this (e.g. 1.3)"
+    )
+
+    args = parser.parse_args()
+    too_slow = []
+    for name in args.solvers:
+        solver = SOLVERS[name]
+        mismatches = stress(solver, args.trials, args.seed)
+        if mismatches:
+            first = mismatches[0]
+            logger.warning(
+                f"{name} disagrees with brute force on {len(mismatches)}/{args.trials} instances, e.g. "
+                f"{first.case}: expected {first.expected}, got {first.actual}"
+            )
+        else:
+            logger.info(f"{name} agrees with brute force on {args.trials} instances")
+
+        result = scale(solver, args.sizes, args.instances, args.repeat, args.seed)
+        print(result)
+        if args.max_exponent is not None and result.time_exponent > args.max_exponent:
+            too_slow.append(f"{name} (n^{result.time_exponent:.2f})")
+
+    if too_slow:
+        raise RuntimeError(f"Scaling worse than n^{args.max_exponent}: {', '.join(too_slow)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import copy
+import json
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from pysandbox.common import require_numpy
+from pysandbox.nflpickem.consensus import (
+    MarketColumns,
+    consensus_numpy,
+    consensus_python,
+    flatten_spreads,
+)
+
+"""Times the consensus-spread engines over many odds snapshots (jittered copies of the test fixture)"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOTS: int = 1000
+DEFAULT_REPEAT: int = 3
+JITTER: list[float] = [-1.0, -0.5, 0.0, 0.0, 0.5, 1.0]
+
+
+def synthetic_snapshots(games: list[Any], count: int, seed: int = 0) -> list[Any]:
+    """Returns the games of `count` snapshots of `games`, every spread moved by a random half-point or so"""
+    rng = random.Random(seed)
+    snapshots = []
+    for _ in range(count):
+        for game in copy.deepcopy(games):
+            for bookmaker in game["bookmakers"]:
+                for market in bookmaker["markets"]:
+                    for outcome in market["outcomes"]:
+                        outcome["point"] += rng.choice(JITTER)
+            snapshots.append(game)
+    return snapshots
+
+
+def best_of(repeat: int, run: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(games: list[Any], repeat: int) -> dict[str, float]:
+    """Returns the best-of-`repeat` seconds for flattening `games` and for each engine's reductions"""
+    columns: MarketColumns = flatten_spreads(games)
+    if consensus_python(columns) != consensus_numpy(columns):
+        raise RuntimeError("Engines disagree")
+    return {
+        "flatten": best_of(repeat, lambda: flatten_spreads(games)),
+        "python": best_of(repeat, lambda: consensus_python(columns)),
+        "numpy": best_of(repeat, lambda: consensus_numpy(columns)),
+    }
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser("Consensus-spread engine benchmark")
+    parser.add_argument(
+        "--odds-file",
+        type=Path,
+        required=True,
+        help="the-odds-api JSON to replicate, e.g. tests/nflpickem/mock_odds.json",
+    )
+    parser.add_argument(
+        "--snapshots",
+        type=int,
+        default=DEFAULT_SNAPSHOTS,
+        help=f"How many jittered copies to summarize. Default: {DEFAULT_SNAPSHOTS}",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help=f"Timing repetitions. Default: {DEFAULT_REPEAT}"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+
+    args = parser.parse_args()
+    require_numpy("The benchmark")
+
+    games = synthetic_snapshots(json.loads(args.odds_file.read_text()), args.snapshots, args.seed)
+    logger.info(f"Benchmarking {len(games)} games")
+    for stage, seconds in benchmark(games, args.repeat).items():
+        print(f"{stage:>8}  {seconds * 1000:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import argparse
+import hashlib
+import json
+import logging
+import re
+import socket
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+"""Local stand-in for the GitHub and the-odds-api endpoints, replaying the test fixtures over real sockets.
+
+GET /repos/<owner>/<repo>/commits?per_page=&page=  pages through `total_commits` commits (the fixture commits, cycled
+    with unique SHAs), with `Link`, `ETag` and `X-RateLimit-*` headers, answering `If-None-Match` with 304
+GET /v4/sports/<sport>/odds                          returns nflpickem/mock_odds.json with quota headers
+
+The fixtures are read from a directory laid out like the repo's `tests/` (github/mock_page_*.json and
+nflpickem/mock_odds.json), which isn't installed with the package, so it is always passed in.
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOTAL_COMMITS: int = 1000
+DEFAULT_RATE_LIMIT: int = 5000
+DEFAULT_PORT: int = 8766
+GITHUB_MAX_PER_PAGE: int = 100
+RATE_LIMIT_WINDOW_SECS: int = 3600
+
+COMMITS_PATH = re.compile(r"^/repos/[^/]+/[^/]+/commits$")
+ODDS_PATH = re.compile(r"^/v4/sports/[^/]+/odds$")
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Threaded, keep-alive HTTP server. `latency` seconds are added to every response."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        fixtures_dir: Path,
+        server_address: tuple[str, int] = ("127.0.0.1", 0),
+        latency: float = 0.0,
+        total_commits: int = DEFAULT_TOTAL_COMMITS,
+        rate_limit: int = DEFAULT_RATE_LIMIT,
+    ) -> None:
+        self.latency = latency
+        self.total_commits = total_commits
+        self.rate_limit = rate_limit
+        self.rate_limit_remaining = rate_limit
+        self.rate_limit_reset = int(time.time()) + RATE_LIMIT_WINDOW_SECS
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+        commit_bodies = []
+        for page_file in sorted((fixtures_dir / "github").glob("mock_page_*.json")):
+            commit_bodies.extend(json.loads(page_file.read_text()))
+        self.commit_bodies = commit_bodies
+        self.odds_body = (fixtures_dir / "nflpickem" / "mock_odds.json").read_bytes()
+        super().__init__(server_address, FixtureHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[0], self.server_address[1]
+        return f"http://{host!s}:{port}"
+
+    def commit(self, ndx: int) -> Any:
+        body = dict(self.commit_bodies[ndx % len(self.commit_bodies)])
+        body["sha"] = hashlib.sha1(str(ndx).encode()).hexdigest()
+        return body
+
+    def take_rate_limit(self) -> int:
+        """Counts a rate-limited request, returning how many remain (-1 once exhausted)"""
+        with self.lock:
+            if self.rate_limit_remaining == 0:
+                return -1
+            self.rate_limit_remaining -= 1
+            return self.rate_limit_remaining
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server: FixtureServer
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is measurable
+
+    def setup(self) -> None:
+        super().setup()
+        # headers and body go out in separate writes; without this, Nagle + delayed ACKs stall keep-alive connections
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        url = urlsplit(self.path)
+        if COMMITS_PATH.match(url.path):
+            self._commits(url.path, parse_qs(url.query))
+        elif ODDS_PATH.match(url.path):
+            self._send(HTTPStatus.OK, self.server.odds_body, {"x-requests-remaining": "499", "x-requests-used": "1"})
+        else:
+            self._send(HTTPStatus.NOT_FOUND, b'{"message": "Not Found"}')
+
+    def _commits(self, path: str, query: dict[str, list[str]]) -> None:
+        per_page = min(int(query.get("per_page", ["30"])[0]), GITHUB_MAX_PER_PAGE)
+        page = int(query.get("page", ["1"])[0])
+        last_page = max(1, -(-self.server.total_commits // per_page))
+        etag = f'W/"{self.server.total_commits}-{per_page}-{page}"'
+
+        remaining = self.server.take_rate_limit()
+        rate_headers = {
+            "X-RateLimit-Limit": str(self.server.rate_limit),
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Reset": str(self.server.rate_limit_reset),
+        }
+        if remaining < 0:
+            self._send(HTTPStatus.FORBIDDEN, b'{"message": "API rate limit exceeded"}', rate_headers)
+            return
+        if self.headers.get("If-None-Match") == etag:
+            self._send(HTTPStatus.NOT_MODIFIED, b"", {"ETag": etag, **rate_headers})
+            return
+
+        start = (page - 1) * per_page
+        end = min(start + per_page, self.server.total_commits)
+        body = json.dumps([self.server.commit(ndx) for ndx in range(start, end)]).encode()
+
+        base = f"{self.server.url}{path}?per_page={per_page}"
+        links = [f'<{base}&page={last_page}>; rel="last"']
+        if page < last_page:
+            links.insert(0, f'<{base}&page={page + 1}>; rel="next"')
+        self._send(HTTPStatus.OK, body, {"ETag": etag, "Link": ", ".join(links), **rate_headers})
+
+    def _send(self, status: HTTPStatus, body: bytes, headers: Optional[dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser("Replays GitHub / the-odds-api fixtures over local HTTP")
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help=f"The port to listen on. Default: {DEFAULT_PORT}"
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to delay every response. Default: 0")
+    parser.add_argument(
+        "--total-commits",
+        type=int,
+        default=DEFAULT_TOTAL_COMMITS,
+        help=f"How many commits each repo has. Default: {DEFAULT_TOTAL_COMMITS}",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=DEFAULT_RATE_LIMIT,
+        help=f"Commit requests allowed before answering 403. Default: {DEFAULT_RATE_LIMIT}",
+    )
+    parser.add_argument(
+        "--fixtures-dir",
+        type=Path,
+        required=True,
+        help="Where the mock JSON files live, e.g. the repo's tests/ directory",
+    )
+
+    args = parser.parse_args()
+    address = ("127.0.0.1", args.port)
+    with FixtureServer(args.fixtures_dir, address, args.latency, args.total_commits, args.rate_limit) as server:
+        logger.info(f"Serving fixtures on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Shutting down")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Callable, Iterator
+from unittest import mock
+
+import pysandbox.common as common
+import pysandbox.github.pull_commits as pull_commits
+import pysandbox.nflpickem.picker as picker
+from pysandbox.benchmarks.fixture_server import DEFAULT_TOTAL_COMMITS, FixtureServer
+from pysandbox.github.http_cache import HttpCache
+
+"""Measures how session pooling, concurrency and caching change the network-bound scripts' throughput.
+
+Runs `pull_commits` and `picker.generate_picks` against a local `FixtureServer`, so results are repeatable offline.
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY: float = 0.02
+DEFAULT_PER_PAGE: int = 25
+DEFAULT_CONCURRENCY: int = 8
+PICKS_TODAY: date = date.fromisoformat("2022-09-15")  # the week of tests/nflpickem/mock_odds.json
+
+
+@dataclass(frozen=True)
+class Result:
+    scenario: str
+    requests: int
+    connections: int
+    seconds: float
+
+    def __str__(self) -> str:
+        return f"{self.scenario:45} {self.requests:>8} {self.connections:>11} {self.seconds:>9.3f}"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    run: Callable[[], object]
+    session_factory: Callable[[], object]
+    warm_up: bool = False
+
+
+def _measure(server: FixtureServer, scenario: Scenario) -> Result:
+    shared_session = scenario.session_factory()
+    with mock.patch.object(common, "get_session", lambda: shared_session or common.create_session()):
+        if scenario.warm_up:
+            scenario.run()
+        with server.lock:
+            server.requests = server.connections = 0
+        start = time.perf_counter()
+        scenario.run()
+        seconds = time.perf_counter() - start
+    return Result(scenario.name, server.requests, server.connections, seconds)
+
+
+def _scenarios(num_commits: int, per_page: int, concurrency: int, cache_dir: Path) -> Iterator[Scenario]:
+    def pull(concurrency: int = 1, cache: "HttpCache | None" = None) -> Callable[[], object]:
+        return lambda: pull_commits.pull_commits("owner", "repo", num_commits, concurrency, cache, per_page)
+
+    yield Scenario("pull_commits: new connection per request", pull(), lambda: None)
+    yield Scenario("pull_commits: pooled session", pull(), common.create_session)
+    yield Scenario(f"pull_commits: pooled, concurrency={concurrency}", pull(concurrency), common.create_session)
+    cache = HttpCache(cache_dir)
+    yield Scenario("pull_commits: pooled, revalidated from cache", pull(cache=cache), common.create_session, True)
+    yield Scenario("generate_picks: new connection", lambda: picker.generate_picks(PICKS_TODAY), lambda: None)
+    yield Scenario("generate_picks: pooled session", lambda: picker.generate_picks(PICKS_TODAY), common.create_session)
+
+
+def run_benchmarks(
+    server: FixtureServer, num_commits: int, per_page: int, concurrency: int = DEFAULT_CONCURRENCY
+) -> list[Result]:
+    """Runs every scenario against `server` (which must already be serving)"""
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(pull_commits, "GIT_BASE_URL", server.url))
+        stack.enter_context(mock.patch.object(picker, "ODDS_API_BASE_URL", f"{server.url}/v4"))
+        stack.enter_context(mock.patch.dict(os.environ, {picker.ENV_API_TOKEN: "benchmark"}))
+        stack.enter_context(mock.patch.object(common, "initialize_logging_from_file"))
+        cache_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        return [_measure(server, scenario) for scenario in _scenarios(num_commits, per_page, concurrency, cache_dir)]
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO)  # keep the scripts' progress logs out of the table
+
+    parser = argparse.ArgumentParser("Network benchmark against a local fixture server")
+    parser.add_argument(
+        "--fixtures-dir",
+        type=Path,
+        required=True,
+        help="Where the mock JSON files live, e.g. the repo's tests/ directory",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=DEFAULT_LATENCY,
+        help=f"Seconds the server delays each response. Default: {DEFAULT_LATENCY}",
+    )
+    parser.add_argument(
+        "--commits",
+        type=int,
+        default=DEFAULT_TOTAL_COMMITS,
+        help=f"Commits to pull. Default: {DEFAULT_TOTAL_COMMITS}",
+    )
+    parser.add_argument(
+        "--per-page", type=int, default=DEFAULT_PER_PAGE, help=f"Commits per request. Default: {DEFAULT_PER_PAGE}"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Concurrent requests for the concurrent scenario. Default: {DEFAULT_CONCURRENCY}",
+    )
+
+    args = parser.parse_args()
+    with FixtureServer(args.fixtures_dir, latency=args.latency, total_commits=args.commits) as server:
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+        thread.start()
+        try:
+            results = run_benchmarks(server, args.commits, args.per_page, args.concurrency)
+        finally:
+            server.shutdown()
+
+    print(f"{'scenario':45} {'requests':>8} {'connections':>11} {'seconds':>9}")
+    for result in results:
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import logging
+import random
+import string
+import time
+from pathlib import Path
+from typing import Callable, Sequence
+
+from pysandbox.common import require_numpy
+from pysandbox.spelling_bee import (
+    DEFAULT_DICTIONARY_PATH,
+    DictionaryIndex,
+    load_dictionary_index,
+)
+from pysandbox.spelling_bee_numpy import NumpyMatcher
+
+"""Compares the pure-Python and NumPy spelling-bee engines on the same puzzles"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PUZZLES: int = 50
+DEFAULT_REPEAT: int = 3
+DEFAULT_LETTERS: list[int] = [7, 12, 20]
+
+
+def synthetic_words(count: int, seed: int = 0) -> list[str]:
+    """Returns `count` random lowercase 'words' of 3-12 letters, for simulating very large word lists"""
+    rng = random.Random(seed)
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12))) for _ in range(count)]
+
+
+def random_puzzles(count: int, num_letters: int, seed: int = 0) -> list[tuple[str, str]]:
+    """Returns `count` (must_letter, may_letters) puzzles using `num_letters` distinct letters"""
+    rng = random.Random(seed)
+    puzzles = []
+    for _ in range(count):
+        letters = rng.sample(string.ascii_lowercase, num_letters)
+        puzzles.append((letters[0], "".join(letters[1:])))
+    return puzzles
+
+
+def time_engine(solve: Callable[[str, str], list[str]], puzzles: Sequence[tuple[str, str]], repeat: int) -> float:
+    """Returns the best-of-`repeat` mean seconds per puzzle"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for must_letter, may_letters in puzzles:
+            solve(must_letter, may_letters)
+        best = min(best, (time.perf_counter() - start) / len(puzzles))
+    return best
+
+
+def benchmark(
+    index: DictionaryIndex, letter_counts: Sequence[int], num_puzzles: int, repeat: int, seed: int = 0
+) -> list[tuple[int, float, float]]:
+    """Returns (num_letters, python_seconds, numpy_seconds) per puzzle for each letter count"""
+    matcher = NumpyMatcher(index)
+    results = []
+    for num_letters in letter_counts:
+        puzzles = random_puzzles(num_puzzles, num_letters, seed)
+        for must_letter, may_letters in puzzles:
+            if index.solve(must_letter, may_letters) != matcher.solve(must_letter, may_letters):
+                raise RuntimeError(f"Engines disagree on must_letter={must_letter} may_letters={may_letters}")
+        python_secs = time_engine(index.solve, puzzles, repeat)
+        numpy_secs = time_engine(matcher.solve, puzzles, repeat)
+        results.append((num_letters, python_secs, numpy_secs))
+    return results
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser("Spelling Bee engine benchmark")
+    parser.add_argument(
+        "--dictionary-file",
+        "-df",
+        type=Path,
+        default=DEFAULT_DICTIONARY_PATH,
+        help=f"The dictionary text file to use. One word per line. Default: {DEFAULT_DICTIONARY_PATH}",
+    )
+    parser.add_argument(
+        "--synthetic-words",
+        type=int,
+        default=0,
+        help="Benchmark this many random words instead of the dictionary file. Default: 0",
+    )
+    parser.add_argument(
+        "--letters",
+        type=int,
+        nargs="+",
+        default=DEFAULT_LETTERS,
+        help=f"Puzzle sizes (distinct letters) to benchmark. Default: {DEFAULT_LETTERS}",
+    )
+    parser.add_argument(
+        "--puzzles", type=int, default=DEFAULT_PUZZLES, help=f"Puzzles per size. Default: {DEFAULT_PUZZLES}"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help=f"Timing repetitions. Default: {DEFAULT_REPEAT}"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+
+    args = parser.parse_args()
+    require_numpy("The benchmark")
+
+    if args.synthetic_words:
+        index = DictionaryIndex.from_words(synthetic_words(args.synthetic_words, args.seed))
+    else:
+        index = load_dictionary_index(args.dictionary_file)
+    logger.info(f"Benchmarking {len(index.words)} words ({len(index.group_masks)} distinct letter sets)")
+
+    print(f"{'letters':>7}  {'python ms':>10}  {'numpy ms':>10}  {'speedup':>7}")
+    for num_letters, python_secs, numpy_secs in benchmark(index, args.letters, args.puzzles, args.repeat, args.seed):
+        speedup = python_secs / numpy_secs
+        print(f"{num_letters:>7}  {python_secs * 1000:>10.3f}  {numpy_secs * 1000:>10.3f}  {speedup:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Shared test-case runner for the codejam solutions.
+
+A solution supplies `parse` (all of its cases from the input's whitespace-separated tokens) and `solve` (one case's
+result). The input is read in one go, the cases are solved in order (across processes if asked), and every
+`Case #` line is written at once.
+
+NOTE: with `processes` other than 1, `solve` and the cases must be picklable (top-level functions, `functools.partial`s
+of them and dataclasses are).
+"""
+
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, Sequence, TypeVar
+
+Case = TypeVar("Case")
+Result = TypeVar("Result")
+
+CHUNKS_PER_WORKER = 4  # enough chunks to even out slow cases, few enough to keep pickling overhead low
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(rb"\s")
+_NON_WHITESPACE = re.compile(rb"\S")
+
+
+def read_tokens(sample_file: Optional[Path] = None) -> Iterator[str]:
+    """All of `sample_file`'s (default: stdin's) whitespace-separated tokens, read in one call"""
+    data = sample_file.read_bytes() if sample_file else sys.stdin.buffer.read()
+    return iter(data.decode().split())
+
+
+class TokenStream:
+    """The whitespace-separated tokens of `f`, read `chunk_size` bytes at a time, for inputs too big to hold in memory.
+
+    A short token can be read whole (`next_token`), a huge one piece by piece (`token_chunks`).
+    """
+
+    def __init__(self, f: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buffer = b""
+        self._pos = 0
+
+    def _fill(self) -> bool:
+        """Reads the next chunk if the buffer is used up. False at the end of the file."""
+        if self._pos >= len(self._buffer):
+            self._buffer = self._f.read(self._chunk_size)
+            self._pos = 0
+        return bool(self._buffer)
+
+    def token_chunks(self) -> Iterator[str]:
+        """The next token, in pieces of at most `chunk_size` characters (none at the end of the file)"""
+        while self._fill():
+            match = _NON_WHITESPACE.search(self._buffer, self._pos)
+            self._pos = match.start() if match else len(self._buffer)
+            if match:
+                break
+        while self._fill():
+            start = self._pos
+            match = _WHITESPACE.search(self._buffer, start)
+            end = match.start() if match else len(self._buffer)
+            if end > start:
+                yield self._buffer[start:end].decode()
+            self._pos = end
+            if match:
+                return
+
+    def next_token(self) -> str:
+        token = "".join(self.token_chunks())
+        if not token:
+            raise EOFError("No more tokens")
+        return token
+
+
+def add_processes_argument(parser: argparse.ArgumentParser) -> None:
+    """Adds `--processes` (0: one per CPU). Worker processes only pay off for big inputs, so the default is 1."""
+    parser.add_argument(
+        "--processes", type=int, default=1, help="Processes to solve the cases with (0: one per CPU). Default: 1"
+    )
+
+
+def solve_all(solve: Callable[[Case], Result], cases: Sequence[Case], processes: Optional[int] = 1) -> List[Result]:
+    """Solves `cases` in order, with `processes` worker processes (None: one per CPU, 1: in this process)"""
+    if processes == 1 or len(cases) < 2:
+        return [solve(case) for case in cases]
+
+    workers = processes or os.cpu_count() or 1
+    chunksize = max(1, len(cases) // (workers * CHUNKS_PER_WORKER))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(solve, cases, chunksize=chunksize))
+
+
+def format_results(results: Sequence[Any]) -> str:
+    return "".join(f"Case #{ndx}: {result}\n" for ndx, result in enumerate(results, 1))
+
+
+def run(
+    parse: Callable[[Iterator[str]], Sequence[Case]],
+    solve: Callable[[Case], Any],
+    sample_file: Optional[Path] = None,
+    processes: Optional[int] = 1,
+) -> None:
+    """Solves every case of `sample_file` (default: stdin) and prints the results"""
+    cases = parse(read_tokens(sample_file))
+    sys.stdout.write(format_results(solve_all(solve, cases, processes)))
+    sys.stdout.flush()
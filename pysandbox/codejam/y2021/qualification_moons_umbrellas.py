@@ -1,11 +1,28 @@
 # https://codingcompetitions.withgoogle.com/codejam/round/000000000043580a/00000000006d1145
+import argparse
 import logging
+import re
 import sys
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from pysandbox.codejam import runner
 
 logger = logging.getLogger(__name__)
 
+_UNREACHABLE = float("inf")
+_NOT_MURAL_LETTER = re.compile(r"[^CJ?]")
+
+
+@dataclass(frozen=True)
+class TestConfig:
+    cj_cost: int
+    jc_cost: int
+    mural: str
+
 
 def calc(cj_cost: int, jc_cost: int, mural: List[str]) -> int:
     """NOTE: `mural` must not have any ? in it"""
@@ -29,10 +46,10 @@ def replace_letter(c_status: Optional[int], j_status: Optional[int]) -> str:
     return "?"
 
 
-def minimize(cj_cost: int, jc_cost: int, mural: List[str]) -> int:
+def minimize(cj_cost: int, jc_cost: int, mural: Sequence[str]) -> int:
     logger.debug(f"Minimizing cost for: cj_cost={cj_cost} jc_cost={jc_cost} mural={mural}")
 
-    mural_copy = mural.copy()
+    mural_copy = list(mural)
     questions_s = len(["?" for let in mural_copy if let == "?"])
     expensive_combo = ["C", "J"] if cj_cost >= jc_cost else ["J", "C"]
     expensive_cost = cj_cost if cj_cost >= jc_cost else jc_cost
@@ -104,16 +121,88 @@ def minimize(cj_cost: int, jc_cost: int, mural: List[str]) -> int:
     return cost
 
 
-def main(sample_file: Optional[Path] = None) -> None:
-    with sample_file.open("r") if sample_file else sys.stdin as f:
-        num_tests = int(f.readline())
-
+def minimize_dp(cj_cost: int, jc_cost: int, mural: Sequence[str]) -> int:
+    """Same as `minimize`, exact for any costs, in one O(n) pass"""
+    return minimize_dp_chunks(cj_cost, jc_cost, [mural if isinstance(mural, str) else "".join(mural)])
+
+
+def minimize_dp_chunks(cj_cost: int, jc_cost: int, chunks: Iterable[str]) -> int:
+    """`minimize_dp` of the mural `chunks` make up, holding one chunk at a time and O(1) state between them.
+
+    Tracks the cheapest cost of the mural so far ending in C and ending in J (unreachable when that letter is fixed
+    otherwise). With no negative cost, filling every ? with its neighbour is optimal, so the ?'s are just dropped and
+    only the last fixed letter is carried over.
+    """
+    if cj_cost >= 0 and jc_cost >= 0:
+        cost = 0
+        last_fixed = ""
+        for chunk in chunks:
+            _check_letters(chunk)
+            fixed = last_fixed + chunk.replace("?", "")
+            cost += cj_cost * fixed.count("CJ") + jc_cost * fixed.count("JC")
+            last_fixed = fixed[-1:]
+        return cost
+
+    end_c: float = 0
+    end_j: float = 0
+    started = False
+    for chunk in chunks:
+        _check_letters(chunk)
+        if not started and chunk:
+            end_c = _UNREACHABLE if chunk[0] == "J" else 0
+            end_j = _UNREACHABLE if chunk[0] == "C" else 0
+            chunk = chunk[1:]
+            started = True
+        for let in chunk:
+            if let == "C":
+                end_c, end_j = min(end_c, end_j + jc_cost), _UNREACHABLE
+            elif let == "J":
+                end_c, end_j = _UNREACHABLE, min(end_j, end_c + cj_cost)
+            else:
+                end_c, end_j = min(end_c, end_j + jc_cost), min(end_j, end_c + cj_cost)
+    return int(min(end_c, end_j))
+
+
+def _check_letters(mural: str) -> None:
+    invalid = _NOT_MURAL_LETTER.search(mural)
+    if invalid:
+        raise RuntimeError(f"mural must only have C's, J's and ?'s, not {invalid.group()!r}")
+
+
+def parse_cases(tokens: Iterator[str]) -> List[TestConfig]:
+    num_tests = int(next(tokens))
+    return [TestConfig(int(next(tokens)), int(next(tokens)), next(tokens)) for _ in range(num_tests)]
+
+
+def solve_case(test: TestConfig, solver: Callable[[int, int, Sequence[str]], int] = minimize_dp) -> int:
+    return solver(test.cj_cost, test.jc_cost, test.mural)
+
+
+def main(
+    sample_file: Optional[Path] = None,
+    solver: Callable[[int, int, Sequence[str]], int] = minimize_dp,
+    processes: Optional[int] = 1,
+) -> None:
+    runner.run(parse_cases, partial(solve_case, solver=solver), sample_file, processes)
+
+
+def main_streaming(sample_file: Optional[Path] = None, chunk_size: int = runner.DEFAULT_CHUNK_SIZE) -> None:
+    """Like `main`, but reads each mural `chunk_size` bytes at a time, so memory doesn't grow with the mural"""
+    with sample_file.open("rb") if sample_file else nullcontext(sys.stdin.buffer) as f:
+        tokens = runner.TokenStream(f, chunk_size)
+        num_tests = int(tokens.next_token())
         for case in range(1, num_tests + 1):
-            cj_cost, jc_cost, mural = f.readline().split()
-            mural_list = [let for let in mural]
-            print(f"Case #{case}: {minimize(int(cj_cost), int(jc_cost), mural_list)}")
+            cj_cost, jc_cost = int(tokens.next_token()), int(tokens.next_token())
+            print(f"Case #{case}: {minimize_dp_chunks(cj_cost, jc_cost, tokens.token_chunks())}")
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    main()
+    parser = argparse.ArgumentParser("Solves Code Jam 2021 Qualification's Moons and Umbrellas from stdin")
+    parser.add_argument("--stream", action="store_true", help="Read murals in chunks, for ones too big for memory")
+    runner.add_processes_argument(parser)
+    args = parser.parse_args()
+    if args.stream:
+        main_streaming()
+    else:
+        main(processes=args.processes or None)
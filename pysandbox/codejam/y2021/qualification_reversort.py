@@ -1,9 +1,13 @@
 # See: https://codingcompetitions.withgoogle.com/codejam/round/000000000043580a/00000000006d0a5c
+import argparse
 import logging
-import sys
+import random
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional
+
+from pysandbox.codejam import runner
 
 logger = logging.getLogger(__name__)
 
@@ -14,20 +18,21 @@ class TestConfig:
     int_list: List[int]
 
 
-def parse_sample(sample_file: Optional[Path] = None) -> List[TestConfig]:
+def parse_cases(tokens: Iterator[str]) -> List[TestConfig]:
     tests: List[TestConfig] = []
-    with sample_file.open("r") if sample_file else sys.stdin as f:
-        num_tests = int(f.readline())
-
-        for test in range(num_tests):
-            list_len = int(f.readline())
-            list_as_str = f.readline()
-            int_list = [int(val) for val in list_as_str.split(" ")]
-            tests.append(TestConfig(list_len, int_list))
-        logger.debug(f"Processing {num_tests} tests: {tests}")
+    num_tests = int(next(tokens))
+    for test in range(num_tests):
+        list_len = int(next(tokens))
+        int_list = [int(next(tokens)) for _ in range(list_len)]
+        tests.append(TestConfig(list_len, int_list))
+    logger.debug(f"Processing {num_tests} tests")
     return tests
 
 
+def parse_sample(sample_file: Optional[Path] = None) -> List[TestConfig]:
+    return parse_cases(runner.read_tokens(sample_file))
+
+
 def _find_lowest_ndx(int_list: List[int]) -> int:
     lowest_ndx = 0
     lowest = None
@@ -55,12 +60,178 @@ def calc_cost(int_list: List[int]) -> int:
     return total_cost
 
 
-def main(sample_file: Optional[Path] = None) -> None:
-    tests: List[TestConfig] = parse_sample(sample_file)
-    for ndx, test in enumerate(tests):
-        print(f"Case #{ndx+1}: {calc_cost(test.int_list)}")
+class _ImplicitTreap:
+    """A sequence of ints whose leftmost minimum can be removed, reversing everything before it, in O(log n) expected.
+
+    Nodes are keyed by position rather than value, and live in parallel lists; node 0 is the empty tree. Reversals are
+    lazy: `flipped` marks a subtree whose children still need swapping.
+    """
+
+    def __init__(self, values: List[int], seed: int = 0) -> None:
+        rng = random.Random(seed)
+        count = len(values) + 1
+        self.value = [0] + list(values)
+        self.priority = [0.0] + [rng.random() for _ in values]
+        self.left = [0] * count
+        self.right = [0] * count
+        self.size = [0] + [1] * len(values)
+        self.low = [float("inf")] + [float(value) for value in values]  # subtree minimum
+        self.flipped = [False] * count
+        self.root = self._build(count)
+
+    def _build(self, count: int) -> int:
+        """Builds the treap of nodes 1..count-1 in order in O(n), returning its root"""
+        stack: List[int] = []
+        for node in range(1, count):
+            last = 0
+            while stack and self.priority[stack[-1]] < self.priority[node]:
+                last = stack.pop()
+            self.left[node] = last
+            if stack:
+                self.right[stack[-1]] = node
+            stack.append(node)
+
+        # children before parents, then update sizes and minimums bottom-up
+        order: List[int] = []
+        pending = stack[:1]
+        while pending:
+            node = pending.pop()
+            order.append(node)
+            pending.extend(child for child in (self.left[node], self.right[node]) if child)
+        self._update(order)
+        return stack[0] if stack else 0
+
+    def _update(self, path: List[int]) -> None:
+        """Recomputes the sizes and minimums of `path`'s nodes, deepest (last) first"""
+        left, right, size, low, value = self.left, self.right, self.size, self.low, self.value
+        for node in reversed(path):
+            left_child, right_child = left[node], right[node]
+            size[node] = 1 + size[left_child] + size[right_child]
+            lowest: float = value[node]
+            if low[left_child] < lowest:
+                lowest = low[left_child]
+            if low[right_child] < lowest:
+                lowest = low[right_child]
+            low[node] = lowest
+
+    def _push(self, node: int) -> None:
+        """Applies `node`'s pending reversal (callers check `flipped[node]` first)"""
+        left, right = self.left[node], self.right[node]
+        self.left[node], self.right[node] = right, left
+        self.flipped[left] = not self.flipped[left]
+        self.flipped[right] = not self.flipped[right]
+        self.flipped[node] = False
+        self.flipped[0] = False
+
+    def _merge(self, first: int, rest: int) -> int:
+        left, right, priority, flipped = self.left, self.right, self.priority, self.flipped
+        root = parent = 0
+        parent_is_left = False  # whether the next subtree hangs off `parent`'s left
+        path = []
+        while first and rest:
+            child_is_left = priority[first] <= priority[rest]
+            node = rest if child_is_left else first
+            if flipped[node]:
+                self._push(node)
+            if child_is_left:  # `first` merges into `rest`'s left subtree
+                rest = left[node]
+            else:
+                first = right[node]
+            if not parent:
+                root = node
+            elif parent_is_left:
+                left[parent] = node
+            else:
+                right[parent] = node
+            path.append(node)
+            parent, parent_is_left = node, child_is_left
+        remaining = first or rest
+        if not parent:
+            return remaining
+        if parent_is_left:
+            left[parent] = remaining
+        else:
+            right[parent] = remaining
+        self._update(path)
+        return root
+
+    def pop_min(self) -> int:
+        """Removes the (leftmost) minimum and reverses the elements before it, returning the minimum's position.
+
+        One descent finds the minimum and splits the sequence around it (top-down, then sizes and minimums are fixed
+        bottom-up; iterative, as recursion costs more than the work per node), then the reversed prefix is merged back.
+        """
+        left, right, size, low, value, flipped = self.left, self.right, self.size, self.low, self.value, self.flipped
+        node, position, target = self.root, 0, low[self.root]
+        prefix = rest = prefix_tail = rest_tail = 0
+        path = []
+        while True:
+            if flipped[node]:
+                self._push(node)
+            left_child = left[node]
+            if low[left_child] == target:  # `node` and its right subtree come after the minimum
+                if rest_tail:
+                    left[rest_tail] = node
+                else:
+                    rest = node
+                rest_tail = node
+                path.append(node)
+                node = left_child
+            elif value[node] == target:  # `node` is the minimum: drop it, keeping its subtrees
+                position += size[left_child]
+                if prefix_tail:
+                    right[prefix_tail] = left_child
+                else:
+                    prefix = left_child
+                if rest_tail:
+                    left[rest_tail] = right[node]
+                else:
+                    rest = right[node]
+                break
+            else:  # `node` and its left subtree come before the minimum
+                position += size[left_child] + 1
+                if prefix_tail:
+                    right[prefix_tail] = node
+                else:
+                    prefix = node
+                prefix_tail = node
+                path.append(node)
+                node = right[node]
+        self._update(path)
+
+        if prefix:
+            flipped[prefix] = not flipped[prefix]
+        self.root = self._merge(prefix, rest)
+        return position
+
+
+def calc_cost_treap(int_list: List[int]) -> int:
+    """Same as `calc_cost`, in O(n log n): only the unsorted suffix is kept, and each step's minimum is removed.
+
+    Pure Python, so the constant is large: ~5s for 10^5 random elements and ~65s for 10^6 (vs. ~20s for 10^4 with
+    `calc_cost`).
+    """
+    treap = _ImplicitTreap(int_list)
+    total_cost = 0
+    for _ in range(len(int_list) - 1):
+        total_cost += treap.pop_min() + 1
+    return total_cost
+
+
+def solve_case(test: TestConfig, cost_fn: Callable[[List[int]], int] = calc_cost_treap) -> int:
+    return cost_fn(test.int_list)
+
+
+def main(
+    sample_file: Optional[Path] = None,
+    cost_fn: Callable[[List[int]], int] = calc_cost_treap,
+    processes: Optional[int] = 1,
+) -> None:
+    runner.run(parse_cases, partial(solve_case, cost_fn=cost_fn), sample_file, processes)
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    main()
+    parser = argparse.ArgumentParser("Solves Code Jam 2021 Qualification's Reversort from stdin")
+    runner.add_processes_argument(parser)
+    main(processes=parser.parse_args().processes or None)
@@ -1,13 +1,29 @@
 import logging
 import logging.config
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Optional
 
+import requests
 import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
 LOGGING_CONFIG_FILE = Path("logging_config.yaml")
 
+# Shared HTTP client settings. Pools are kept per host, so `pool_maxsize` bounds concurrent connections to one host.
+DEFAULT_POOL_CONNECTIONS: int = 10
+DEFAULT_POOL_MAXSIZE: int = 16
+DEFAULT_RETRIES: int = 5
+DEFAULT_BACKOFF_FACTOR: float = 0.5
+DEFAULT_MAX_RATE_LIMIT_WAIT: float = 60.0
+RETRY_STATUSES: list[int] = [403, 429, 500, 502, 503, 504]
+
 """Helpful, reusable logic across many scripts"""
 
 
@@ -19,3 +35,96 @@ def initialize_logging_from_file(log_file: Path = LOGGING_CONFIG_FILE, debug: bo
         pysandbox_logger = logging.getLogger("pysandbox")
         pysandbox_logger.level = logging.DEBUG
     logger.debug(f"Initialized logging from file: {log_file.resolve()}")
+
+
+@lru_cache(maxsize=None)
+def get_numpy() -> Any:
+    """The `numpy` module, imported on first use so only the modules with a NumPy engine pay for it (None when it
+    isn't installed)"""
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        return None
+    return numpy
+
+
+def require_numpy(feature: str) -> Any:
+    """Returns `get_numpy()`, raising a RuntimeError naming `feature` when NumPy isn't installed"""
+    np = get_numpy()
+    if np is None:
+        raise RuntimeError(f"{feature} requires NumPy. Install it with: pip install numpy")
+    return np
+
+
+def _is_rate_limited(response: Any) -> bool:
+    """True when `response` is a GitHub-style rate-limit rejection (no requests remaining)"""
+    return response.status in (403, 429) and response.headers.get("X-RateLimit-Remaining") == "0"
+
+
+class RateLimitRetry(Retry):
+    """`Retry` with exponential backoff that waits out `Retry-After` or `X-RateLimit-Reset` before retrying.
+
+    A 403 is only retried when it is a rate limit, and waits longer than `max_rate_limit_wait` are given up on
+    (the failed response is returned to the caller instead).
+    """
+
+    max_rate_limit_wait: float = DEFAULT_MAX_RATE_LIMIT_WAIT
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None and _is_rate_limited(response) and "X-RateLimit-Reset" in response.headers:
+            retry_after = max(0.0, float(response.headers["X-RateLimit-Reset"]) - time.time())
+        return retry_after
+
+    def increment(
+        self,
+        method: Optional[str] = None,
+        url: Optional[str] = None,
+        response: Any = None,
+        error: Any = None,
+        _pool: Any = None,
+        _stacktrace: Any = None,
+    ) -> "RateLimitRetry":
+        if response is not None:
+            if response.status == 403 and not _is_rate_limited(response):
+                raise MaxRetryError(_pool, url, ResponseError("403 is not a rate limit"))
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None and retry_after > self.max_rate_limit_wait:
+                logger.warning(f"Not retrying {url}: asked to wait {retry_after:.0f}s")
+                raise MaxRetryError(_pool, url, ResponseError("rate limit wait is too long"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def create_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+) -> requests.Session:
+    """Returns a `requests.Session` that reuses keep-alive connections per host and retries failed GETs"""
+    retry = RateLimitRetry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET", "HEAD"],
+        raise_on_status=False,  # hand the last failed response back, so callers' raise_for_status() reports it
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide shared session (see `create_session`)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
@@ -0,0 +1,51 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+"""One file per cached HTTP response, shared by `github.http_cache` and `nflpickem.odds_cache`.
+
+Each file is a JSON line of metadata (including the key it was stored under) followed by the raw body. Files are
+written to a per-thread temporary file and renamed into place, so concurrent writers never collide and readers never
+see a partial file.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class FileCache:
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: Any) -> Path:
+        """Where `key` (any JSON-serializable value) is stored"""
+        return self.directory / hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def load(self, key: Any) -> Optional[tuple[dict[str, Any], bytes]]:
+        """(metadata, body) stored under `key`, or None if missing or unreadable"""
+        try:
+            metadata_line, body = self.path(key).read_bytes().split(b"\n", maxsplit=1)
+            metadata: dict[str, Any] = json.loads(metadata_line)
+        except (OSError, ValueError):
+            return None
+        return (metadata, body) if metadata.get("key") == key else None
+
+    def store(self, key: Any, metadata: dict[str, Any], body: bytes) -> Optional[int]:
+        """Stores `body` with `metadata` under `key`, returning the file's size (None, with a warning, on failure)"""
+        path = self.path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        data = json.dumps({**metadata, "key": key}).encode() + b"\n" + body
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Couldn't cache a response in {self.directory}: {e}")
+            with contextlib.suppress(OSError):
+                tmp_path.unlink(missing_ok=True)
+            return None
+        return len(data)
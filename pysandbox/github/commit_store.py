@@ -0,0 +1,179 @@
+import argparse
+import logging
+import sqlite3
+from pathlib import Path
+from types import TracebackType
+from typing import Iterable, Optional, Type
+
+import pysandbox.common as common
+from pysandbox.github.pull_commits import (
+    DEFAULT_COMMIT_NUM,
+    DEFAULT_OWNER,
+    DEFAULT_REPO,
+    GIT_BASE_URL,
+    MAX_PER_PAGE,
+    Commit,
+    choose_per_page,
+    fetch_page,
+)
+
+"""Keeps a local SQLite mirror of GitHub commits, syncing only what's new since the last run.
+
+This is `pull_commits`' incremental mode (`pull_commits --store FILE`). It lives in its own module, with its own CLI
+for syncing whole histories, because a sync walks pages one at a time until it meets a stored commit. It can't plan
+its page URLs up front like `pull_commits` does.
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH: Path = Path.home() / ".local" / "share" / "pysandbox" / "github" / "commits.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    author TEXT NOT NULL,
+    commit_date TEXT NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (owner, repo, sha)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS commits_by_date ON commits (owner, repo, commit_date);
+"""
+
+
+class CommitStore:
+    """Commits keyed by (owner, repo, full SHA)"""
+
+    def __init__(self, path: Path = DEFAULT_STORE_PATH) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "CommitStore":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def add(self, owner: str, repo: str, commits: Iterable[Commit]) -> int:
+        """Stores `commits` (ignoring already-known SHAs), returning how many were new"""
+        rows = [(owner, repo, c.full_sha, c.author, c.commit_date, c.message) for c in commits]
+        with self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany("INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self.connection.total_changes - before
+
+    def known_shas(self, owner: str, repo: str, shas: Iterable[str]) -> set[str]:
+        """Returns which of `shas` are already stored"""
+        sha_list = list(shas)
+        if not sha_list:
+            return set()
+        placeholders = ", ".join("?" * len(sha_list))
+        query = f"SELECT sha FROM commits WHERE owner = ? AND repo = ? AND sha IN ({placeholders})"
+        return {row[0] for row in self.connection.execute(query, [owner, repo, *sha_list])}
+
+    def latest_commit_date(self, owner: str, repo: str) -> Optional[str]:
+        query = "SELECT max(commit_date) FROM commits WHERE owner = ? AND repo = ?"
+        latest: Optional[str] = self.connection.execute(query, (owner, repo)).fetchone()[0]
+        return latest
+
+    def commits(self, owner: str, repo: str, limit: int = -1) -> list[Commit]:
+        """Returns the stored commits, newest first"""
+        query = (
+            "SELECT sha, author, commit_date, message FROM commits WHERE owner = ? AND repo = ? "
+            "ORDER BY commit_date DESC, sha LIMIT ?"
+        )
+        rows = self.connection.execute(query, (owner, repo, limit))
+        return [Commit(sha[0:6], author, date, message, sha) for sha, author, date, message in rows]
+
+
+def sync_commits(
+    owner: str,
+    repo: str,
+    store: CommitStore,
+    initial_commits: Optional[int] = DEFAULT_COMMIT_NUM,
+    per_page: Optional[int] = None,
+    use_since: bool = False,
+) -> list[Commit]:
+    """Pulls commits newer than those in `store`, adds them and returns them (newest first).
+
+    Pages are walked from the newest commit and the walk stops at the first page holding an already-stored SHA (the
+    rest of that page is still checked, in case merged branches interleave). A repo new to the store is limited to its
+    `initial_commits` most recent commits (None pulls all of history). `use_since` also passes the newest stored
+    commit date as `since`, so GitHub skips older commits server-side.
+
+    Pages hold `per_page` commits if given, else as many as a first sync needs in the fewest requests (see
+    `choose_per_page`), or `MAX_PER_PAGE` when there's no limit on how many are new.
+    """
+    latest = store.latest_commit_date(owner, repo)
+    limit = None if latest else initial_commits
+    per_page = choose_per_page(limit or MAX_PER_PAGE, per_page)
+    first_link = f"{GIT_BASE_URL}/repos/{owner}/{repo}/commits?per_page={per_page}"
+    if use_since and latest:
+        first_link += f"&since={latest}"
+    next_link: Optional[str] = first_link
+    logger.debug(f"Syncing {owner}/{repo}: newest stored commit is from {latest}")
+
+    new_commits: list[Commit] = []
+    while next_link is not None and (limit is None or len(new_commits) < limit):
+        page = fetch_page(next_link)
+        known = store.known_shas(owner, repo, [commit.full_sha for commit in page.commits])
+        new_commits.extend(commit for commit in page.commits if commit.full_sha not in known)
+        next_link = None if known else page.links.get("next")
+
+    new_commits = new_commits[:limit]
+    store.add(owner, repo, new_commits)
+    logger.info(f"Stored {len(new_commits)} new commits for {owner}/{repo}")
+    return new_commits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Mirrors GitHub commits into a local SQLite store")
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=DEFAULT_STORE_PATH,
+        help=f"The SQLite file to keep commits in. Default: {DEFAULT_STORE_PATH}",
+    )
+    parser.add_argument("--owner", default=DEFAULT_OWNER, help=f"The GitHub 'owner'. Default: {DEFAULT_OWNER}")
+    parser.add_argument("--repo", default=DEFAULT_REPO, help=f"The GitHub 'repo'. Default: {DEFAULT_REPO}")
+    parser.add_argument(
+        "--initial-commits",
+        type=int,
+        default=DEFAULT_COMMIT_NUM,
+        help=f"How many commits to pull for a repo the store hasn't seen (0 for all). Default: {DEFAULT_COMMIT_NUM}",
+    )
+    parser.add_argument(
+        "--per-page",
+        type=int,
+        help=f"Commits per request (at most {MAX_PER_PAGE}). Default: the fewest requests for --initial-commits "
+        f"on a first sync, else {MAX_PER_PAGE}",
+    )
+    parser.add_argument(
+        "--since",
+        action="store_true",
+        help="Also ask GitHub only for commits dated after the newest stored one",
+    )
+
+    args = parser.parse_args()
+    with CommitStore(args.store) as store:
+        new_commits = sync_commits(
+            args.owner, args.repo, store, args.initial_commits or None, args.per_page, use_since=args.since
+        )
+    for commit in new_commits:
+        print(f"{commit}")
+
+
+if __name__ == "__main__":
+    common.initialize_logging_from_file()
+    main()
@@ -0,0 +1,113 @@
+import contextlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import requests
+
+from pysandbox.file_cache import FileCache
+
+"""On-disk cache of GitHub API responses, revalidated with conditional requests (ETag / Last-Modified).
+
+GitHub doesn't count `304 Not Modified` answers against the rate limit, so re-polling unchanged pages is nearly free.
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR: Path = Path.home() / ".cache" / "pysandbox" / "github"
+DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024
+EVICT_TO: float = 0.9  # fraction of `max_bytes` to evict down to, so a full cache isn't rescanned on every store
+CACHED_HEADERS: list[str] = ["ETag", "Last-Modified", "Link"]
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    headers: dict[str, str]
+    from_cache: bool
+
+
+class HttpCache:
+    """Response bodies and validators stored one file per URL, evicting least recently used files past `max_bytes`.
+
+    The `CACHED_HEADERS` of each response are its `FileCache` metadata. The directory is scanned once for its size,
+    which is then kept as a running total, and only rescanned to evict.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._files = FileCache(self.directory)
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+
+    def _path(self, url: str) -> Path:
+        return self._files.path(url)
+
+    def _load(self, url: str) -> Optional[tuple[dict[str, Any], bytes]]:
+        return self._files.load(url)
+
+    def _store(self, url: str, headers: dict[str, str], body: bytes) -> None:
+        size = self._files.store(url, {"headers": headers}, body)
+        if size is None:
+            return
+        with self._lock:
+            self._total_bytes += size  # overcounts replaced files until the next eviction rescans
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[tuple[int, int, Path]]:
+        """(mtime, size, path) of every cached file"""
+        entries = []
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # evicted by another thread
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        """Removes the least recently used files until the cache is down to `EVICT_TO` of `max_bytes`"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            logger.debug(f"Evicting {path.name} ({size} bytes) from {self.directory}")
+            path.unlink(missing_ok=True)
+            total -= size
+        self._total_bytes = total
+
+    def get(self, session: requests.Session, url: str) -> CachedResponse:
+        """GETs `url`, sending the cached validators and serving a 304 from the cached body"""
+        cached = self._load(url)
+        request_headers = {}
+        if cached:
+            cached_headers = cached[0]["headers"]
+            if "ETag" in cached_headers:
+                request_headers["If-None-Match"] = cached_headers["ETag"]
+            if "Last-Modified" in cached_headers:
+                request_headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+
+        r = session.get(url, headers=request_headers)
+        if r.status_code == 304 and cached:
+            with self._lock:
+                self.hits += 1
+            with contextlib.suppress(FileNotFoundError):  # evicted since it was loaded; the body is still good
+                os.utime(self._path(url))  # mark as recently used
+            logger.debug(f"  {url} not modified; using cached body")
+            return CachedResponse(cached[1], cached[0]["headers"], True)
+
+        r.raise_for_status()
+        with self._lock:
+            self.misses += 1
+        headers = {name: r.headers[name] for name in CACHED_HEADERS if name in r.headers}
+        if "ETag" in headers or "Last-Modified" in headers:
+            self._store(url, headers, r.content)
+        return CachedResponse(r.content, headers, False)
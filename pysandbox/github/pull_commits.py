@@ -1,29 +1,39 @@
 import argparse
+import codecs
+import itertools
+import json
 import logging
-from dataclasses import dataclass
-from typing import Any, Optional
-
-import requests
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlsplit, urlunsplit
 
 import pysandbox.common as common
+from pysandbox.github.http_cache import DEFAULT_MAX_BYTES, HttpCache
 
 """Pulls commit details from GitHub APIs"""
 
 logger = logging.getLogger(__name__)
 
 GIT_BASE_URL = "https://api.github.com"
-DEFAULT_PER_PAGE: int = 10
+MAX_PER_PAGE: int = 100  # GitHub silently caps larger page sizes
 DEFAULT_COMMIT_NUM: int = 10
 DEFAULT_OWNER: str = "psf"
 DEFAULT_REPO: str = "requests"
+DEFAULT_CONCURRENCY: int = 1
+STREAM_CHUNK_SIZE: int = 64 * 1024
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Commit:
     sha: str
     author: str
     commit_date: str
     message: str
+    full_sha: str = ""
 
     def __str__(self) -> str:
         msg = self.message.split("\n", maxsplit=1)[0]  # Remove newline
@@ -33,39 +43,199 @@ class Commit:
 def parse_commit(api_body: Any) -> Commit:
     return Commit(
         api_body["sha"][0:6],
-        api_body["commit"]["author"]["email"],
+        sys.intern(api_body["commit"]["author"]["email"]),  # the same few authors repeat across many commits
         api_body["commit"]["committer"]["date"],
         api_body["commit"]["message"],
+        api_body["sha"],
     )
 
 
-def pull_commits(owner: str, repo: str, num_commits: int = DEFAULT_COMMIT_NUM) -> list[Commit]:
-    logger.debug(f"Pulling {num_commits} commits from {owner}/{repo}")
-    next_link: Optional[str] = f"{GIT_BASE_URL}/repos/{owner}/{repo}/commits?per_page={num_commits}"
-    commits_list: list[Commit] = []
-
-    while len(commits_list) < num_commits and next_link is not None:
-        logger.debug(f"Making request for: {next_link}")
-        r = requests.get(next_link)
-        r.raise_for_status()
-        r_body = r.json()
-        logger.debug(f"  Received response: {r}")
-
-        link_header = r.headers["Link"]
-        next_link = None
-        for link in link_header.split(","):
-            if 'rel="next"' in link:
-                first_part = link.split(";")[0]
-                next_link = first_part.replace("<", "").replace(">", "")
-                break
-        logger.debug(f"  Found {len(r_body)} commits with {next_link=} from {link_header=}")
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Incrementally decodes a JSON array from byte `chunks`, yielding one element at a time.
 
-        for commit in r_body:
-            commits_list.append(parse_commit(commit))
-            if len(commits_list) == num_commits:
+    Only the element being decoded is held in memory, never the whole array.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    started = False
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        buffer = buffer[pos:] + text_decoder.decode(chunk or b"", final=final)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buffer):
                 break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"Expected a JSON array, found: {buffer[pos:pos + 20]!r}")
+                started = True
+                pos += 1
+            elif buffer[pos] == "]":
+                return
+            elif buffer[pos] == ",":
+                pos += 1
+            else:
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # wait for the rest of the element
+                if end == len(buffer) and not final:
+                    break  # e.g. a number that may continue in the next chunk
+                yield element
+                pos = end
+    raise ValueError("JSON array ended before its closing ']'")
+
+
+@dataclass(frozen=True)
+class Page:
+    """One page of the GitHub commits API"""
+
+    commits: list[Commit]
+    links: dict[str, str]
+    rate_limit_remaining: Optional[int] = None
+    rate_limit_reset: Optional[int] = None
+
+
+def parse_links(link_header: str) -> dict[str, str]:
+    """Parses a `Link` header (`<url>; rel="next", <url>; rel="last"`) into {"next": url, "last": url}"""
+    links = {}
+    for link in link_header.split(","):
+        if ";" not in link:
+            continue
+        url_part, rel_part = link.split(";", maxsplit=1)
+        rel = rel_part.strip().removeprefix("rel=").strip('"')
+        links[rel] = url_part.strip().removeprefix("<").removesuffix(">")
+    return links
+
+
+def page_number(url: str) -> int:
+    """Returns the `page` query parameter of `url` (GitHub's first page has none)"""
+    query = parse_qs(urlsplit(url).query)
+    return int(query["page"][0]) if "page" in query else 1
+
+
+def with_page(url: str, page: int) -> str:
+    """Returns `url` with its `page` query parameter set to `page`"""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key != "page"]
+    query.append(("page", str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def fetch_page(url: str, cache: Optional[HttpCache] = None) -> Page:
+    logger.debug(f"Making request for: {url}")
+    rate_limit: dict[str, int] = {}
+    if cache:
+        cached = cache.get(common.get_session(), url)
+        link_header = cached.headers.get("Link", "")
+        commits = [parse_commit(commit) for commit in iter_json_array([cached.body])]
+    else:
+        with common.get_session().get(url, stream=True) as r:
+            r.raise_for_status()
+            logger.debug(f"  Received response: {r}")
+            link_header = r.headers.get("Link", "")
+            for name in ["remaining", "reset"]:
+                if f"X-RateLimit-{name}" in r.headers:
+                    rate_limit[f"rate_limit_{name}"] = int(r.headers[f"X-RateLimit-{name}"])
+            commits = [parse_commit(commit) for commit in iter_json_array(r.iter_content(STREAM_CHUNK_SIZE))]
+
+    links = parse_links(link_header)
+    logger.debug(f"  Found {len(commits)} commits with next_link={links.get('next')} from {link_header=}")
+    return Page(commits, links, **rate_limit)
+
+
+def _remaining_page_urls(page: Page, num_remaining: int) -> list[str]:
+    """Uses `page`'s rel="next" and rel="last" links to list every page URL needed for `num_remaining` commits"""
+    next_link = page.links["next"]
+    per_page = int(parse_qs(urlsplit(next_link).query).get("per_page", [len(page.commits)])[0])
+    first_page = page_number(next_link)
+    last_page = page_number(page.links["last"]) if "last" in page.links else first_page
+    num_pages = -(-num_remaining // per_page)  # ceiling division
+    return [with_page(next_link, num) for num in range(first_page, min(first_page + num_pages, last_page + 1))]
+
+
+def choose_per_page(num_commits: int, per_page: Optional[int] = None) -> int:
+    """Returns the page size for pulling `num_commits`: `per_page` if given (capped at GitHub's `MAX_PER_PAGE`), else
+    the smallest size that still needs the fewest possible requests (so the last page isn't mostly thrown away)"""
+    if per_page:
+        return min(per_page, MAX_PER_PAGE)
+    num_pages = max(1, -(-num_commits // MAX_PER_PAGE))  # ceiling division
+    return -(-num_commits // num_pages)
+
+
+@dataclass
+class PullStats:
+    """Request count and latency of one `pull_commits` call"""
+
+    per_page: int = 0
+    commits: int = 0
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        latencies = sorted(self.latencies) or [0.0]
+        mean_ms = 1000 * sum(latencies) / len(latencies)
+        return (
+            f"PullStats: commits={self.commits} requests={len(self.latencies)} per_page={self.per_page} "
+            f"elapsed={self.elapsed:.3f}s latency_mean={mean_ms:.1f}ms latency_max={1000 * latencies[-1]:.1f}ms"
+        )
 
-    logger.info(f"Returning {len(commits_list)} commits.")
+
+def pull_commits(
+    owner: str,
+    repo: str,
+    num_commits: int = DEFAULT_COMMIT_NUM,
+    concurrency: int = 1,
+    cache: Optional[HttpCache] = None,
+    per_page: Optional[int] = None,
+    stats: Optional[PullStats] = None,
+) -> list[Commit]:
+    """Pulls the `num_commits` most recent commits.
+
+    Pages hold `choose_per_page(num_commits, per_page)` commits. With `concurrency` > 1, the page URLs after the first
+    are computed from its `Link` header and fetched by that many threads at once, instead of following rel="next" one
+    request at a time. With a `cache`, pages are revalidated with conditional requests and unchanged ones are served
+    from disk. Pass `stats` to have it filled in with the request count and latencies.
+    """
+    stats = stats if stats is not None else PullStats()
+    stats.per_page = choose_per_page(num_commits, per_page)
+    start = time.perf_counter()
+
+    def timed_fetch_page(url: str) -> Page:
+        request_start = time.perf_counter()
+        page = fetch_page(url, cache)
+        stats.latencies.append(time.perf_counter() - request_start)
+        return page
+
+    logger.debug(f"Pulling {num_commits} commits from {owner}/{repo}")
+    first_link = f"{GIT_BASE_URL}/repos/{owner}/{repo}/commits?per_page={stats.per_page}"
+    page = timed_fetch_page(first_link)
+    commits_list: list[Commit] = page.commits[:num_commits]
+
+    if concurrency > 1 and len(commits_list) < num_commits and "next" in page.links:
+        page_urls = _remaining_page_urls(page, num_commits - len(commits_list))
+        logger.debug(f"Fetching {len(page_urls)} more pages with {concurrency=}")
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for next_page in executor.map(timed_fetch_page, page_urls):
+                commits_list.extend(next_page.commits[: num_commits - len(commits_list)])
+    else:
+        next_link = page.links.get("next")
+        while len(commits_list) < num_commits and next_link is not None:
+            page = timed_fetch_page(next_link)
+            commits_list.extend(page.commits[: num_commits - len(commits_list)])
+            next_link = page.links.get("next")
+
+    stats.commits = len(commits_list)
+    stats.elapsed = time.perf_counter() - start
+    if cache:
+        logger.info(f"Response cache: {cache.hits} not modified, {cache.misses} downloaded")
+    logger.info(f"Returning {len(commits_list)} commits. {stats}")
     return commits_list
 
 
@@ -89,10 +259,59 @@ def main() -> None:
         help=f"The GitHub 'repo'. Default: {DEFAULT_REPO}",
     )
 
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"How many pages to fetch at once (after the first). Default: {DEFAULT_CONCURRENCY}",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Cache responses in this directory and revalidate them with conditional requests",
+    )
+    parser.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help=f"Evict least recently used responses beyond this size. Default: {DEFAULT_MAX_BYTES}",
+    )
+
+    parser.add_argument(
+        "--per-page",
+        type=int,
+        help=f"Commits per request (at most {MAX_PER_PAGE}). Default: the fewest requests for --commits",
+    )
+
+    parser.add_argument(
+        "--store",
+        type=Path,
+        help="Incremental mode: only pull commits newer than those in this SQLite store (see commit_store), add "
+        "them, and print the newest --commits from it",
+    )
+
     args = parser.parse_args()
-    commit_details = pull_commits(args.owner, args.repo, args.commits)
+    if args.store:
+        if args.concurrency > 1 or args.cache_dir:
+            raise RuntimeError(
+                "--store walks pages one at a time and can't be combined with --concurrency or --cache-dir"
+            )
+        # imported here, as commit_store builds on this module
+        from pysandbox.github.commit_store import CommitStore, sync_commits
+
+        with CommitStore(args.store) as store:
+            sync_commits(args.owner, args.repo, store, args.commits, args.per_page)
+            for commit in store.commits(args.owner, args.repo, limit=args.commits):
+                print(f"{commit}")
+        return
+
+    cache = HttpCache(args.cache_dir, args.cache_max_bytes) if args.cache_dir else None
+    stats = PullStats()
+    commit_details = pull_commits(args.owner, args.repo, args.commits, args.concurrency, cache, args.per_page, stats)
     for detail in commit_details:
         print(f"{detail}")
+    print(f"{stats}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Optional, Sequence, Union
+
+import pysandbox.common as common
+from pysandbox.github.pull_commits import (
+    DEFAULT_COMMIT_NUM,
+    GIT_BASE_URL,
+    Commit,
+    Page,
+    choose_per_page,
+    fetch_page,
+)
+
+"""Pulls commits from many GitHub repositories concurrently, streaming them out as pages arrive"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY: int = 8
+DEFAULT_RATE_LIMIT_RESERVE: int = 10
+DEFAULT_MAX_RATE_LIMIT_WAIT: float = 60.0
+
+
+class RateLimitBudget:
+    """The GitHub rate limit shared by every request of a sweep.
+
+    Each request takes one unit up front, so concurrent fetches can't overshoot, and responses' `X-RateLimit-*`
+    headers correct the count. Once only `reserve` units remain, requests wait for the reset (up to `max_wait`).
+    """
+
+    def __init__(
+        self, reserve: int = DEFAULT_RATE_LIMIT_RESERVE, max_wait: float = DEFAULT_MAX_RATE_LIMIT_WAIT
+    ) -> None:
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.remaining: Optional[int] = None
+        self.reset: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    def update(self, page: Page) -> None:
+        if page.rate_limit_remaining is None:
+            return
+        if page.rate_limit_reset != self.reset or self.remaining is None:
+            self.reset = page.rate_limit_reset
+            self.remaining = page.rate_limit_remaining
+        else:
+            self.remaining = min(self.remaining, page.rate_limit_remaining)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            if self.remaining is not None and self.remaining <= self.reserve:
+                wait = (self.reset or 0) - time.time()
+                if wait > self.max_wait:
+                    raise RuntimeError(f"GitHub rate limit exhausted; it resets in {wait:.0f}s")
+                logger.warning(f"Rate limit nearly exhausted; waiting {max(wait, 0):.0f}s for it to reset")
+                await asyncio.sleep(max(wait, 0))
+                self.remaining = None
+            if self.remaining is not None:
+                self.remaining -= 1
+
+
+def parse_repo(name: str) -> tuple[str, str]:
+    """Parses 'owner/repo'"""
+    owner, _, repo = name.strip().partition("/")
+    if not owner or not repo or "/" in repo:
+        raise RuntimeError(f"repo={name} must look like 'owner/repo'")
+    return owner, repo
+
+
+def normalize_repos(repos: Sequence[str]) -> list[str]:
+    """Returns `repos` as 'owner/repo' names, stripped and without duplicates (in their first order)"""
+    return list(dict.fromkeys("/".join(parse_repo(name)) for name in repos))
+
+
+async def _pull_repo(
+    owner: str,
+    repo: str,
+    num_commits: int,
+    executor: ThreadPoolExecutor,
+    semaphore: asyncio.Semaphore,
+    budget: RateLimitBudget,
+    queue: "asyncio.Queue[Union[tuple[str, Commit], None]]",
+) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+        next_link: Optional[str] = (
+            f"{GIT_BASE_URL}/repos/{owner}/{repo}/commits?per_page={choose_per_page(num_commits)}"
+        )
+        pulled = 0
+        while next_link is not None and pulled < num_commits:
+            async with semaphore:
+                await budget.acquire()
+                page = await loop.run_in_executor(executor, fetch_page, next_link)
+            budget.update(page)
+            for commit in page.commits[: num_commits - pulled]:
+                await queue.put((f"{owner}/{repo}", commit))
+            pulled += len(page.commits)
+            next_link = page.links.get("next")
+    except Exception as e:
+        logger.warning(f"Failed pulling {owner}/{repo}: {e}")
+    finally:
+        await queue.put(None)
+
+
+async def stream_commits(
+    repos: Sequence[str],
+    num_commits: int = DEFAULT_COMMIT_NUM,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    budget: Optional[RateLimitBudget] = None,
+) -> AsyncIterator[tuple[str, Commit]]:
+    """Yields ('owner/repo', commit) for the `num_commits` newest commits of every repo, in arrival order.
+
+    At most `concurrency` requests are in flight across all repos, and each repo is pulled once (see
+    `normalize_repos`). A repo that fails is logged and skipped.
+    """
+    owner_repos = [parse_repo(name) for name in normalize_repos(repos)]
+    budget = budget or RateLimitBudget()
+    semaphore = asyncio.Semaphore(concurrency)
+    queue: "asyncio.Queue[Union[tuple[str, Commit], None]]" = asyncio.Queue()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        tasks = [
+            asyncio.create_task(_pull_repo(owner, repo, num_commits, executor, semaphore, budget, queue))
+            for owner, repo in owner_repos
+        ]
+        unfinished = len(tasks)
+        try:
+            while unfinished:
+                item = await queue.get()
+                if item is None:
+                    unfinished -= 1
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def pull_many(
+    repos: Sequence[str], num_commits: int = DEFAULT_COMMIT_NUM, concurrency: int = DEFAULT_CONCURRENCY
+) -> dict[str, list[Commit]]:
+    """Collects `stream_commits` into {'owner/repo': commits (newest first)}, keyed by the normalized names"""
+    results: dict[str, list[Commit]] = {name: [] for name in normalize_repos(repos)}
+    async for name, commit in stream_commits(repos, num_commits, concurrency):
+        results[name].append(commit)
+    return results
+
+
+async def _print_commits(repos: Sequence[str], num_commits: int, concurrency: int) -> None:
+    count = 0
+    async for name, commit in stream_commits(repos, num_commits, concurrency):
+        print(f"{name:40} {commit}")
+        count += 1
+    logger.info(f"Pulled {count} commits from {len(repos)} repos")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Pulls commits from many GitHub repos concurrently")
+    parser.add_argument("repos", nargs="*", help="Repos to pull, as 'owner/repo'")
+    parser.add_argument("--repos-file", type=Path, help="A file with one 'owner/repo' per line (# for comments)")
+    parser.add_argument(
+        "--commits",
+        type=int,
+        default=DEFAULT_COMMIT_NUM,
+        help=f"The number of commits to return per repo. Default: {DEFAULT_COMMIT_NUM}",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"How many requests to have in flight across all repos. Default: {DEFAULT_CONCURRENCY}",
+    )
+
+    args = parser.parse_args()
+    repos = list(args.repos)
+    if args.repos_file:
+        lines = [line.split("#", maxsplit=1)[0].strip() for line in args.repos_file.read_text().splitlines()]
+        repos.extend(line for line in lines if line)
+    if not repos:
+        parser.error("no repos given")
+    asyncio.run(_print_commits(repos, args.commits, args.concurrency))
+
+
+if __name__ == "__main__":
+    common.initialize_logging_from_file()
+    main()
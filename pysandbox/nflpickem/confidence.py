@@ -0,0 +1,164 @@
+import argparse
+import logging
+import math
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from pysandbox.common import get_numpy
+from pysandbox.nflpickem.odds_cache import DEFAULT_CACHE_DIR, OddsCache
+from pysandbox.nflpickem.picker import Game, Picker
+
+"""Confidence-point picks: turns consensus spreads into win probabilities, ranks them to maximize expected points, and
+simulates the weekly score those picks would get.
+
+A game's margin of victory is modelled as normal around the spread, so the favorite wins with probability
+Phi(|spread| / sigma). Expected points are the sum of probability * confidence, which (by the rearrangement inequality)
+is largest when the most likely winner gets the most points: sorting is optimal.
+"""
+
+logger = logging.getLogger(__name__)
+
+np = get_numpy()
+HAS_NUMPY: bool = np is not None
+SPREAD_STDEV: float = 13.45  # how far NFL results land from the spread (stdev of margin minus spread, in points)
+DEFAULT_WEEKS: int = 20_000
+WEEKS_PER_CHUNK: int = 10_000  # simulated weeks per task (and per RNG stream); results don't depend on `processes`
+
+
+def win_probability(home_spread: float, sigma: float = SPREAD_STDEV) -> float:
+    """The home team's chance of winning when favored by -`home_spread` points"""
+    return 0.5 * (1 + math.erf(-home_spread / (sigma * math.sqrt(2))))
+
+
+@dataclass(frozen=True)
+class Pick:
+    game: Game
+    winner: str
+    probability: float
+    confidence: int
+
+    def __str__(self) -> str:
+        return f"{self.confidence:2} pts: {self.winner:22} ({100 * self.probability:4.1f}%)  {self.game}"
+
+
+def assign_confidence(games: Sequence[Game], sigma: float = SPREAD_STDEV) -> list[Pick]:
+    """Picks each game's favorite and gives the likeliest winner `len(games)` points, the next one less, and so on.
+
+    Returns the picks by descending confidence.
+    """
+    favorites = []
+    for game in games:
+        home_probability = win_probability(game.home_spread_avg, sigma)
+        if home_probability >= 0.5:
+            favorites.append((home_probability, game.home_team, game))
+        else:
+            favorites.append((1 - home_probability, game.away_team, game))
+    favorites.sort(key=lambda favorite: favorite[0], reverse=True)
+    return [
+        Pick(game, winner, probability, len(favorites) - ndx)
+        for ndx, (probability, winner, game) in enumerate(favorites)
+    ]
+
+
+def expected_points(picks: Sequence[Pick]) -> float:
+    return sum(pick.probability * pick.confidence for pick in picks)
+
+
+def _simulate_chunk(probabilities: Sequence[float], confidences: Sequence[int], weeks: int, seed: Any) -> list[int]:
+    """Scores of `weeks` simulated weeks. `seed` is a NumPy SeedSequence, or a string without NumPy."""
+    if HAS_NUMPY:
+        rng = np.random.default_rng(seed)
+        wins = rng.random((weeks, len(probabilities))) < np.asarray(probabilities)
+        scores: list[int] = (wins @ np.asarray(confidences, dtype=np.int64)).tolist()
+        return scores
+
+    rng_py = random.Random(seed)
+    picks = list(zip(probabilities, confidences))
+    return [sum(confidence for probability, confidence in picks if rng_py.random() < probability) for _ in range(weeks)]
+
+
+@dataclass(frozen=True)
+class ScoreDistribution:
+    """Weekly scores of simulated weeks"""
+
+    scores: list[int]
+    max_points: int
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.scores)
+
+    @property
+    def stdev(self) -> float:
+        return statistics.pstdev(self.scores)
+
+    def percentile(self, percent: float) -> int:
+        ordered = sorted(self.scores)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def __str__(self) -> str:
+        return (
+            f"ScoreDistribution: weeks={len(self.scores)} mean={self.mean:.2f} stdev={self.stdev:.2f} "
+            f"p10={self.percentile(10)} p50={self.percentile(50)} p90={self.percentile(90)} max={self.max_points}"
+        )
+
+
+def simulate(picks: Sequence[Pick], weeks: int, seed: int = 0, processes: Optional[int] = 1) -> ScoreDistribution:
+    """Simulates `weeks` weeks of `picks`, each game won independently with its pick's probability.
+
+    Weeks are simulated in chunks of `WEEKS_PER_CHUNK` with their own random streams, spread over `processes`
+    processes (None: one per CPU), so the result depends only on `seed`.
+    """
+    probabilities = [pick.probability for pick in picks]
+    confidences = [pick.confidence for pick in picks]
+    chunk_weeks = [min(WEEKS_PER_CHUNK, weeks - start) for start in range(0, weeks, WEEKS_PER_CHUNK)]
+    if HAS_NUMPY:
+        seeds: list[Any] = np.random.SeedSequence(seed).spawn(len(chunk_weeks))
+    else:
+        seeds = [f"{seed}-{chunk}" for chunk in range(len(chunk_weeks))]
+
+    args = ([probabilities] * len(chunk_weeks), [confidences] * len(chunk_weeks), chunk_weeks, seeds)
+    if processes == 1 or len(chunk_weeks) <= 1:
+        chunks = list(map(_simulate_chunk, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            chunks = list(executor.map(_simulate_chunk, *args))
+    return ScoreDistribution([score for chunk in chunks for score in chunk], sum(confidences))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Assigns NFL pickem confidence points and simulates the weekly score")
+    parser.add_argument(
+        "--sigma",
+        type=float,
+        default=SPREAD_STDEV,
+        help=f"Stdev of game results around the spread, in points. Default: {SPREAD_STDEV}",
+    )
+    parser.add_argument("--weeks", type=int, default=DEFAULT_WEEKS, help=f"Weeks to simulate. Default: {DEFAULT_WEEKS}")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    parser.add_argument(
+        "--processes", type=int, default=1, help="Processes to simulate with (0: one per CPU). Default: 1"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Where to cache the-odds-api responses. Default: {DEFAULT_CACHE_DIR}",
+    )
+
+    args = parser.parse_args()
+    games = Picker(cache=OddsCache(args.cache_dir)).picks()
+    picks = assign_confidence(games, args.sigma)
+    for pick in picks:
+        logger.info(f"{pick}")
+    logger.info(f"Expected points: {expected_points(picks):.2f} of {sum(pick.confidence for pick in picks)}")
+    if args.weeks:
+        logger.info(f"{simulate(picks, args.weeks, args.seed, args.processes or None)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import logging
+import math
+import statistics
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Optional, Sequence
+
+from pysandbox.common import get_numpy, require_numpy
+
+"""Consensus lines across bookmakers, computed over a columnar view of every outcome of one market.
+
+`flatten_market` walks the-odds-api JSON once, recording each outcome as a (group, value) pair where group is
+`2 * game + side`; a `MarketAggregator` says which outcome is which side and what its value is (e.g. side 0 is the home
+team's spread, 1 the away team's). The statistics are then grouped reductions over those two columns: vectorized
+`bincount`s with NumPy, or a single pass over the columns without it.
+"""
+
+logger = logging.getLogger(__name__)
+
+np = get_numpy()
+HAS_NUMPY: bool = np is not None
+ENGINES = ["auto", "python", "numpy"]
+HOME, AWAY = 0, 1
+
+
+def implied_probability(american_odds: float) -> float:
+    """The win probability priced into American odds (e.g. -110 -> 0.524), including the bookmaker's margin"""
+    if american_odds < 0:
+        return -american_odds / (100 - american_odds)
+    return 100 / (american_odds + 100)
+
+
+def _teams(game: Mapping[str, Any]) -> tuple[str, str]:
+    return game["home_team"], game["away_team"]
+
+
+def _over_under(game: Mapping[str, Any]) -> tuple[str, str]:
+    return "Over", "Under"
+
+
+@dataclass(frozen=True)
+class MarketAggregator:
+    """How to read one the-odds-api market: its `key`, the outcome names of a game's two sides, and which outcome
+    `field` (optionally `transform`ed) to summarize"""
+
+    key: str
+    sides: Callable[[Mapping[str, Any]], tuple[str, str]]
+    field: str
+    transform: Optional[Callable[[float], float]] = None
+
+
+SPREADS = MarketAggregator("spreads", _teams, "point")
+TOTALS = MarketAggregator("totals", _over_under, "point")
+H2H = MarketAggregator("h2h", _teams, "price", implied_probability)
+
+"""The markets `market_consensus` knows, by key. Register an aggregator here to support another market."""
+AGGREGATORS: dict[str, MarketAggregator] = {aggregator.key: aggregator for aggregator in [SPREADS, TOTALS, H2H]}
+SPREADS_MARKET: str = SPREADS.key
+
+
+@dataclass(frozen=True)
+class MarketColumns:
+    """Every outcome of one market for `num_games` games, as parallel columns"""
+
+    num_games: int
+    bookmakers: "array[int]"  # per game: how many bookmakers offered the market
+    groups: "array[int]"  # per outcome: 2 * game + side
+    points: "array[float]"  # per outcome: the value being summarized
+
+
+@dataclass(frozen=True)
+class MarketConsensus:
+    """A game's market summarized across bookmakers. Averages are NaN when no bookmaker offered the market.
+
+    The home_* fields describe the aggregator's first side (the home team, or Over for totals); away_* the second.
+    """
+
+    home_avg: float
+    away_avg: float
+    home_median: float
+    away_median: float
+    home_stdev: float
+    away_stdev: float
+    bookmakers: int
+
+
+def flatten_market(games: Sequence[Mapping[str, Any]], aggregator: MarketAggregator = SPREADS) -> MarketColumns:
+    """Flattens each bookmaker's (first) `aggregator.key` market of every game into columns"""
+    bookmakers = array("l", [0]) * len(games)
+    groups: list[int] = []
+    points: list[float] = []
+    add_group, add_point = groups.append, points.append  # this loop visits every outcome; skip the attribute lookups
+    key, field = aggregator.key, aggregator.field
+    for ndx, game in enumerate(games):
+        first, second = aggregator.sides(game)
+        sides = {first: 2 * ndx + HOME, second: 2 * ndx + AWAY}
+        offered = 0
+        for bookmaker in game["bookmakers"]:
+            for market in bookmaker["markets"]:
+                if market["key"] == key:
+                    offered += 1
+                    for outcome in market["outcomes"]:
+                        group = sides.get(outcome["name"])
+                        if group is not None:
+                            add_group(group)
+                            add_point(outcome[field])
+                    break
+        bookmakers[ndx] = offered
+    if aggregator.transform:
+        points = [aggregator.transform(point) for point in points]
+    return MarketColumns(len(games), bookmakers, array("l", groups), array("d", points))
+
+
+def flatten_spreads(games: Sequence[Mapping[str, Any]]) -> MarketColumns:
+    return flatten_market(games, SPREADS)
+
+
+def consensus_python(columns: MarketColumns) -> list[MarketConsensus]:
+    """Summarizes each game of `columns` in pure Python"""
+    grouped: list[list[float]] = [[] for _ in range(2 * columns.num_games)]
+    for group, point in zip(columns.groups, columns.points):
+        grouped[group].append(point)
+
+    def stats(points: list[float], bookmakers: int) -> tuple[float, float, float]:
+        if not points:
+            return 0.0 if bookmakers else math.nan, math.nan, math.nan
+        total = 0.0
+        for point in points:
+            total += point
+        mean = total / len(points)
+        squares = 0.0
+        for point in points:
+            deviation = point - mean
+            squares += deviation * deviation  # not ** 2, which can round differently than NumPy's square
+        return total / bookmakers, statistics.median(points), math.sqrt(squares / len(points))
+
+    results = []
+    for ndx, bookmakers in enumerate(columns.bookmakers):
+        home_avg, home_median, home_stdev = stats(grouped[2 * ndx + HOME], bookmakers)
+        away_avg, away_median, away_stdev = stats(grouped[2 * ndx + AWAY], bookmakers)
+        results.append(
+            MarketConsensus(home_avg, away_avg, home_median, away_median, home_stdev, away_stdev, bookmakers)
+        )
+    return results
+
+
+def consensus_numpy(columns: MarketColumns) -> list[MarketConsensus]:
+    """Summarizes each game of `columns` with NumPy (which must be installed), matching `consensus_python` exactly"""
+    num_groups = 2 * columns.num_games
+    groups = np.asarray(columns.groups)  # wraps the arrays' buffers without copying
+    points = np.asarray(columns.points)
+    bookmakers = np.repeat(np.asarray(columns.bookmakers), 2)
+
+    # bincount adds each group's points in input order, so the sums match adding them up one at a time in Python
+    counts = np.bincount(groups, minlength=num_groups)
+    sums = np.bincount(groups, weights=points, minlength=num_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = sums / bookmakers
+        means = sums / counts
+        deviations = points - means[groups]
+        stdevs = np.sqrt(np.bincount(groups, weights=deviations * deviations, minlength=num_groups) / counts)
+
+    # lay each group's points out as a row (padded with inf), sort the rows, and read the medians off the middle
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    positions = np.arange(len(groups)) - (np.cumsum(counts) - counts)[sorted_groups]
+    rows = np.full((num_groups, counts.max(initial=1)), np.inf)
+    rows[sorted_groups, positions] = points[order]
+    rows.sort(axis=1)
+    row_ndx = np.arange(num_groups)
+    medians = (rows[row_ndx, np.maximum(counts - 1, 0) // 2] + rows[row_ndx, counts // 2]) / 2
+    medians[counts == 0] = np.nan
+
+    summaries = zip(
+        averages[HOME::2].tolist(),
+        averages[AWAY::2].tolist(),
+        medians[HOME::2].tolist(),
+        medians[AWAY::2].tolist(),
+        stdevs[HOME::2].tolist(),
+        stdevs[AWAY::2].tolist(),
+        columns.bookmakers,
+    )
+    return [MarketConsensus(*summary) for summary in summaries]
+
+
+def market_consensus(
+    games: Sequence[Mapping[str, Any]], aggregator: MarketAggregator = SPREADS, engine: str = "auto"
+) -> list[MarketConsensus]:
+    """Summarizes the `aggregator` market of every game in `games` (the-odds-api Game objects), in order.
+
+    Both engines give identical results; 'auto' uses NumPy when it's installed.
+    """
+    if engine not in ENGINES:
+        raise RuntimeError(f"engine={engine} must be one of {ENGINES}")
+    if engine == "numpy":
+        require_numpy("engine=numpy")
+
+    columns = flatten_market(games, aggregator)
+    if engine == "python" or not HAS_NUMPY:
+        return consensus_python(columns)
+    return consensus_numpy(columns)
+
+
+def spread_consensus(games: Sequence[Mapping[str, Any]], engine: str = "auto") -> list[MarketConsensus]:
+    """Summarizes the spreads of every game in `games`; see `market_consensus`"""
+    return market_consensus(games, SPREADS, engine)
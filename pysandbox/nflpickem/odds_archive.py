@@ -0,0 +1,214 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from pysandbox.nflpickem.consensus import spread_consensus
+
+"""Append-only archive of the-odds-api snapshots, and the line movement of each game across them.
+
+`snapshots.jsonl.gz` is a concatenation of gzip members, one per snapshot, each holding that snapshot's games as JSON
+lines. `index.jsonl` has one line per snapshot with its fetch time, byte range and game ids, so a query decompresses
+only the snapshots (and parses only the games) it needs. An archive has a single writer process (appends from its
+threads are serialized).
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR: Path = Path.home() / ".local" / "share" / "pysandbox" / "odds-archive"
+DATA_FILE: str = "snapshots.jsonl.gz"
+INDEX_FILE: str = "index.jsonl"
+
+
+@dataclass(frozen=True)
+class SnapshotEntry:
+    fetched_at: datetime
+    offset: int
+    length: int
+    game_ids: frozenset[str]
+
+
+@dataclass(frozen=True)
+class LinePoint:
+    fetched_at: datetime
+    home_spread_avg: float
+    away_spread_avg: float
+    bookmakers: int
+
+
+@dataclass
+class LineMovement:
+    """A game's consensus spread in every archived snapshot that has it, oldest first"""
+
+    game_id: str
+    home_team: str
+    away_team: str
+    commence_time: str
+    points: list[LinePoint] = field(default_factory=list)
+
+    @property
+    def opening(self) -> LinePoint:
+        return self.points[0]
+
+    @property
+    def closing(self) -> LinePoint:
+        return self.points[-1]
+
+    @property
+    def movement(self) -> float:
+        """How far the home spread moved from the first snapshot to the last (negative: toward the home team)"""
+        return self.closing.home_spread_avg - self.opening.home_spread_avg
+
+    def __str__(self) -> str:
+        return (
+            f"{self.away_team:22} @ {self.home_team:22} {self.opening.home_spread_avg:6.2f} -> "
+            f"{self.closing.home_spread_avg:6.2f} ({self.movement:+.2f} over {len(self.points)} snapshots)"
+        )
+
+
+class OddsArchive:
+    def __init__(self, directory: Path = DEFAULT_ARCHIVE_DIR) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.data_path = self.directory / DATA_FILE
+        self.index_path = self.directory / INDEX_FILE
+        self._entries: Optional[list[SnapshotEntry]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self) -> list[SnapshotEntry]:
+        """The index, oldest snapshot first. Loaded once, then kept up to date by `append`."""
+        if self._entries is None:
+            entries = []
+            if self.index_path.exists():
+                with self.index_path.open() as f:
+                    for line in f:
+                        record = json.loads(line)
+                        fetched_at = datetime.fromtimestamp(record["fetched_at"], timezone.utc)
+                        entries.append(
+                            SnapshotEntry(fetched_at, record["offset"], record["length"], frozenset(record["games"]))
+                        )
+            entries.sort(key=lambda entry: entry.fetched_at)
+            self._entries = entries
+        return self._entries
+
+    def append(self, games: list[Any], fetched_at: Optional[datetime] = None) -> SnapshotEntry:
+        """Archives one snapshot (a the-odds-api odds response) as fetched at `fetched_at` (default: now)"""
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        lines = b"".join(json.dumps(game, separators=(",", ":")).encode() + b"\n" for game in games)
+        member = gzip.compress(lines)
+        with self._lock:
+            entry = self._append(member, fetched_at, [game["id"] for game in games])
+        logger.info(f"Archived {len(games)} games fetched at {fetched_at.isoformat()} to {self.data_path}")
+        return entry
+
+    def _append(self, member: bytes, fetched_at: datetime, game_ids: list[str]) -> SnapshotEntry:
+        entries = self.entries  # load the index before adding to it
+        with self.data_path.open("ab") as f:
+            offset = f.tell()
+            f.write(member)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # the index is written last, so a crash can only leave unreferenced bytes in the data file
+        record = {"fetched_at": fetched_at.timestamp(), "offset": offset, "length": len(member), "games": game_ids}
+        with self.index_path.open("a") as f:
+            f.write(json.dumps(record) + "\n")
+
+        entry = SnapshotEntry(fetched_at, offset, len(member), frozenset(game_ids))
+        entries.append(entry)
+        entries.sort(key=lambda entry: entry.fetched_at)
+        return entry
+
+    def select(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None, game_id: Optional[str] = None
+    ) -> list[SnapshotEntry]:
+        """The index entries fetched in [since, until] that contain `game_id` (if given)"""
+        return [
+            entry
+            for entry in self.entries
+            if (since is None or entry.fetched_at >= since)
+            and (until is None or entry.fetched_at <= until)
+            and (game_id is None or game_id in entry.game_ids)
+        ]
+
+    def snapshots(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None, game_id: Optional[str] = None
+    ) -> Iterator[tuple[datetime, list[Any]]]:
+        """Lazily yields (fetched_at, games) for each selected snapshot, oldest first, only parsing `game_id`'s line"""
+        selected = self.select(since, until, game_id)
+        if not selected:
+            return
+        needle = json.dumps(game_id).encode() if game_id else None
+        with self.data_path.open("rb") as f:
+            for entry in selected:
+                f.seek(entry.offset)
+                lines = gzip.decompress(f.read(entry.length)).splitlines()
+                games = [json.loads(line) for line in lines if needle is None or needle in line]
+                if game_id:
+                    games = [game for game in games if game["id"] == game_id]
+                yield entry.fetched_at, games
+
+    def line_movement(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        game_id: Optional[str] = None,
+        engine: str = "auto",
+    ) -> dict[str, LineMovement]:
+        """Returns {game id: its consensus spread over time} from the snapshots fetched in [since, until].
+
+        Each snapshot is summarized (in one columnar pass) as it is decompressed, so only the line points are kept.
+        """
+        movements: dict[str, LineMovement] = {}
+        for fetched_at, games in self.snapshots(since, until, game_id):
+            for game, spreads in zip(games, spread_consensus(games, engine)):
+                if not spreads.bookmakers:
+                    continue
+                movement = movements.get(game["id"])
+                if movement is None:
+                    movement = LineMovement(game["id"], game["home_team"], game["away_team"], game["commence_time"])
+                    movements[game["id"]] = movement
+                movement.points.append(LinePoint(fetched_at, spreads.home_avg, spreads.away_avg, spreads.bookmakers))
+        return movements
+
+
+def _parse_datetime(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def print_movements(movements: Iterable[LineMovement]) -> None:
+    for movement in sorted(movements, key=lambda movement: abs(movement.movement), reverse=True):
+        print(movement)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser("Shows how archived NFL spreads moved")
+    parser.add_argument(
+        "--archive-dir",
+        type=Path,
+        default=DEFAULT_ARCHIVE_DIR,
+        help=f"The archive written by `nflpicker-gen --archive-dir`. Default: {DEFAULT_ARCHIVE_DIR}",
+    )
+    parser.add_argument("--since", type=_parse_datetime, help="Only snapshots fetched at or after this ISO time")
+    parser.add_argument("--until", type=_parse_datetime, help="Only snapshots fetched at or before this ISO time")
+    parser.add_argument("--game-id", help="Only this the-odds-api game id")
+
+    args = parser.parse_args()
+    archive = OddsArchive(args.archive_dir)
+    movements = archive.line_movement(args.since, args.until, args.game_id)
+    logger.info(f"{len(movements)} games across {len(archive.select(args.since, args.until, args.game_id))} snapshots")
+    print_movements(movements.values())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+import requests
+
+from pysandbox.file_cache import FileCache
+
+"""On-disk cache of the-odds-api responses, reused until they are older than a TTL.
+
+Every the-odds-api call costs quota, and lines move slowly, so repeated runs within `ttl` seconds reuse the stored body
+instead of calling the API. The quota headers (`x-requests-remaining` / `x-requests-used`) of each real call are kept
+with the body, so the latest known quota is available without spending any.
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR: Path = Path.home() / ".cache" / "pysandbox" / "nflpickem"
+DEFAULT_TTL: float = 15 * 60
+SECRET_PARAMS: list[str] = ["apiKey"]
+
+
+@dataclass(frozen=True)
+class Quota:
+    """the-odds-api usage as of `checked_at` (epoch seconds); None when the response didn't say"""
+
+    remaining: Optional[int]
+    used: Optional[int]
+    checked_at: float
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str], checked_at: float) -> "Quota":
+        def header_int(name: str) -> Optional[int]:
+            value = headers.get(name)
+            return int(float(value)) if value else None
+
+        return cls(header_int("x-requests-remaining"), header_int("x-requests-used"), checked_at)
+
+    def __str__(self) -> str:
+        return f"{self.used} used, {self.remaining} remaining"
+
+
+@dataclass(frozen=True)
+class CachedOdds:
+    body: bytes
+    fetched_at: float
+    quota: Quota
+    from_cache: bool
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class OddsCache:
+    """Response bodies stored one file per request (URL and non-secret params), served while younger than `ttl`.
+
+    Bodies go through a `FileCache`, with the fetch time and quota kept alongside.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.quota: Optional[Quota] = None
+        self._files = FileCache(self.directory)
+
+    @staticmethod
+    def _key(url: str, params: Mapping[str, str]) -> dict[str, Any]:
+        return {"url": url, "params": {name: params[name] for name in sorted(params) if name not in SECRET_PARAMS}}
+
+    def _load(self, key: dict[str, Any]) -> Optional[CachedOdds]:
+        cached = self._files.load(key)
+        if not cached:
+            return None
+        metadata, body = cached
+        return CachedOdds(body, metadata["fetched_at"], Quota(**metadata["quota"]), True)
+
+    def _store(self, key: dict[str, Any], odds: CachedOdds) -> None:
+        quota = {"remaining": odds.quota.remaining, "used": odds.quota.used, "checked_at": odds.quota.checked_at}
+        self._files.store(key, {"fetched_at": odds.fetched_at, "quota": quota}, odds.body)
+
+    def get(self, session: requests.Session, url: str, params: Mapping[str, str], refresh: bool = False) -> CachedOdds:
+        """GETs `url` with `params`, unless a response younger than `ttl` is cached (and not `refresh`).
+
+        If the API call fails, a stale cached response is served instead (with a warning), so a session can continue
+        when the quota runs out.
+        """
+        key = self._key(url, params)
+        cached = self._load(key)
+        if cached:
+            self.quota = cached.quota
+            age = time.time() - cached.fetched_at
+            if not refresh and age < self.ttl:
+                logger.debug(f"Using odds cached {age:.0f}s ago (ttl={self.ttl:.0f}s)")
+                return cached
+
+        try:
+            r = session.get(url, params=params)
+            r.raise_for_status()
+        except requests.RequestException as e:
+            if not cached:
+                raise
+            logger.warning(f"Fetching odds failed ({e}); using odds cached {time.time() - cached.fetched_at:.0f}s ago")
+            return cached
+
+        fetched_at = time.time()
+        self.quota = Quota.from_headers(r.headers, fetched_at)
+        logger.info(f"the-odds-api quota: {self.quota}")
+        odds = CachedOdds(r.content, fetched_at, self.quota, False)
+        self._store(key, odds)
+        return odds
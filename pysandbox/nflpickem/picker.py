@@ -1,19 +1,40 @@
 """Automates my runyourpool NFL picks using spreads from the-odds-api"""
 
+import argparse
 import logging
+import math
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import date, datetime, timedelta
-from typing import Any, Optional
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional, Sequence
 from zoneinfo import ZoneInfo
 
-import requests
-
 import pysandbox.common as common
+from pysandbox.nflpickem.consensus import (
+    AGGREGATORS,
+    SPREADS_MARKET,
+    MarketConsensus,
+    market_consensus,
+)
+from pysandbox.nflpickem.odds_archive import OddsArchive
+from pysandbox.nflpickem.odds_cache import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_TTL,
+    OddsCache,
+    Quota,
+)
 
 # See: https://the-odds-api.com/liveapi/guides/v4/#overview
 ENV_API_TOKEN = "ODDS_API_KEY"
-GET_ODDS_URL = "https://api.the-odds-api.com/v4/sports/americanfootball_nfl/odds"
+ODDS_API_BASE_URL = "https://api.the-odds-api.com/v4"
+DEFAULT_SPORT = "americanfootball_nfl"
+GET_ODDS_URL = f"{ODDS_API_BASE_URL}/sports/{DEFAULT_SPORT}/odds"
+DEFAULT_CONCURRENCY: int = 4
 PDT = ZoneInfo("America/Los_Angeles")
 
 """Represents the JSON coming from the-odds-api that represents a game."""
@@ -31,6 +52,12 @@ class Game:
     away_team: str
     away_spread_avg: float
     start_time: datetime
+    home_spread_median: float = math.nan
+    away_spread_median: float = math.nan
+    home_spread_stdev: float = math.nan
+    away_spread_stdev: float = math.nan
+    bookmaker_count: int = 0
+    sport: str = DEFAULT_SPORT
 
     def __str__(self) -> str:
         away_avg = f"{self.away_spread_avg:6.2f}" if self.away_spread_avg < 0 else "      "
@@ -40,16 +67,62 @@ class Game:
         return f"Game: {self.away_team:22} {away_avg}  @  {self.home_team:22} {home_avg} [{start_time_str}]"
 
 
-def _call_odds_api() -> list[GameType]:
+@dataclass(frozen=True)
+class MarketLine:
+    """A game's consensus line in one market. `sides` names the consensus' home_* / away_* sides."""
+
+    sport: str
+    market: str
+    home_team: str
+    away_team: str
+    start_time: datetime
+    sides: tuple[str, str]
+    consensus: MarketConsensus
+
+    def __str__(self) -> str:
+        start_time_str = self.start_time.astimezone(PDT).strftime("%a, %m/%d %I:%M%p PDT")
+        first, second = self.sides
+        return (
+            f"{self.market:7} {self.away_team:22} @  {self.home_team:22} {first} {self.consensus.home_avg:.3g} / "
+            f"{second} {self.consensus.away_avg:.3g} [{start_time_str}]"
+        )
+
+
+def odds_url(sport: str) -> str:
+    return f"{ODDS_API_BASE_URL}/sports/{sport}/odds"
+
+
+def _call_odds_api(
+    cache: Optional[OddsCache] = None,
+    archive: Optional[OddsArchive] = None,
+    sport: str = DEFAULT_SPORT,
+    markets: Sequence[str] = (SPREADS_MARKET,),
+) -> list[GameType]:
     if ENV_API_TOKEN not in os.environ:
         raise Exception(f"'{ENV_API_TOKEN}' not found in environment variables.")
 
-    params = {"apiKey": os.environ[ENV_API_TOKEN], "regions": "us", "oddsFormat": "american", "markets": "spreads"}
-    response = requests.get(GET_ODDS_URL, params=params)
-    response.raise_for_status()
-    logger.debug(f"GET {GET_ODDS_URL} returned {response}")
-    games_json: list[GameType] = response.json()
-    logger.info(f"Retrieved recent data for {len(games_json)} games from {GET_ODDS_URL}")
+    url = odds_url(sport)
+    params = {
+        "apiKey": os.environ[ENV_API_TOKEN],
+        "regions": "us",
+        "oddsFormat": "american",
+        "markets": ",".join(markets),
+    }
+    if cache:
+        odds = cache.get(common.get_session(), url, params)
+        logger.debug(f"GET {url} {'served from cache' if odds.from_cache else 'fetched'}")
+        games_json: list[GameType] = odds.json()
+        if archive and not odds.from_cache:
+            archive.append(games_json, datetime.fromtimestamp(odds.fetched_at, timezone.utc))
+    else:
+        response = common.get_session().get(url, params=params)
+        response.raise_for_status()
+        logger.debug(f"GET {url} returned {response}")
+        logger.info(f"the-odds-api quota: {Quota.from_headers(response.headers, time.time())}")
+        games_json = response.json()
+        if archive:
+            archive.append(games_json)
+    logger.info(f"Retrieved recent data for {len(games_json)} games from {url}")
     return games_json
 
 
@@ -60,66 +133,222 @@ def _parse_start_time(game: GameType) -> datetime:
     return datetime.fromisoformat(start_time_str)
 
 
-def _filter_games(games_json: list[GameType], today: date) -> list[GameType]:
+@dataclass(frozen=True)
+class ParsedGame:
+    """A the-odds-api Game API object with the fields the picker needs parsed once"""
+
+    home_team: str
+    away_team: str
+    start_time: datetime
+    raw: GameType
+
+    @classmethod
+    def parse(cls, game: GameType) -> "ParsedGame":
+        return cls(game["home_team"], game["away_team"], _parse_start_time(game), game)
+
+
+def _filter_games(games: list[ParsedGame], today: date) -> list[ParsedGame]:
     """Filter out any games that take place after the upcoming Monday."""
     days_until_monday = 7 - today.weekday()  # NOTE: Monday == 0 for datetime.weekday()
     next_monday = today + timedelta(days=days_until_monday)
-
-    include_games = list()
-    for game in games_json:
-        start_time = _parse_start_time(game)
-        if start_time.astimezone(PDT).date() <= next_monday:
-            include_games.append(game)
-    return include_games
+    return [game for game in games if game.start_time.astimezone(PDT).date() <= next_monday]
 
 
-def generate_picks(today_input: Optional[date] = None) -> list[Game]:
-    # makes unit testing easier if we can mock what day it is...
-    today: date = today_input if today_input else date.today()
-
+@lru_cache(maxsize=None)
+def _initialize_logging() -> None:
+    """Configures logging the first time a `Picker` is created"""
     common.initialize_logging_from_file()
     logger.level = logging.INFO
-    games_json: list[GameType] = _call_odds_api()
-    games_list = list()
-
-    # filter out games that are after Monday...
-    filtered_games = _filter_games(games_json, today)
-
-    for game in filtered_games:
-        home_team = game["home_team"]
-        away_team = game["away_team"]
-        start_time = _parse_start_time(game)
-        logger.debug(f"   Processing game: {away_team} @ {home_team}")
-        bookmakers = game["bookmakers"]
-        logger.debug(f"      Consolidating {len(bookmakers)} bookmaker odds...")
-        home_points = 0.0
-        away_points = 0.0
-
-        for bm in bookmakers:
-            # logger.debug(f"         {bm['title']:20} as of {bm['last_update']}")
-            spread_markets = [market for market in bm["markets"] if market["key"] == "spreads"]
-            spread_market = spread_markets[0]
-            for outcome in spread_market["outcomes"]:
-                if outcome["name"] == home_team:
-                    home_points += outcome["point"]
-                if outcome["name"] == away_team:
-                    away_points += outcome["point"]
-
-        home_avg = home_points / len(bookmakers)
-        away_avg = away_points / len(bookmakers)
-        game_obj = Game(home_team, home_avg, away_team, away_avg, start_time)
-        games_list.append(game_obj)
-        logger.debug(f"      {game_obj}")
-
-    games_list.sort(key=lambda game: abs(game.home_spread_avg), reverse=True)
-    for ndx, sorted_game in enumerate(games_list):
-        logger.info(f"Game {ndx+1:2}: {sorted_game}")
-
-    return games_list
+
+
+@dataclass
+class PickTimings:
+    """Seconds spent in each stage of one `Picker` run. Sports run concurrently, so their stages' times are summed."""
+
+    fetch: float = 0.0
+    parse: float = 0.0
+    consensus: float = 0.0
+    rank: float = 0.0
+
+    @property
+    def total(self) -> float:
+        return self.fetch + self.parse + self.consensus + self.rank
+
+    def __str__(self) -> str:
+        return (
+            f"PickTimings: fetch={1000 * self.fetch:.1f}ms parse={1000 * self.parse:.1f}ms "
+            f"consensus={1000 * self.consensus:.1f}ms rank={1000 * self.rank:.1f}ms total={1000 * self.total:.1f}ms"
+        )
+
+
+class Picker:
+    """Generates picks repeatedly (e.g. per request of a service) without redoing any setup.
+
+    Each run fetches the odds of every sport in `sports` (up to `concurrency` at once) and summarizes each of their
+    `markets` (see `consensus.AGGREGATORS`). Logging is configured once per process. See `consensus.ENGINES` for
+    `engine`. With a `cache`, odds fetched within its TTL are reused instead of spending API quota. With an `archive`,
+    every freshly fetched response is appended to it (see `odds_archive.OddsArchive.line_movement`).
+    """
+
+    def __init__(
+        self,
+        engine: str = "auto",
+        cache: Optional[OddsCache] = None,
+        archive: Optional[OddsArchive] = None,
+        sports: Sequence[str] = (DEFAULT_SPORT,),
+        markets: Sequence[str] = (SPREADS_MARKET,),
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> None:
+        unknown = [market for market in markets if market not in AGGREGATORS]
+        if unknown:
+            raise RuntimeError(f"markets={unknown} must be among {list(AGGREGATORS)}")
+        _initialize_logging()
+        self.engine = engine
+        self.cache = cache
+        self.archive = archive
+        self.sports = list(sports)
+        self.markets = list(markets)
+        self.concurrency = concurrency
+        self.timings = PickTimings()
+        self._lock = threading.Lock()
+
+    def _sport_lines(self, sport: str, today: date, timings: PickTimings) -> list[MarketLine]:
+        start = time.perf_counter()
+        games_json = _call_odds_api(self.cache, self.archive, sport, self.markets)
+        fetched = time.perf_counter()
+
+        # filter out games that are after Monday...
+        games = _filter_games([ParsedGame.parse(game) for game in games_json], today)
+        parsed = time.perf_counter()
+
+        lines = []
+        for market in self.markets:
+            aggregator = AGGREGATORS[market]
+            all_consensus = market_consensus([game.raw for game in games], aggregator, self.engine)
+            for game, consensus in zip(games, all_consensus):
+                if not consensus.bookmakers:
+                    logger.warning(f"   Skipping game without {market}: {game.away_team} @ {game.home_team}")
+                    continue
+                sides = aggregator.sides(game.raw)
+                lines.append(
+                    MarketLine(sport, market, game.home_team, game.away_team, game.start_time, sides, consensus)
+                )
+        summarized = time.perf_counter()
+
+        with self._lock:
+            timings.fetch += fetched - start
+            timings.parse += parsed - fetched
+            timings.consensus += summarized - parsed
+        return lines
+
+    def lines(self, today: Optional[date] = None) -> list[MarketLine]:
+        """Returns this week's consensus line of every game in every configured sport and market.
+
+        `timings` covers this call (and ranking, if `picks` made it).
+        """
+        # makes unit testing easier if we can mock what day it is...
+        today = today or date.today()
+        timings = self.timings = PickTimings()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(self.sports)))) as executor:
+            per_sport = list(executor.map(lambda sport: self._sport_lines(sport, today, timings), self.sports))
+        return [line for lines in per_sport for line in lines]
+
+    def rank(self, lines: Sequence[MarketLine]) -> list[Game]:
+        """Returns the spreads among `lines` as Games, most lopsided consensus spread first"""
+        start = time.perf_counter()
+        games_list = list()
+        for line in lines:
+            if line.market != SPREADS_MARKET:
+                continue
+            spreads = line.consensus
+            game_obj = Game(
+                line.home_team,
+                spreads.home_avg,
+                line.away_team,
+                spreads.away_avg,
+                line.start_time,
+                spreads.home_median,
+                spreads.away_median,
+                spreads.home_stdev,
+                spreads.away_stdev,
+                spreads.bookmakers,
+                line.sport,
+            )
+            games_list.append(game_obj)
+            logger.debug(f"      {game_obj} from {spreads.bookmakers} bookmakers")
+
+        games_list.sort(key=lambda game: abs(game.home_spread_avg), reverse=True)
+        self.timings.rank = time.perf_counter() - start
+
+        for ndx, sorted_game in enumerate(games_list):
+            logger.info(f"Game {ndx+1:2}: {sorted_game}")
+        logger.debug(f"{self.timings}")
+        return games_list
+
+    def picks(self, today: Optional[date] = None) -> list[Game]:
+        """Returns this week's games, most lopsided consensus spread first. `timings` covers this call."""
+        if SPREADS_MARKET not in self.markets:
+            raise RuntimeError(f"Picks need the '{SPREADS_MARKET}' market; markets={self.markets}")
+        return self.rank(self.lines(today))
+
+
+def generate_picks(
+    today_input: Optional[date] = None,
+    engine: str = "auto",
+    cache: Optional[OddsCache] = None,
+    archive: Optional[OddsArchive] = None,
+    sports: Sequence[str] = (DEFAULT_SPORT,),
+) -> list[Game]:
+    """One-off `Picker(engine, cache, archive, sports).picks(today_input)`"""
+    return Picker(engine, cache, archive, sports).picks(today_input)
 
 
 def main() -> None:
-    generate_picks()
+    parser = argparse.ArgumentParser("Generates NFL picks from the-odds-api consensus spreads")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Where to cache the-odds-api responses. Default: {DEFAULT_CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--ttl",
+        type=float,
+        default=DEFAULT_TTL,
+        help=f"Seconds to reuse cached odds before calling the API again. Default: {DEFAULT_TTL:.0f}",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API, without caching")
+    parser.add_argument("--archive-dir", type=Path, help="Append every fetched odds response to this archive")
+    parser.add_argument(
+        "--sports",
+        nargs="+",
+        default=[DEFAULT_SPORT],
+        help=f"the-odds-api sport keys to cover in one run. Default: {DEFAULT_SPORT}",
+    )
+    parser.add_argument(
+        "--markets",
+        nargs="+",
+        choices=list(AGGREGATORS),
+        default=[SPREADS_MARKET],
+        help=f"Markets to summarize; picks come from spreads. Default: {SPREADS_MARKET}",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"How many sports to fetch at once. Default: {DEFAULT_CONCURRENCY}",
+    )
+
+    args = parser.parse_args()
+    cache = None if args.no_cache else OddsCache(args.cache_dir, args.ttl)
+    archive = OddsArchive(args.archive_dir) if args.archive_dir else None
+    picker = Picker("auto", cache, archive, args.sports, args.markets, args.concurrency)
+    lines = picker.lines()
+    picker.rank(lines)
+    for line in lines:
+        if line.market != SPREADS_MARKET:
+            logger.info(f"{line.sport}: {line}")
+    logger.info(f"{picker.timings}")
 
 
 if __name__ == "__main__":
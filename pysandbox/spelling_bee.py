@@ -1,53 +1,447 @@
 import argparse
+import hashlib
+import heapq
+import json
 import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import IO, Callable, Iterable, Iterator, Optional, Sequence, Union, overload
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_DICTIONARY_PATH: Path = Path("etc/dictionary-usa.txt")
+MIN_WORD_LENGTH: int = 4
+PANGRAM_BONUS: int = 7
+ENGINES: list[str] = ["auto", "python", "numpy"]
+
+CACHE_SUFFIX: str = ".sbidx"
+
+# Bits 0-25 represent 'a'-'z'. Any other character sets this bit, so such words never fit a puzzle of letters.
+OTHER_CHARACTER_BIT: int = 1 << 26
 
 """Script that solves https://www.nytimes.com/puzzles/spelling-bee puzzles!"""
 
 
+def letter_mask(word: str) -> int:
+    """Returns the bitmask of (lowercased) letters used in `word`"""
+    mask = 0
+    for letter in word.lower():
+        offset = ord(letter) - ord("a")
+        mask |= 1 << offset if 0 <= offset < 26 else OTHER_CHARACTER_BIT
+    return mask
+
+
 def acceptable_word(word: str, must_letter: str, may_letters: list[str]) -> bool:
-    if len(word) < 4:
+    if len(word) < MIN_WORD_LENGTH:
         return False
-    acceptable_letters = [must_letter] + may_letters
-    valid = must_letter in word
-    if valid:
-        for letter in word.lower():
-            valid = letter in acceptable_letters
-            if not valid:
-                return False
-    return valid
+    must_mask = letter_mask(must_letter)
+    allowed_mask = must_mask | letter_mask("".join(may_letters))
+    word_mask = letter_mask(word)
+    return word_mask & must_mask != 0 and word_mask & ~allowed_mask == 0
+
+
+@dataclass(frozen=True, eq=False)
+class DictionaryIndex:
+    """Dictionary words with their letter bitmasks, grouped by mask so puzzles are answered without re-scanning.
+
+    `group_masks` holds each distinct word mask (sorted). The words using `group_masks[g]` are the dictionary
+    positions `group_members[group_starts[g]:group_starts[g + 1]]`, in dictionary order.
+    """
+
+    words: Sequence[str]
+    masks: Sequence[int]
+    lengths: Sequence[int]
+    group_masks: Sequence[int]
+    group_starts: Sequence[int]
+    group_members: Sequence[int]
+
+    @classmethod
+    def from_words(cls, words: Sequence[str]) -> "DictionaryIndex":
+        masks = [letter_mask(word) for word in words]
+        lengths = [len(word) for word in words]
+        members = sorted(range(len(words)), key=lambda position: masks[position])
+
+        group_masks: list[int] = []
+        group_starts: list[int] = []
+        for ndx, position in enumerate(members):
+            if not group_masks or group_masks[-1] != masks[position]:
+                group_masks.append(masks[position])
+                group_starts.append(ndx)
+        group_starts.append(len(members))
+        return cls(words, masks, lengths, group_masks, group_starts, members)
+
+    def _group_positions(self, group: int, min_length: int) -> Iterator[int]:
+        for ndx in range(self.group_starts[group], self.group_starts[group + 1]):
+            position = self.group_members[ndx]
+            if self.lengths[position] >= min_length:
+                yield position
+
+    def _lookup(self, mask: int, min_length: int) -> Iterator[int]:
+        group = bisect_left(self.group_masks, mask)
+        if group < len(self.group_masks) and self.group_masks[group] == mask:
+            yield from self._group_positions(group, min_length)
+
+    def _lookup_is_cheaper(self, optional_mask: int) -> bool:
+        return 1 << bin(optional_mask).count("1") <= len(self.group_masks)
+
+    def iter_matches(self, must_mask: int, allowed_mask: int, min_length: int = MIN_WORD_LENGTH) -> Iterator[int]:
+        """Yields dictionary positions of words using `must_mask` and nothing outside `allowed_mask`, as found"""
+        optional_mask = allowed_mask & ~must_mask
+        if self._lookup_is_cheaper(optional_mask):
+            # Few letters: look up every subset of the optional letters (plus the must letter) directly
+            subset = optional_mask
+            while True:
+                yield from self._lookup(subset | must_mask, min_length)
+                if subset == 0:
+                    break
+                subset = (subset - 1) & optional_mask
+        else:
+            # Many letters: cheaper to test each distinct word mask once
+            for group, group_mask in enumerate(self.group_masks):
+                if group_mask & must_mask and not group_mask & ~allowed_mask:
+                    yield from self._group_positions(group, min_length)
+
+    def match_positions(self, must_mask: int, allowed_mask: int, min_length: int = MIN_WORD_LENGTH) -> list[int]:
+        """Returns (unsorted) dictionary positions of words using `must_mask` and nothing outside `allowed_mask`"""
+        return list(self.iter_matches(must_mask, allowed_mask, min_length))
+
+    def match_many(
+        self, puzzle_masks: Iterable[tuple[int, int]], min_length: int = MIN_WORD_LENGTH
+    ) -> dict[tuple[int, int], list[int]]:
+        """`match_positions` for each distinct (must_mask, allowed_mask), sharing one pass over the letter groups"""
+        results: dict[tuple[int, int], list[int]] = {}
+        scanned: dict[int, list[int]] = {}  # allowed_mask -> must_masks
+        for must_mask, allowed_mask in puzzle_masks:
+            if (must_mask, allowed_mask) in results:
+                continue
+            if self._lookup_is_cheaper(allowed_mask & ~must_mask):
+                results[(must_mask, allowed_mask)] = self.match_positions(must_mask, allowed_mask, min_length)
+            else:
+                results[(must_mask, allowed_mask)] = []
+                scanned.setdefault(allowed_mask, []).append(must_mask)
+
+        if scanned:
+            # Test each distinct word mask once, for every many-letter puzzle at the same time
+            for group, group_mask in enumerate(self.group_masks):
+                for allowed_mask, must_masks in scanned.items():
+                    if group_mask & ~allowed_mask:
+                        continue
+                    for must_mask in must_masks:
+                        if group_mask & must_mask:
+                            results[(must_mask, allowed_mask)].extend(self._group_positions(group, min_length))
+        return results
+
+    def sorted_words(self, positions: Iterable[int]) -> list[str]:
+        """Returns the words at `positions`, longest first (ties keep dictionary order)"""
+        ordered = sorted(positions, key=lambda position: (-self.lengths[position], position))
+        return [self.words[position] for position in ordered]
+
+    def solve(self, must_letter: str, may_letters: str) -> list[str]:
+        must_mask = letter_mask(must_letter)
+        return self.sorted_words(self.match_positions(must_mask, must_mask | letter_mask(may_letters)))
+
+
+class PackedWords(Sequence[str]):
+    """Words stored back to back as UTF-8 in `blob`, where word `i` is `blob[offsets[i]:offsets[i + 1]]`"""
+
+    def __init__(self, blob: Union[bytes, memoryview], offsets: Sequence[int]) -> None:
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
 
+    @overload
+    def __getitem__(self, ndx: int) -> str: ...
 
-def solve_puzzle(must_letter: str, may_letters: str, dictionary_file: Path = DEFAULT_DICTIONARY_PATH) -> list[str]:
+    @overload
+    def __getitem__(self, ndx: slice) -> list[str]: ...
+
+    def __getitem__(self, ndx: Union[int, slice]) -> Union[str, list[str]]:
+        if isinstance(ndx, slice):
+            return [self[i] for i in range(*ndx.indices(len(self)))]
+        if ndx < 0:
+            ndx += len(self)
+        if not 0 <= ndx < len(self):
+            raise IndexError(f"word index {ndx} out of range")
+        start, end = self.offsets[ndx], self.offsets[ndx + 1]
+        return bytes(self.blob[start:end]).decode()
+
+
+# Binary cache layout: the header, then the uint32 arrays (masks, word offsets, group masks, group starts, group
+# members), then the uint16 word lengths and finally the UTF-8 word blob. Arrays use the byte order of the machine
+# that wrote the cache, which is recorded in the header.
+_CACHE_MAGIC = b"SBIDX001"
+_CACHE_HEADER = struct.Struct("<8s?7xqq20sIII4x")
+
+
+def _cache_path(dictionary_path: Path) -> Path:
+    return dictionary_path.with_name(dictionary_path.name + CACHE_SUFFIX)
+
+
+def _file_digest(data: bytes) -> bytes:
+    return hashlib.sha1(data).digest()
+
+
+def _read_cache(cache_path: Path, dictionary_path: Path, stat: os.stat_result) -> Optional[DictionaryIndex]:
+    """Memory-maps `cache_path`, returning None when it is missing, corrupt or stale"""
+    try:
+        with open(cache_path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ValueError: empty file
+        return None
+
+    if len(buffer) < _CACHE_HEADER.size:
+        return None
+    magic, little_endian, mtime_ns, size, digest, word_count, group_count, blob_size = _CACHE_HEADER.unpack_from(buffer)
+    if magic != _CACHE_MAGIC or little_endian != (sys.byteorder == "little"):
+        return None
+    if (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+        # Only the timestamp changed (e.g. a fresh checkout)? The contents decide, and once they match the new
+        # timestamp is recorded so the next load skips hashing the dictionary again.
+        if size != stat.st_size or digest != _file_digest(dictionary_path.read_bytes()):
+            return None
+        header = _CACHE_HEADER.pack(
+            magic, little_endian, stat.st_mtime_ns, size, digest, word_count, group_count, blob_size
+        )
+        try:  # in place: the header keeps its size, and either timestamp is valid for concurrent readers
+            with open(cache_path, "r+b") as f:
+                f.write(header)
+        except OSError as e:
+            logger.debug(f"Unable to update the timestamp of dictionary cache {cache_path}: {e}")
+
+    uint32_counts = [word_count, word_count + 1, group_count, group_count + 1, word_count]
+    if len(buffer) != _CACHE_HEADER.size + 4 * sum(uint32_counts) + 2 * word_count + blob_size:
+        return None
+
+    view = memoryview(buffer)
+    sections: list[memoryview] = []
+    start = _CACHE_HEADER.size
+    for count in uint32_counts:
+        end = start + 4 * count
+        sections.append(view[start:end].cast("I"))
+        start = end
+    masks, offsets, group_masks, group_starts, group_members = sections
+    blob_start = start + 2 * word_count
+    lengths = view[start:blob_start].cast("H")
+    blob = view[blob_start:]
+    return DictionaryIndex(PackedWords(blob, offsets), masks, lengths, group_masks, group_starts, group_members)
+
+
+def _write_cache(cache_path: Path, index: DictionaryIndex, stat: os.stat_result, digest: bytes) -> None:
+    """Atomically writes `index` to `cache_path`, so concurrent readers never see a partial file"""
+    encoded = [word.encode() for word in index.words]
+    offsets = [0]
+    for word_bytes in encoded:
+        offsets.append(offsets[-1] + len(word_bytes))
+    blob = b"".join(encoded)
+
+    header = _CACHE_HEADER.pack(
+        _CACHE_MAGIC,
+        sys.byteorder == "little",
+        stat.st_mtime_ns,
+        stat.st_size,
+        digest,
+        len(index.words),
+        len(index.group_masks),
+        len(blob),
+    )
+    uint32_sections = [index.masks, offsets, index.group_masks, index.group_starts, index.group_members]
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            for section in uint32_sections:
+                f.write(array("I", section).tobytes())
+            f.write(array("H", index.lengths).tobytes())
+            f.write(blob)
+        os.replace(tmp_path, cache_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+_index_cache: dict[Path, tuple[tuple[int, int], DictionaryIndex]] = {}
+
+
+def load_dictionary_index(dictionary_file: Path = DEFAULT_DICTIONARY_PATH, use_cache: bool = True) -> DictionaryIndex:
+    """Returns the `DictionaryIndex` for `dictionary_file`, only rebuilding it when the file has changed.
+
+    With `use_cache`, the index is memory-mapped from a binary cache next to the dictionary (written on first use),
+    so separate processes share one page-cached copy instead of each parsing the text file.
+    """
     dictionary_path = Path(dictionary_file)
     if not dictionary_path.exists():
         raise RuntimeError(f"Dictionary file: '{dictionary_path}' does not exist")
+
+    stat = dictionary_path.stat()
+    file_stamp = (stat.st_mtime_ns, stat.st_size)
+    cache_key = dictionary_path.resolve()
+    cached = _index_cache.get(cache_key)
+    if cached and cached[0] == file_stamp:
+        return cached[1]
+
+    cache_path = _cache_path(dictionary_path)
+    index = _read_cache(cache_path, dictionary_path, stat) if use_cache else None
+    if index:
+        logger.debug(f"Loaded {len(index.words)} indexed words from cache {cache_path}")
+    else:
+        data = dictionary_path.read_bytes()
+        words = [line.strip() for line in data.decode().splitlines()]
+        index = DictionaryIndex.from_words(words)
+        logger.debug(f"Indexed {len(words)} words into {len(index.group_masks)} letter groups from {dictionary_path}")
+        if use_cache:
+            try:
+                _write_cache(cache_path, index, stat, _file_digest(data))
+            except (OSError, OverflowError) as e:
+                logger.warning(f"Unable to write dictionary cache {cache_path}: {e}")
+
+    _index_cache[cache_key] = (file_stamp, index)
+    return index
+
+
+def validate_letters(must_letter: str, may_letters: str) -> None:
     if len(must_letter) != 1:
         raise RuntimeError(f"must_letter={must_letter} must be of length one")
     if len(may_letters) == 0:
         raise RuntimeError(f"may_letters={may_letters} cannot be empty")
 
+
+def get_solver(index: DictionaryIndex, engine: str = "auto") -> Callable[[str, str], list[str]]:
+    """Returns the `engine`'s solve function. 'auto' picks per puzzle when NumPy is installed, else uses 'python'"""
+    if engine not in ENGINES:
+        raise RuntimeError(f"engine={engine} must be one of {ENGINES}")
+    if engine == "python":
+        return index.solve
+
+    from pysandbox.spelling_bee_numpy import HAS_NUMPY, numpy_matcher, solve_auto
+
+    if engine == "numpy":
+        return numpy_matcher(index).solve
+    return partial(solve_auto, index) if HAS_NUMPY else index.solve
+
+
+def solve_puzzle(
+    must_letter: str,
+    may_letters: str,
+    dictionary_file: Path = DEFAULT_DICTIONARY_PATH,
+    use_cache: bool = True,
+    engine: str = "auto",
+) -> list[str]:
+    index = load_dictionary_index(dictionary_file, use_cache)
+    validate_letters(must_letter, may_letters)
+
     must_letter_low = must_letter.lower()
-    may_letters_low = [letter.lower() for letter in may_letters]
+    may_letters_low = may_letters.lower()
     logger.debug(
         f"Solving puzzle with must_letter={must_letter_low} may_letters={may_letters_low} dict_file={dictionary_file}"
     )
 
-    words = []
-    with open(dictionary_path) as f:
-        for line in f:
-            word = line.strip()  # Strip newline char
-            if acceptable_word(word, must_letter_low, may_letters_low):
-                words.append(word)
+    return get_solver(index, engine)(must_letter_low, may_letters_low)
 
-    words.sort(key=lambda s: -len(s))
-    for word in words:
-        print(word)
-    return words
+
+def score_word(word: str, allowed_mask: int) -> int:
+    """Official spelling-bee points: 1 for a 4-letter word, else 1 per letter, plus a bonus for using every letter"""
+    score = 1 if len(word) == MIN_WORD_LENGTH else len(word)
+    if letter_mask(word) == allowed_mask:
+        score += PANGRAM_BONUS
+    return score
+
+
+def iter_words(
+    must_letter: str, may_letters: str, dictionary_file: Path = DEFAULT_DICTIONARY_PATH, use_cache: bool = True
+) -> Iterator[str]:
+    """Yields the puzzle's words as they are found (not sorted), so callers can stop early"""
+    index = load_dictionary_index(dictionary_file, use_cache)
+    validate_letters(must_letter, may_letters)
+    must_mask = letter_mask(must_letter)
+    for position in index.iter_matches(must_mask, must_mask | letter_mask(may_letters)):
+        yield index.words[position]
+
+
+def top_words(
+    must_letter: str,
+    may_letters: str,
+    k: int,
+    dictionary_file: Path = DEFAULT_DICTIONARY_PATH,
+    use_cache: bool = True,
+) -> list[tuple[str, int]]:
+    """Returns the `k` highest-scoring (word, score) pairs, best first (ties keep dictionary order).
+
+    Only `k` candidates are held at once, in a heap.
+    """
+    index = load_dictionary_index(dictionary_file, use_cache)
+    validate_letters(must_letter, may_letters)
+    must_mask = letter_mask(must_letter)
+    allowed_mask = must_mask | letter_mask(may_letters)
+
+    def rank(position: int) -> tuple[int, int]:
+        return score_word(index.words[position], allowed_mask), -position
+
+    best = heapq.nlargest(k, index.iter_matches(must_mask, allowed_mask), key=rank)
+    return [(index.words[position], rank(position)[0]) for position in best]
+
+
+@dataclass(frozen=True)
+class Puzzle:
+    must_letter: str
+    may_letters: str
+
+    @property
+    def masks(self) -> tuple[int, int]:
+        """The puzzle's (must_mask, allowed_mask)"""
+        must_mask = letter_mask(self.must_letter)
+        return must_mask, must_mask | letter_mask(self.may_letters)
+
+
+def parse_puzzles(lines: Iterable[str]) -> Iterator[Puzzle]:
+    """Parses one '<must_letter> <may_letters>' puzzle per line, skipping blank lines and '#' comments"""
+    for line_num, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = line.split()
+        if len(fields) != 2:
+            raise RuntimeError(f"Line {line_num}: '{line}' must be '<must_letter> <may_letters>'")
+        validate_letters(*fields)
+        yield Puzzle(*fields)
+
+
+def solve_puzzles(
+    puzzles: Iterable[Puzzle], dictionary_file: Path = DEFAULT_DICTIONARY_PATH, use_cache: bool = True
+) -> Iterator[tuple[Puzzle, list[str]]]:
+    """Solves every puzzle in one pass over the dictionary, yielding (puzzle, words) in the order given.
+
+    Puzzles with the same letters are only solved once.
+    """
+    index = load_dictionary_index(dictionary_file, use_cache)
+    puzzle_list = list(puzzles)
+    for puzzle in puzzle_list:
+        validate_letters(puzzle.must_letter, puzzle.may_letters)
+    matches = index.match_many(puzzle.masks for puzzle in puzzle_list)
+    logger.debug(f"Solved {len(puzzle_list)} puzzles ({len(matches)} distinct) from {dictionary_file}")
+
+    answers: dict[tuple[int, int], list[str]] = {}
+    for puzzle in puzzle_list:
+        masks = puzzle.masks
+        if masks not in answers:
+            answers[masks] = index.sorted_words(matches[masks])
+        yield puzzle, answers[masks]
+
+
+def write_batch(
+    puzzles_file: IO[str], out: IO[str], dictionary_file: Path = DEFAULT_DICTIONARY_PATH, use_cache: bool = True
+) -> None:
+    """Solves the puzzles in `puzzles_file`, writing a JSON line per puzzle to `out`"""
+    for puzzle, words in solve_puzzles(parse_puzzles(puzzles_file), dictionary_file, use_cache):
+        answer = {"must_letter": puzzle.must_letter, "may_letters": puzzle.may_letters, "words": words}
+        out.write(json.dumps(answer) + "\n")
 
 
 def main() -> None:
@@ -63,6 +457,20 @@ def main() -> None:
         help=f"The dictionary text file to use. One word per line. Default: {DEFAULT_DICTIONARY_PATH}",
     )
 
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Don't read or write the compiled dictionary cache (the dictionary file plus '{CACHE_SUFFIX}')",
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="auto",
+        help="How to match words: 'numpy' (vectorized), 'python' (letter index) or 'auto' (either). Only for single "
+        "puzzles without --top. Default: auto",
+    )
+
     parser.add_argument(
         "--must-letter",
         help="The letter in the center of the puzzle, which must be in the answer at least once.",
@@ -73,10 +481,43 @@ def main() -> None:
         help="The other letters that may be in the answer one or more times",
     )
 
+    parser.add_argument(
+        "--batch-file",
+        type=Path,
+        help="Solve every '<must_letter> <may_letters>' line of this file ('-' for stdin), printing JSON lines",
+    )
+
+    parser.add_argument(
+        "--top",
+        type=int,
+        help="Only print this many of the highest-scoring words (with their scores)",
+    )
+
     args = parser.parse_args()
+    if args.top is not None and args.top < 1:
+        raise RuntimeError(f"--top={args.top} must be at least 1")
+    if args.engine != "auto" and (args.batch_file or args.top is not None):
+        raise RuntimeError(
+            f"--engine={args.engine} can't be combined with --batch-file or --top, which use the letter index"
+        )
+
+    if args.batch_file:
+        if str(args.batch_file) == "-":
+            write_batch(sys.stdin, sys.stdout, args.dictionary_file, use_cache=not args.no_cache)
+        else:
+            with args.batch_file.open() as puzzles_file:
+                write_batch(puzzles_file, sys.stdout, args.dictionary_file, use_cache=not args.no_cache)
+        return
+
     must_letter = args.must_letter or input("Must Letter: ")
     may_letters = args.optional_letters or input("May Letters: ")
-    solve_puzzle(must_letter, may_letters, args.dictionary_file)
+    if args.top is not None:
+        for word, score in top_words(must_letter, may_letters, args.top, args.dictionary_file, not args.no_cache):
+            print(f"{score:3} {word}")
+        return
+
+    for word in solve_puzzle(must_letter, may_letters, args.dictionary_file, not args.no_cache, args.engine):
+        print(word)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+import logging
+from functools import lru_cache
+from typing import Any, Sequence
+
+from pysandbox.common import get_numpy, require_numpy
+from pysandbox.spelling_bee import (
+    MIN_WORD_LENGTH,
+    OTHER_CHARACTER_BIT,
+    DictionaryIndex,
+    letter_mask,
+)
+
+"""Optional NumPy engine for spelling-bee: tests every word against a puzzle with vectorized boolean operations"""
+
+logger = logging.getLogger(__name__)
+
+np = get_numpy()
+HAS_NUMPY: bool = np is not None
+ALL_LETTERS_MASK: int = (OTHER_CHARACTER_BIT << 1) - 1
+
+# The 'auto' engine prefers the index's subset lookups while there are at least this many words per subset of the
+# optional letters; a lookup costs roughly as much as vectorized-testing this many words.
+WORDS_PER_LOOKUP: int = 1024
+
+
+def _as_array(values: Sequence[int], dtype: Any) -> Any:
+    """Wraps memory-mapped memoryviews without copying; copies anything else"""
+    if isinstance(values, memoryview):
+        return np.frombuffer(values, dtype=dtype)
+    return np.array(values, dtype=dtype)
+
+
+class NumpyMatcher:
+    """Holds a `DictionaryIndex`'s word masks and lengths as NumPy arrays"""
+
+    def __init__(self, index: DictionaryIndex) -> None:
+        require_numpy("The numpy engine")
+        self.words = index.words
+        self.masks = _as_array(index.masks, np.uint32)
+        self.lengths = _as_array(index.lengths, np.uint16)
+
+    def match_positions(self, must_mask: int, allowed_mask: int, min_length: int = MIN_WORD_LENGTH) -> Any:
+        """Returns an array of dictionary positions of words using `must_mask` and nothing outside `allowed_mask`"""
+        disallowed_mask = np.uint32(ALL_LETTERS_MASK & ~allowed_mask)
+        hits = (self.masks & np.uint32(must_mask)) != 0
+        hits &= (self.masks & disallowed_mask) == 0
+        hits &= self.lengths >= min_length
+        return np.flatnonzero(hits)
+
+    def solve(self, must_letter: str, may_letters: str) -> list[str]:
+        """Same answers as `DictionaryIndex.solve`: longest first, ties keep dictionary order"""
+        must_mask = letter_mask(must_letter)
+        positions = self.match_positions(must_mask, must_mask | letter_mask(may_letters))
+        order = np.lexsort((positions, -self.lengths[positions].astype(np.int32)))
+        return [self.words[position] for position in positions[order].tolist()]
+
+
+@lru_cache(maxsize=8)
+def numpy_matcher(index: DictionaryIndex) -> NumpyMatcher:
+    """Returns the (reused) `NumpyMatcher` for `index`"""
+    logger.debug(f"Building numpy arrays for {len(index.words)} words")
+    return NumpyMatcher(index)
+
+
+def solve_auto(index: DictionaryIndex, must_letter: str, may_letters: str) -> list[str]:
+    """Solves with the index's subset lookups for small puzzles and NumPy for large ones"""
+    must_mask = letter_mask(must_letter)
+    optional_letters = bin(letter_mask(may_letters) & ~must_mask).count("1")
+    if (1 << optional_letters) * WORDS_PER_LOOKUP <= len(index.words):
+        return index.solve(must_letter, may_letters)
+    return numpy_matcher(index).solve(must_letter, may_letters)
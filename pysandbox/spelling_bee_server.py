@@ -0,0 +1,120 @@
+import argparse
+import json
+import logging
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from pysandbox.spelling_bee import (
+    DEFAULT_DICTIONARY_PATH,
+    load_dictionary_index,
+    validate_letters,
+)
+
+"""Long-running spelling-bee solver: loads the dictionary once and answers puzzles over local HTTP.
+
+GET /solve?must_letter=a&may_letters=plebnt returns {"must_letter": ..., "may_letters": ..., "words": [...]}
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8765
+DEFAULT_CACHE_SIZE: int = 4096
+
+
+class SolverServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding one dictionary index and an LRU cache of answers"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        dictionary_file: Path = DEFAULT_DICTIONARY_PATH,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        use_cache: bool = True,
+    ) -> None:
+        self.dictionary_path = Path(dictionary_file).resolve()
+        self.index = load_dictionary_index(dictionary_file, use_cache)
+        self.solve_letters = lru_cache(maxsize=cache_size)(self._solve_letters)
+        super().__init__(server_address, SolverHandler)
+
+    def _solve_letters(self, dictionary_path: Path, must_letter: str, may_letters: str) -> tuple[str, ...]:
+        return tuple(self.index.solve(must_letter, may_letters))
+
+    def solve(self, must_letter: str, may_letters: str) -> tuple[str, ...]:
+        """Returns the answers for the puzzle, keyed in the cache by its dictionary and (normalized) letter set"""
+        validate_letters(must_letter, may_letters)
+        letter_set = "".join(sorted(set(may_letters.lower())))
+        return self.solve_letters(self.dictionary_path, must_letter.lower(), letter_set)
+
+
+class SolverHandler(BaseHTTPRequestHandler):
+    server: SolverServer
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/solve":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path: {url.path}"})
+            return
+
+        query = parse_qs(url.query)
+        must_letter = query.get("must_letter", [""])[0]
+        may_letters = query.get("may_letters", [""])[0]
+        try:
+            words = self.server.solve(must_letter, may_letters)
+        except RuntimeError as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+        self._send_json(HTTPStatus.OK, {"must_letter": must_letter, "may_letters": may_letters, "words": words})
+
+    def _send_json(self, status: HTTPStatus, body: Any) -> None:
+        encoded = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser("Spelling Bee Solver Server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"The address to listen on. Default: {DEFAULT_HOST}")
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help=f"The port to listen on. Default: {DEFAULT_PORT}"
+    )
+    parser.add_argument(
+        "--dictionary-file",
+        "-df",
+        type=Path,
+        default=DEFAULT_DICTIONARY_PATH,
+        help=f"The dictionary text file to use. One word per line. Default: {DEFAULT_DICTIONARY_PATH}",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"How many puzzle answers to keep (least recently used are evicted). Default: {DEFAULT_CACHE_SIZE}",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the compiled dictionary cache")
+
+    args = parser.parse_args()
+    with SolverServer((args.host, args.port), args.dictionary_file, args.cache_size, not args.no_cache) as server:
+        logger.info(f"Serving {len(server.index.words)} words on http://{args.host}:{server.server_address[1]}/solve")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Shutting down")
+
+
+if __name__ == "__main__":
+    main()
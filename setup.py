@@ -19,8 +19,11 @@ setup(
     classifiers=["Programming Language :: Python :: 3.9+", "Operating System :: OS Independent"],
     entry_points={
         "console_scripts": [
+            "nflpicker-confidence = pysandbox.nflpickem.confidence:main",
             "nflpicker-gen = pysandbox.nflpickem.picker:main",
+            "nflpicker-lines = pysandbox.nflpickem.odds_archive:main",
             "spelling-bee = pysandbox.spelling_bee:main",
+            "spelling-bee-server = pysandbox.spelling_bee_server:main",
         ]
     },
 )
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from pysandbox.benchmarks.codejam import (
+    SOLVERS,
+    Solver,
+    brute_force_moons,
+    brute_force_reversort,
+    fit_exponent,
+    main,
+    random_mural,
+    random_permutation,
+    scale,
+    stress,
+)
+from pysandbox.common_test import run_and_expect, run_with_argv
+
+
+def test_generators() -> None:
+    assert sorted(random_permutation(5, random.Random(0))) == [1, 2, 3, 4, 5]
+    cj_cost, jc_cost, mural = random_mural(20, random.Random(0))
+    assert -1000 <= cj_cost <= 1000 and -1000 <= jc_cost <= 1000
+    assert len(mural) == 20 and set(mural) <= set("CJ?")
+
+
+def test_brute_force() -> None:
+    assert brute_force_reversort([4, 2, 1, 3]) == 6
+    assert brute_force_reversort([7, 6, 5, 4, 3, 2, 1]) == 12
+    assert brute_force_moons((2, -5, "???CJ???")) == -14
+    with pytest.raises(RuntimeError, match="Too many"):
+        brute_force_moons((2, 3, "?" * 20))
+
+
+def test_stress() -> None:
+    assert stress(SOLVERS["calc_cost_treap"], trials=50) == []
+    assert stress(SOLVERS["minimize_dp"], trials=50) == []
+
+    off_by_one = Solver(
+        "off_by_one", lambda case: brute_force_reversort(case) + 1, random_permutation, brute_force_reversort, 5, (10,)
+    )
+    mismatches = stress(off_by_one, trials=3)
+    assert len(mismatches) == 3
+    assert mismatches[0].actual == mismatches[0].expected + 1
+
+
+def test_fit_exponent() -> None:
+    assert fit_exponent([10, 100, 1000], [5.0, 50.0, 500.0]) == pytest.approx(1.0)
+    assert fit_exponent([10, 100, 1000], [1.0, 100.0, 10000.0]) == pytest.approx(2.0)
+
+
+def test_scale() -> None:
+    result = scale(SOLVERS["minimize_dp"], [100, 1000], instances=2, repeat=1)
+    assert [size.size for size in result.sizes] == [100, 1000]
+    assert all(size.seconds > 0 and size.peak_bytes > 0 for size in result.sizes)
+    assert result.time_exponent > 0
+    assert str(result).startswith("minimize_dp: time ~ n^")
+
+
+def test_main() -> None:
+    argv = ["benchmarks/codejam.py", "--solvers", "minimize", "calc_cost_treap", "--sizes", "50", "100"]
+    run_and_expect(lambda: main(), argv + ["--trials=20", "--instances=1", "--repeat=1"])
+    with pytest.raises(RuntimeError, match="worse than n"):
+        run_with_argv(lambda: main(), argv + ["--trials=1", "--max-exponent=0"])
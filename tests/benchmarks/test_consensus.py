@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+
+from pysandbox.common_test import mock_response_from_file, run_and_expect
+
+pytest.importorskip("numpy")
+
+from pysandbox.benchmarks.consensus import (  # noqa: E402
+    benchmark,
+    main,
+    synthetic_snapshots,
+)
+
+
+def test_synthetic_snapshots() -> None:
+    games = mock_response_from_file("nflpickem/mock_odds.json")
+    snapshots = synthetic_snapshots(games, 3, seed=1)
+    assert len(snapshots) == 90
+    assert snapshots[0]["home_team"] == snapshots[30]["home_team"] == games[0]["home_team"]
+    assert synthetic_snapshots(games, 3, seed=1) == snapshots
+
+
+def test_benchmark() -> None:
+    games = synthetic_snapshots(mock_response_from_file("nflpickem/mock_odds.json"), 2)
+    results = benchmark(games, repeat=1)
+    assert list(results) == ["flatten", "python", "numpy"]
+    assert all(seconds > 0 for seconds in results.values())
+
+
+def test_main() -> None:
+    odds_file = Path(__file__).resolve().parents[1] / "nflpickem" / "mock_odds.json"
+    run_and_expect(
+        lambda: main(), ["benchmarks/consensus.py", f"--odds-file={odds_file}", "--snapshots=2", "--repeat=1"]
+    )
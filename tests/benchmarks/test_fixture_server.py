@@ -0,0 +1,56 @@
+import threading
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+import requests
+
+from pysandbox.benchmarks.fixture_server import FixtureServer
+from pysandbox.github.pull_commits import parse_links
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def server() -> Iterator[FixtureServer]:
+    with FixtureServer(FIXTURES_DIR, total_commits=25, rate_limit=3) as server:
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+
+
+def test_commit_pages(server: FixtureServer) -> None:
+    response = requests.get(f"{server.url}/repos/owner/repo/commits?per_page=10&page=3")
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert response.json()[0]["sha"] == server.commit(20)["sha"]
+    assert response.headers["X-RateLimit-Remaining"] == "2"
+    links = parse_links(response.headers["Link"])
+    assert links == {"last": f"{server.url}/repos/owner/repo/commits?per_page=10&page=3"}
+
+    first = requests.get(f"{server.url}/repos/owner/repo/commits?per_page=10")
+    assert parse_links(first.headers["Link"])["next"].endswith("page=2")
+    assert len({commit["sha"] for commit in first.json()}) == 10
+
+
+def test_not_modified_and_rate_limited(server: FixtureServer) -> None:
+    url = f"{server.url}/repos/owner/repo/commits?per_page=10"
+    etag = requests.get(url).headers["ETag"]
+    not_modified = requests.get(url, headers={"If-None-Match": etag})
+    assert (not_modified.status_code, not_modified.content) == (304, b"")
+
+    assert requests.get(url).status_code == 200
+    limited = requests.get(url)
+    assert limited.status_code == 403
+    assert limited.headers["X-RateLimit-Remaining"] == "0"
+
+
+def test_odds_and_unknown_paths(server: FixtureServer) -> None:
+    with requests.Session() as session:
+        odds = session.get(f"{server.url}/v4/sports/americanfootball_nfl/odds")
+        assert odds.status_code == 200
+        assert odds.headers["x-requests-remaining"] == "499"
+        assert len(odds.json()) == 30
+        assert session.get(f"{server.url}/nope").status_code == 404
+    assert (server.requests, server.connections) == (2, 1)
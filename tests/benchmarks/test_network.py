@@ -0,0 +1,34 @@
+import logging
+from pathlib import Path
+
+import pytest
+
+from pysandbox.benchmarks.network import main
+from pysandbox.common_test import run_and_expect
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_main(capsys: pytest.CaptureFixture[str]) -> None:
+    try:
+        run_and_expect(
+            main,
+            [
+                "network",
+                f"--fixtures-dir={FIXTURES_DIR}",
+                "--latency=0",
+                "--commits=20",
+                "--per-page=10",
+                "--concurrency=2",
+            ],
+        )
+    finally:
+        logging.disable(logging.NOTSET)
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["scenario", "requests", "connections", "seconds"]
+    rows = {line[:45].strip(): line[45:].split() for line in lines[1:]}
+    assert rows["pull_commits: new connection per request"][:2] == ["2", "2"]
+    assert rows["pull_commits: pooled session"][:2] == ["2", "1"]
+    assert rows["pull_commits: pooled, revalidated from cache"][:2] == ["2", "0"]
+    assert rows["generate_picks: pooled session"][:2] == ["1", "1"]
@@ -0,0 +1,38 @@
+import pytest
+
+from pysandbox.common_test import run_and_expect
+from pysandbox.spelling_bee import DictionaryIndex
+
+pytest.importorskip("numpy")
+
+from pysandbox.benchmarks.spelling_bee import (  # noqa: E402
+    benchmark,
+    main,
+    random_puzzles,
+    synthetic_words,
+)
+
+
+def test_synthetic_words() -> None:
+    words = synthetic_words(100, seed=1)
+    assert len(words) == 100
+    assert all(3 <= len(word) <= 12 and word.isalpha() for word in words)
+    assert synthetic_words(100, seed=1) == words
+
+
+def test_random_puzzles() -> None:
+    puzzles = random_puzzles(5, 7)
+    assert len(puzzles) == 5
+    assert all(len(set(must_letter + may_letters)) == 7 for must_letter, may_letters in puzzles)
+
+
+def test_benchmark() -> None:
+    index = DictionaryIndex.from_words(synthetic_words(1000))
+    results = benchmark(index, [7, 20], num_puzzles=3, repeat=1)
+    assert [num_letters for num_letters, _, _ in results] == [7, 20]
+    assert all(python_secs > 0 and numpy_secs > 0 for _, python_secs, numpy_secs in results)
+
+
+def test_main() -> None:
+    test_argv = ["benchmarks/spelling_bee.py", "--synthetic-words=500", "--puzzles=2", "--repeat=1", "--letters", "7"]
+    run_and_expect(lambda: main(), test_argv)
@@ -0,0 +1,81 @@
+import argparse
+import io
+import sys
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from pysandbox.codejam.runner import (
+    TokenStream,
+    add_processes_argument,
+    format_results,
+    read_tokens,
+    run,
+    solve_all,
+)
+
+
+def _square(value: int) -> int:
+    return value * value
+
+
+def _parse_ints(tokens: Iterator[str]) -> List[int]:
+    return [int(next(tokens)) for _ in range(int(next(tokens)))]
+
+
+@pytest.fixture
+def stdin(monkeypatch: pytest.MonkeyPatch) -> io.BytesIO:
+    data = io.BytesIO()
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(data))
+    return data
+
+
+def test_read_tokens(tmp_path: Path, stdin: io.BytesIO) -> None:
+    sample_path = tmp_path / "sample.txt"
+    sample_path.write_text("2\n3\n4 2 1\n\n1\n7\n")
+    assert list(read_tokens(sample_path)) == ["2", "3", "4", "2", "1", "1", "7"]
+
+    stdin.write(b"1\r\nCJ?\r\n")
+    stdin.seek(0)
+    assert list(read_tokens()) == ["1", "CJ?"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+def test_token_stream(chunk_size: int) -> None:
+    tokens = TokenStream(io.BytesIO(b"  2\n-5 100\r\n  CJ??CJ?J  \n\n7"), chunk_size)
+    assert [tokens.next_token() for _ in range(3)] == ["2", "-5", "100"]
+    chunks = list(tokens.token_chunks())
+    assert "".join(chunks) == "CJ??CJ?J"
+    assert all(0 < len(chunk) <= chunk_size for chunk in chunks)
+    assert tokens.next_token() == "7"
+    assert list(tokens.token_chunks()) == []
+    with pytest.raises(EOFError):
+        tokens.next_token()
+
+
+def test_add_processes_argument() -> None:
+    parser = argparse.ArgumentParser()
+    add_processes_argument(parser)
+    assert parser.parse_args([]).processes == 1
+    assert parser.parse_args(["--processes", "0"]).processes == 0
+
+
+@pytest.mark.parametrize("processes", [1, 2, None])
+def test_solve_all(processes: int) -> None:
+    assert solve_all(_square, list(range(50)), processes) == [value * value for value in range(50)]
+    assert solve_all(_square, [3], processes) == [9]
+    assert solve_all(_square, [], processes) == []
+
+
+def test_format_results() -> None:
+    assert format_results([6, -2]) == "Case #1: 6\nCase #2: -2\n"
+    assert format_results([]) == ""
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_run(processes: int, stdin: io.BytesIO, capsys: pytest.CaptureFixture[str]) -> None:
+    stdin.write(b"3\n1 2 3\n")
+    stdin.seek(0)
+    run(_parse_ints, _square, processes=processes)
+    assert capsys.readouterr().out == "Case #1: 1\nCase #2: 4\nCase #3: 9\n"
@@ -1,5 +1,10 @@
+import io
+import itertools
+import random
+import sys
+import tracemalloc
 from pathlib import Path
-from typing import List
+from typing import Callable, List
 
 import pytest
 
@@ -7,7 +12,10 @@ import pysandbox.codejam.y2021.qualification_moons_umbrellas as my_module
 from pysandbox.codejam.y2021.qualification_moons_umbrellas import (
     calc,
     main,
+    main_streaming,
     minimize,
+    minimize_dp,
+    minimize_dp_chunks,
     replace_letter,
 )
 
@@ -64,5 +72,115 @@ def test_minimize_negative() -> None:
     assert minimize(2, -5, _str_to_list("???CJ???")) == -11
 
 
-def test_main(sample_path: Path) -> None:
+def _brute_force(cj_cost: int, jc_cost: int, mural: str) -> int:
+    questions = [ndx for ndx, let in enumerate(mural) if let == "?"]
+    costs = []
+    for letters in itertools.product("CJ", repeat=len(questions)):
+        filled = _str_to_list(mural)
+        for ndx, let in zip(questions, letters):
+            filled[ndx] = let
+        costs.append(calc(cj_cost, jc_cost, filled))
+    return min(costs)
+
+
+def test_minimize_dp() -> None:
+    assert minimize_dp(2, 3, "CJ?CC?") == 5
+    assert minimize_dp(4, 2, _str_to_list("CJCJ")) == 10
+    assert minimize_dp(2, 5, "??????") == 0
+    assert minimize_dp(2, -5, "??JJ??") == -8
+    assert minimize_dp(100, -5, "??JJ??") == -5
+    assert minimize_dp(2, -5, "???CJ???") == -14  # JCJCJCJC, which `minimize` misses
+    assert minimize_dp(-1, -1, "?") == 0
+    assert minimize_dp(-2, 3, "J") == 0
+
+    for cj_cost, jc_cost in [(2, -3), (2, 3)]:
+        for mural in ["CJX", "XCJ", "C J", "C?j"]:
+            with pytest.raises(RuntimeError, match="must only have"):
+                minimize_dp(cj_cost, jc_cost, mural)
+
+
+def test_minimize_dp_brute_force() -> None:
+    rng = random.Random(0)
+    for _ in range(500):
+        mural = "".join(rng.choice("CJ?") for _ in range(rng.randint(1, 8)))
+        cj_cost, jc_cost = rng.randint(-5, 5), rng.randint(-5, 5)
+        assert minimize_dp(cj_cost, jc_cost, mural) == _brute_force(cj_cost, jc_cost, mural), (cj_cost, jc_cost, mural)
+
+
+def test_minimize_dp_large() -> None:
+    mural = "C" + "?" * 1_000_000 + "J"
+    assert minimize_dp(2, 3, mural) == 2
+    assert minimize_dp(-2, 3, mural) == -2
+    assert minimize_dp(-2, 1, mural) == -500_002
+
+
+def _random_chunks(mural: str, rng: random.Random) -> List[str]:
+    cuts = sorted(rng.randint(0, len(mural)) for _ in range(rng.randint(0, 4)))
+    return [mural[start:end] for start, end in zip([0] + cuts, cuts + [len(mural)])]
+
+
+def test_minimize_dp_chunks() -> None:
+    rng = random.Random(1)
+    for _ in range(500):
+        mural = "".join(rng.choice("CJ?") for _ in range(rng.randint(0, 30)))
+        cj_cost, jc_cost = rng.randint(-5, 5), rng.randint(-5, 5)
+        chunks = _random_chunks(mural, rng)
+        assert minimize_dp_chunks(cj_cost, jc_cost, chunks) == minimize_dp(cj_cost, jc_cost, mural), (cj_cost, chunks)
+
+    assert minimize_dp_chunks(2, 3, ["", "C?", "", "?J", "C"]) == 5
+    assert minimize_dp_chunks(2, -5, iter(["", "??J", "J??"])) == -8
+    with pytest.raises(RuntimeError):
+        minimize_dp_chunks(2, -3, ["", "X?"])
+
+
+def test_main_streaming(sample_path: Path, capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    main(sample_path)
+    expected = capsys.readouterr().out
+    for chunk_size in [1, 5, 1024]:
+        main_streaming(sample_path, chunk_size)
+        assert capsys.readouterr().out == expected
+
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b"1\n-3 2 C????????????J\n")))
+    main_streaming()
+    assert capsys.readouterr().out == "Case #1: -9\n"
+
+
+def _peak_bytes(solve: Callable[[], None]) -> int:
+    tracemalloc.start()
+    try:
+        solve()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_main_streaming_memory(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    sample_path = tmp_path / "long_mural.txt"
+    sample_path.write_text(f"2\n2 3 {'C?J' * 3_000}\n-2 1 C{'?' * 10_000}J\n")
+
+    streaming_peak = _peak_bytes(lambda: main_streaming(sample_path, chunk_size=1 << 10))
+    streaming_output = capsys.readouterr().out
+    assert streaming_output == "Case #1: 14997\nCase #2: -5002\n"
+    in_memory_peak = _peak_bytes(lambda: main(sample_path))
+    assert capsys.readouterr().out == streaming_output
+
+    # the in-memory path holds each whole mural (at least 10KB), the streaming one only a few chunks
+    assert streaming_peak < in_memory_peak // 4
+
+
+def test_main(sample_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
     main(sample_path)  # Will ensure to exceptions are thrown at least
+    dp_output = capsys.readouterr().out
+    assert dp_output.splitlines() == [
+        "Case #1: 5",
+        "Case #2: 10",
+        "Case #3: 1",
+        "Case #4: 0",
+        "Case #5: 0",
+        "Case #6: -8",
+        "Case #7: -14",
+        "Case #8: -5",
+    ]
+    main(sample_path, processes=2)
+    assert capsys.readouterr().out == dp_output
+    main(sample_path, minimize)
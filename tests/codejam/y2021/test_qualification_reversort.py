@@ -1,3 +1,4 @@
+import random
 from pathlib import Path
 
 import pytest
@@ -5,6 +6,7 @@ import pytest
 import pysandbox.codejam.y2021.qualification_reversort as qualification_reversort
 from pysandbox.codejam.y2021.qualification_reversort import (
     calc_cost,
+    calc_cost_treap,
     main,
     parse_sample,
 )
@@ -24,6 +26,27 @@ def test_calc_cost() -> None:
     assert calc_cost([7, 6, 5, 4, 3, 2, 1]) == 12
 
 
+def test_calc_cost_treap() -> None:
+    assert calc_cost_treap([4, 2, 1, 3]) == 6
+    assert calc_cost_treap([1, 2]) == 1
+    assert calc_cost_treap([7]) == 0
+    assert calc_cost_treap([]) == 0
+
+    rng = random.Random(0)
+    for list_len in list(range(2, 9)) * 20 + [100, 500]:
+        int_list = rng.sample(range(1, list_len + 1), list_len)
+        assert calc_cost_treap(int_list) == calc_cost(int_list), int_list
+    for _ in range(100):
+        int_list = [rng.randint(1, 3) for _ in range(rng.randint(1, 8))]
+        assert calc_cost_treap(int_list) == calc_cost(int_list), int_list
+
+
+def test_calc_cost_treap_large() -> None:
+    # the first reversal sorts a descending list, then every step costs 1
+    list_len = 100_000
+    assert calc_cost_treap(list(range(list_len, 0, -1))) == 2 * list_len - 2
+
+
 def test_parse_sample(sample_path: Path) -> None:
     tests = parse_sample(sample_path)
     assert len(tests) == 3
@@ -32,5 +55,11 @@ def test_parse_sample(sample_path: Path) -> None:
     assert tests[2].int_list == [7, 6, 5, 4, 3, 2, 1]
 
 
-def test_main(sample_path: Path) -> None:
+def test_main(sample_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
     main(sample_path)  # Will ensure to exceptions are thrown at least
+    treap_output = capsys.readouterr().out
+    assert treap_output == "Case #1: 6\nCase #2: 1\nCase #3: 12\n"
+    main(sample_path, calc_cost)
+    assert capsys.readouterr().out == treap_output
+    main(sample_path, processes=2)
+    assert capsys.readouterr().out == treap_output
@@ -0,0 +1,95 @@
+from pathlib import Path
+from typing import Any, Generator
+
+import pytest
+import responses
+
+import pysandbox.github.commit_store as commit_store
+from pysandbox.common_test import mock_response_from_file, run_and_expect
+from pysandbox.github.commit_store import CommitStore, sync_commits
+from pysandbox.github.pull_commits import GIT_BASE_URL, MAX_PER_PAGE, parse_commit
+
+OWNER = "test_owner"
+REPO = "test_repo"
+FIRST_LINK = f"{GIT_BASE_URL}/repos/{OWNER}/{REPO}/commits?per_page=4"
+PAGE_2_LINK = f"{FIRST_LINK}&page=2"
+PAGE_3_LINK = f"{FIRST_LINK}&page=3"
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Generator[CommitStore, None, None]:
+    with CommitStore(tmp_path / "store" / "commits.sqlite3") as commit_store:
+        yield commit_store
+
+
+@pytest.fixture
+def mock_pages() -> Any:
+    pages = [mock_response_from_file(f"github/mock_page_{num}.json") for num in [1, 2, 3]]
+    responses.add(responses.GET, FIRST_LINK, json=pages[0], headers={"Link": f'<{PAGE_2_LINK}>; rel="next"'})
+    responses.add(responses.GET, PAGE_2_LINK, json=pages[1], headers={"Link": f'<{PAGE_3_LINK}>; rel="next"'})
+    responses.add(responses.GET, PAGE_3_LINK, json=pages[2])
+    return pages
+
+
+def test_store(store: CommitStore) -> None:
+    commits = [parse_commit(body) for body in mock_response_from_file("github/mock_page_1.json")]
+    assert store.add(OWNER, REPO, commits) == 4
+    assert store.add(OWNER, REPO, commits) == 0
+    assert store.known_shas(OWNER, REPO, [commits[0].full_sha, "unknown"]) == {commits[0].full_sha}
+    assert store.known_shas("other", REPO, [commits[0].full_sha]) == set()
+    assert store.known_shas(OWNER, REPO, []) == set()
+    assert store.latest_commit_date(OWNER, REPO) == max(commit.commit_date for commit in commits)
+    assert store.latest_commit_date("other", REPO) is None
+    assert store.commits(OWNER, REPO) == sorted(commits, key=lambda commit: commit.commit_date, reverse=True)
+    assert len(store.commits(OWNER, REPO, limit=2)) == 2
+
+
+@responses.activate
+def test_initial_sync(store: CommitStore, mock_pages: Any) -> None:
+    new_commits = sync_commits(OWNER, REPO, store, initial_commits=6, per_page=4)
+    assert [commit.full_sha for commit in new_commits] == [body["sha"] for body in mock_pages[0] + mock_pages[1][:2]]
+    assert len(store.commits(OWNER, REPO)) == 6
+    assert len(responses.calls) == 2
+
+    # Nothing new: the first page holds known SHAs, so one request is enough
+    assert sync_commits(OWNER, REPO, store, per_page=4) == []
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_incremental_sync(store: CommitStore, mock_pages: Any) -> None:
+    store.add(OWNER, REPO, [parse_commit(body) for body in mock_pages[1][1:]])
+    new_commits = sync_commits(OWNER, REPO, store, per_page=4)
+
+    # page 1 is all new; page 2 holds known SHAs (plus one more new commit), so page 3 is never requested
+    assert [commit.full_sha for commit in new_commits] == [body["sha"] for body in mock_pages[0] + mock_pages[1][:1]]
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_sync_page_size(store: CommitStore, mock_pages: Any) -> None:
+    # a first sync of 4 commits fits in one page of 4
+    assert len(sync_commits(OWNER, REPO, store, initial_commits=4)) == 4
+    assert [call.request.url for call in responses.calls] == [FIRST_LINK]
+
+    # after that, how many are new isn't known, so pages are as big as GitHub allows
+    full_link = f"{GIT_BASE_URL}/repos/{OWNER}/{REPO}/commits?per_page={MAX_PER_PAGE}"
+    responses.add(responses.GET, full_link, json=mock_pages[0])
+    assert sync_commits(OWNER, REPO, store) == []
+    assert responses.calls[1].request.url == full_link
+
+
+@responses.activate
+def test_sync_since(store: CommitStore, mock_pages: Any) -> None:
+    store.add(OWNER, REPO, [parse_commit(body) for body in mock_pages[0]])
+    latest = store.latest_commit_date(OWNER, REPO)
+    since_link = f"{FIRST_LINK}&since={latest}"
+    responses.add(responses.GET, since_link, json=mock_pages[0][:1])
+
+    assert sync_commits(OWNER, REPO, store, per_page=4, use_since=True) == []
+    assert responses.calls[0].request.url == since_link
+
+
+def test_parse_help() -> None:
+    test_argv = ["pysandbox/github/commit_store.py", "--help"]
+    run_and_expect(lambda: commit_store.main(), test_argv, raises=SystemExit, check_code=True)
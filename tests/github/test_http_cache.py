@@ -0,0 +1,102 @@
+import os
+from pathlib import Path
+
+import pytest
+import responses
+from responses import matchers
+
+from pysandbox.common import create_session
+from pysandbox.github.http_cache import HttpCache
+
+URL = "https://api.github.com/repos/test_owner/test_repo/commits?per_page=4"
+ETAG = 'W/"abc123"'
+LAST_MODIFIED = "Thu, 06 Jan 2022 17:57:59 GMT"
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> HttpCache:
+    return HttpCache(tmp_path / "http-cache")
+
+
+@responses.activate
+def test_etag_revalidation(cache: HttpCache) -> None:
+    session = create_session()
+    responses.add(responses.GET, URL, body=b"[1, 2]", headers={"ETag": ETAG, "Link": '<next>; rel="next"'})
+    first = cache.get(session, URL)
+    assert (first.body, first.from_cache) == (b"[1, 2]", False)
+
+    responses.replace(
+        responses.GET, URL, status=304, match=[matchers.header_matcher({"If-None-Match": ETAG})], body=b""
+    )
+    second = cache.get(session, URL)
+    assert (second.body, second.from_cache) == (b"[1, 2]", True)
+    assert second.headers["Link"] == '<next>; rel="next"'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@responses.activate
+def test_last_modified_revalidation(cache: HttpCache) -> None:
+    session = create_session()
+    responses.add(responses.GET, URL, body=b"[1]", headers={"Last-Modified": LAST_MODIFIED})
+    cache.get(session, URL)
+
+    responses.replace(
+        responses.GET, URL, status=304, match=[matchers.header_matcher({"If-Modified-Since": LAST_MODIFIED})]
+    )
+    assert cache.get(session, URL).from_cache
+
+
+@responses.activate
+def test_changed_and_uncacheable(cache: HttpCache) -> None:
+    session = create_session()
+    responses.add(responses.GET, URL, body=b"[1]", headers={"ETag": ETAG})
+    cache.get(session, URL)
+
+    responses.replace(responses.GET, URL, body=b"[2]", headers={"ETag": 'W/"new"'})
+    assert cache.get(session, URL).body == b"[2]"
+
+    # no validators: nothing worth caching
+    other_url = f"{URL}&page=2"
+    responses.add(responses.GET, other_url, body=b"[3]")
+    assert cache.get(session, other_url).body == b"[3]"
+    assert len(list(cache.directory.iterdir())) == 1
+
+
+def test_eviction(tmp_path: Path) -> None:
+    cache = HttpCache(tmp_path / "small-cache")
+    cache._store(f"{URL}&page=9", {"ETag": ETAG}, b"x" * 200)
+    cache.max_bytes = 4 * cache._path(f"{URL}&page=9").stat().st_size - 1  # evicts down to 3 files
+    os.utime(cache._path(f"{URL}&page=9"), ns=(0, 0))
+
+    for page in range(5):
+        cache._store(f"{URL}&page={page}", {"ETag": ETAG}, b"x" * 200)
+        os.utime(cache._path(f"{URL}&page={page}"), ns=(page * 10**9, page * 10**9))
+    assert sorted(cache.directory.iterdir()) == sorted([cache._path(f"{URL}&page={page}") for page in [2, 3, 4]])
+    assert cache._load(f"{URL}&page=0") is None
+
+
+def test_eviction_keeps_running_total(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    HttpCache(tmp_path / "small-cache")._store(f"{URL}&page=9", {"ETag": ETAG}, b"x" * 200)
+    cache = HttpCache(tmp_path / "small-cache")  # picks up the existing file's size
+    size = cache._path(f"{URL}&page=9").stat().st_size
+    cache.max_bytes = 3 * size
+    original_entries = cache._entries
+    scans = []
+
+    def counting_entries() -> list[tuple[int, int, Path]]:
+        scans.append(1)
+        return original_entries()
+
+    monkeypatch.setattr(cache, "_entries", counting_entries)
+    for page in range(2):
+        cache._store(f"{URL}&page={page}", {"ETag": ETAG}, b"x" * 200)
+    assert (len(scans), cache._total_bytes) == (0, 3 * size)
+
+    cache._store(f"{URL}&page=2", {"ETag": ETAG}, b"x" * 200)
+    assert (len(scans), cache._total_bytes) == (1, 2 * size)
+    assert len(list(cache.directory.iterdir())) == 2
+
+
+def test_corrupt_entry(cache: HttpCache) -> None:
+    cache._path(URL).write_bytes(b"not json\n[]")
+    assert cache._load(URL) is None
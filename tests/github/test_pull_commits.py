@@ -1,10 +1,14 @@
+import json
+from pathlib import Path
 from typing import Any
 
 import pytest
 import responses
+from responses import matchers
 
 import pysandbox.github.pull_commits as pull_commits
-from pysandbox.common_test import mock_response_from_file, run_and_expect
+from pysandbox.common_test import mock_response_from_file, run_and_expect, run_with_argv
+from pysandbox.github.http_cache import HttpCache
 
 EXPECTED_PAGE_2_LINK = "https://api.github.com/repositories/1362490/commits?per_page=4&page=2"
 EXPECTED_PAGE_3_LINK = "https://api.github.com/repositories/1362490/commits?per_page=4&page=3"
@@ -19,13 +23,11 @@ PAGE_3_HEADER = (
     '<ignore/commits?per_page=4&page=1>; rel="first", <ignore/commits?per_page=4&page=2>; rel="prev"'
 )
 
+ETAG = 'W/"test-etag"'
 OWNER = "test_owner"
 REPO = "test_repo"
 TEST_PER_PAGE = 4
 
-# Hack to modify per_page constant for easier testing...
-pull_commits.DEFAULT_PER_PAGE = TEST_PER_PAGE
-
 
 @pytest.fixture
 def single_call_first_link() -> str:
@@ -84,6 +86,131 @@ def test_multi_call(multi_call_first_link: str, mock_responses: Any) -> None:
     assert mock_responses.calls[2].request.url == EXPECTED_PAGE_3_LINK
 
 
+@responses.activate
+def test_multi_call_concurrent(multi_call_first_link: str, mock_responses: Any) -> None:
+    actual = pull_commits.pull_commits(OWNER, REPO, 10, concurrency=4)
+
+    # first page, then pages 2 and 3 (computed from the Link header) concurrently
+    assert len(mock_responses.calls) == 3
+    assert mock_responses.calls[0].request.url == multi_call_first_link
+    assert {call.request.url for call in mock_responses.calls[1:]} == {EXPECTED_PAGE_2_LINK, EXPECTED_PAGE_3_LINK}
+
+    assert actual == pull_commits.pull_commits(OWNER, REPO, 10)
+    assert actual[9].message == "General cleanup for 2.27.0"
+
+
+@responses.activate
+def test_concurrent_stops_at_last_page(multi_call_first_link: str) -> None:
+    page_1 = mock_response_from_file("github/mock_page_1.json")
+    page_2 = mock_response_from_file("github/mock_page_2.json")
+    last_header = f'<{EXPECTED_PAGE_2_LINK}>; rel="next", <{EXPECTED_PAGE_2_LINK}>; rel="last"'
+    responses.add(responses.GET, multi_call_first_link, json=page_1, status=200, headers={"Link": last_header})
+    responses.add(responses.GET, EXPECTED_PAGE_2_LINK, json=page_2, status=200)
+
+    actual = pull_commits.pull_commits(OWNER, REPO, 10, concurrency=4)
+    assert len(actual) == 8
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_multi_call_cached(multi_call_first_link: str, mock_responses: Any, tmp_path: Path) -> None:
+    cache = HttpCache(tmp_path / "commits-cache")
+    for mock in mock_responses.registered():
+        mock.headers["ETag"] = ETAG
+    first = pull_commits.pull_commits(OWNER, REPO, 10, cache=cache)
+
+    for url in [multi_call_first_link, EXPECTED_PAGE_2_LINK, EXPECTED_PAGE_3_LINK]:
+        responses.replace(responses.GET, url, status=304, match=[matchers.header_matcher({"If-None-Match": ETAG})])
+    second = pull_commits.pull_commits(OWNER, REPO, 10, cache=cache)
+    assert first == second
+    assert (cache.hits, cache.misses) == (3, 3)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 100_000])
+def test_iter_json_array(chunk_size: int) -> None:
+    data = json.dumps(mock_response_from_file("github/mock_page_1.json") + [12345, "ünïcödé", None, [1, [2]]]).encode()
+    chunks = []
+    for start in range(0, len(data), chunk_size):
+        end = start + chunk_size
+        chunks.append(data[start:end])
+    assert list(pull_commits.iter_json_array(chunks)) == json.loads(data)
+
+
+def test_iter_json_array_edge_cases() -> None:
+    assert list(pull_commits.iter_json_array([b" [ ", b"] "])) == []
+    assert list(pull_commits.iter_json_array([b"[1,", b"2", b"3]"])) == [1, 23]
+    with pytest.raises(ValueError):
+        list(pull_commits.iter_json_array([b'{"not": "an array"}']))
+    with pytest.raises(ValueError):
+        list(pull_commits.iter_json_array([b"[1, 2"]))
+    with pytest.raises(ValueError):
+        list(pull_commits.iter_json_array([b'[{"truncated": ']))
+
+
+def test_commit_is_compact() -> None:
+    commit = pull_commits.parse_commit(mock_response_from_file("github/mock_page_1.json")[0])
+    assert not hasattr(commit, "__dict__")
+    assert commit.full_sha.startswith(commit.sha)
+
+
+def test_choose_per_page() -> None:
+    assert pull_commits.choose_per_page(4) == 4
+    assert pull_commits.choose_per_page(100) == 100
+    assert pull_commits.choose_per_page(101) == 51
+    assert pull_commits.choose_per_page(250) == 84
+    assert pull_commits.choose_per_page(1000) == 100
+    assert pull_commits.choose_per_page(250, per_page=30) == 30
+    assert pull_commits.choose_per_page(250, per_page=500) == 100
+
+
+@responses.activate
+def test_per_page_and_stats(mock_responses: Any) -> None:
+    per_page_link = f"{pull_commits.GIT_BASE_URL}/repos/{OWNER}/{REPO}/commits?per_page=4"
+    page_1 = mock_response_from_file("github/mock_page_1.json")
+    responses.add(responses.GET, per_page_link, json=page_1, status=200, headers={"Link": PAGE_1_HEADER})
+
+    stats = pull_commits.PullStats()
+    actual = pull_commits.pull_commits(OWNER, REPO, 10, per_page=4, stats=stats)
+    assert len(actual) == 10
+    assert mock_responses.calls[0].request.url == per_page_link
+    assert (stats.per_page, stats.commits, len(stats.latencies)) == (4, 10, 3)
+    assert stats.elapsed >= max(stats.latencies)
+    assert "requests=3 per_page=4" in str(stats)
+    assert "requests=0" in str(pull_commits.PullStats())
+
+
+def test_parse_links() -> None:
+    links = pull_commits.parse_links(PAGE_2_HEADER)
+    assert links["next"] == EXPECTED_PAGE_3_LINK
+    assert links["last"] == "ignore/commits?per_page=4&page=1524"
+    assert links["prev"] == "ignore/commits?per_page=4&page=1"
+    assert pull_commits.parse_links("") == {}
+
+
+def test_page_urls() -> None:
+    assert pull_commits.page_number(EXPECTED_PAGE_2_LINK) == 2
+    assert pull_commits.page_number(f"{pull_commits.GIT_BASE_URL}/repos/{OWNER}/{REPO}/commits?per_page=4") == 1
+    assert pull_commits.with_page(EXPECTED_PAGE_2_LINK, 3) == EXPECTED_PAGE_3_LINK
+
+
+@responses.activate
+def test_main_store(single_call_first_link: str, mock_response: Any, tmp_path: Path, capsys: Any) -> None:
+    test_argv = ["pull_commits.py", f"--owner={OWNER}", f"--repo={REPO}", "--commits=4", "--per-page=4"]
+    test_argv.append(f"--store={tmp_path / 'commits.sqlite3'}")
+    run_and_expect(lambda: pull_commits.main(), test_argv)
+    first_output = capsys.readouterr().out.splitlines()
+    page_1 = [pull_commits.parse_commit(body) for body in mock_response_from_file("github/mock_page_1.json")]
+    assert sorted(first_output) == sorted(f"{commit}" for commit in page_1)
+
+    # the second run finds the newest commit already stored, so it needs no more than the first page
+    run_and_expect(lambda: pull_commits.main(), test_argv)
+    assert capsys.readouterr().out.splitlines() == first_output
+    assert len(mock_response.calls) == 2
+
+    with pytest.raises(RuntimeError, match="can't be combined"):
+        run_with_argv(lambda: pull_commits.main(), test_argv + ["--concurrency=2"])
+
+
 def test_parse_help() -> None:
     test_argv = ["pysandbox/github/pull_commits.py", "--help"]
     run_and_expect(lambda: pull_commits.main(), test_argv, raises=SystemExit, check_code=True)
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+import responses
+
+from pysandbox.common_test import mock_response_from_file, run_and_expect
+from pysandbox.github.pull_commits import GIT_BASE_URL, Commit, Page
+from pysandbox.github.pull_many import (
+    RateLimitBudget,
+    main,
+    normalize_repos,
+    parse_repo,
+    pull_many,
+    stream_commits,
+)
+
+REPO_1 = "owner_1/repo_1"
+REPO_2 = "owner_2/repo_2"
+MISSING_REPO = "owner_3/missing"
+
+
+def _first_link(name: str, per_page: int) -> str:
+    return f"{GIT_BASE_URL}/repos/{name}/commits?per_page={per_page}"
+
+
+@pytest.fixture
+def mock_repos() -> Any:
+    pages = [mock_response_from_file(f"github/mock_page_{num}.json") for num in [1, 2]]
+    page_2_link = f"{_first_link(REPO_1, 6)}&page=2"
+    rate_limit = {"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": str(int(time.time()) + 600)}
+    responses.add(
+        responses.GET,
+        _first_link(REPO_1, 6),
+        json=pages[0],
+        headers={"Link": f'<{page_2_link}>; rel="next"', **rate_limit},
+    )
+    responses.add(responses.GET, page_2_link, json=pages[1], headers=rate_limit)
+    responses.add(responses.GET, _first_link(REPO_2, 6), json=pages[1], headers=rate_limit)
+    responses.add(responses.GET, _first_link(MISSING_REPO, 6), status=404)
+    return pages
+
+
+@responses.activate
+def test_pull_many(mock_repos: Any) -> None:
+    results = asyncio.run(pull_many([REPO_1, REPO_2, MISSING_REPO], num_commits=6, concurrency=2))
+    assert [commit.full_sha for commit in results[REPO_1]] == [body["sha"] for body in mock_repos[0] + mock_repos[1]][
+        :6
+    ]
+    assert [commit.full_sha for commit in results[REPO_2]] == [body["sha"] for body in mock_repos[1]]
+    assert results[MISSING_REPO] == []
+    assert len(responses.calls) == 4
+
+
+@responses.activate
+def test_pull_many_normalizes_repos(mock_repos: Any) -> None:
+    results = asyncio.run(pull_many([f" {REPO_2}\t", REPO_2, f"{REPO_2} "], num_commits=6))
+    assert list(results) == [REPO_2]
+    assert [commit.full_sha for commit in results[REPO_2]] == [body["sha"] for body in mock_repos[1]]
+    assert len(responses.calls) == 1
+
+
+def test_normalize_repos() -> None:
+    assert normalize_repos([REPO_2, f" {REPO_1} ", REPO_2, REPO_1]) == [REPO_2, REPO_1]
+    with pytest.raises(RuntimeError):
+        normalize_repos([REPO_1, "no-slash"])
+
+
+@responses.activate
+def test_stream_commits_shares_budget(mock_repos: Any) -> None:
+    budget = RateLimitBudget(reserve=0)
+
+    async def collect() -> list[tuple[str, Commit]]:
+        return [item async for item in stream_commits([REPO_1, REPO_2], 6, concurrency=1, budget=budget)]
+
+    assert len(asyncio.run(collect())) == 10
+    assert budget.remaining is not None and budget.remaining <= 4000
+
+
+def test_budget_update() -> None:
+    budget = RateLimitBudget()
+    budget.update(Page([], {}))
+    assert (budget.remaining, budget.reset) == (None, None)
+
+    budget.update(Page([], {}, rate_limit_remaining=50, rate_limit_reset=100))
+    budget.update(Page([], {}, rate_limit_remaining=60, rate_limit_reset=100))  # arrived out of order
+    assert budget.remaining == 50
+    budget.update(Page([], {}, rate_limit_remaining=5000, rate_limit_reset=200))  # new window
+    assert (budget.remaining, budget.reset) == (5000, 200)
+
+
+def test_budget_acquire() -> None:
+    budget = RateLimitBudget(reserve=1)
+    budget.update(Page([], {}, rate_limit_remaining=2, rate_limit_reset=int(time.time()) - 1))
+    asyncio.run(budget.acquire())
+    assert budget.remaining == 1
+    asyncio.run(budget.acquire())  # reset already passed: no wait
+    assert budget.remaining is None
+
+    budget.update(Page([], {}, rate_limit_remaining=0, rate_limit_reset=int(time.time()) + 3600))
+    with pytest.raises(RuntimeError) as excinfo:
+        asyncio.run(budget.acquire())
+    assert "rate limit exhausted" in str(excinfo.value)
+
+
+def test_parse_repo() -> None:
+    assert parse_repo(" psf/requests ") == ("psf", "requests")
+    for bad in ["psf", "/requests", "psf/", "a/b/c"]:
+        with pytest.raises(RuntimeError):
+            parse_repo(bad)
+
+
+@responses.activate
+def test_main(mock_repos: Any, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    repos_file = tmp_path / "repos.txt"
+    repos_file.write_text(f"# our repos\n{REPO_2}\n\n")
+    test_argv = ["pysandbox/github/pull_many.py", REPO_1, f"--repos-file={repos_file}", "--commits=6"]
+    run_and_expect(lambda: main(), test_argv)
+    lines = capsys.readouterr().out.splitlines()
+    assert len([line for line in lines if line.startswith(REPO_1)]) == 6
+    assert len([line for line in lines if line.startswith(REPO_2)]) == 4
+
+
+def test_main_no_repos() -> None:
+    run_and_expect(lambda: main(), ["pysandbox/github/pull_many.py"], raises=SystemExit)
@@ -0,0 +1,90 @@
+import itertools
+import os
+from datetime import datetime, timezone
+from typing import Any
+
+import pytest
+import responses
+
+import pysandbox.nflpickem.confidence as confidence
+from pysandbox.common_test import mock_response_from_file, run_and_expect
+from pysandbox.nflpickem.confidence import (
+    Pick,
+    assign_confidence,
+    expected_points,
+    main,
+    simulate,
+    win_probability,
+)
+from pysandbox.nflpickem.picker import ENV_API_TOKEN, GET_ODDS_URL, Game
+
+KICKOFF = datetime(2022, 9, 18, 17, tzinfo=timezone.utc)
+
+
+def make_games(home_spreads: list[float]) -> list[Game]:
+    return [Game(f"Home {ndx}", spread, f"Away {ndx}", -spread, KICKOFF) for ndx, spread in enumerate(home_spreads)]
+
+
+def test_win_probability() -> None:
+    assert win_probability(0) == 0.5
+    assert win_probability(-3) == pytest.approx(0.588, abs=1e-3)
+    assert win_probability(-7) + win_probability(7) == pytest.approx(1)
+    assert win_probability(-7, sigma=7) == pytest.approx(0.8413, abs=1e-4)
+
+
+def test_assign_confidence() -> None:
+    picks = assign_confidence(make_games([-3, 10, -14, 0.5]))
+    assert [(pick.winner, pick.confidence) for pick in picks] == [
+        ("Home 2", 4),
+        ("Away 1", 3),
+        ("Home 0", 2),
+        ("Away 3", 1),
+    ]
+    assert all(pick.probability >= 0.5 for pick in picks)
+    assert str(picks[0]).startswith(" 4 pts: Home 2")
+
+
+def test_assignment_maximizes_expected_points() -> None:
+    picks = assign_confidence(make_games([-1, 6.5, -3, 2.5, -10]))
+    best = max(
+        sum(pick.probability * points for pick, points in zip(picks, order))
+        for order in itertools.permutations(range(1, len(picks) + 1))
+    )
+    assert expected_points(picks) == pytest.approx(best)
+
+
+@pytest.mark.parametrize("has_numpy", [True, False])
+def test_simulate(has_numpy: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    if has_numpy:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(confidence, "HAS_NUMPY", has_numpy)
+    monkeypatch.setattr(confidence, "WEEKS_PER_CHUNK", 1000)
+    picks = assign_confidence(make_games([-3, 10, -14, 0.5, -6]))
+
+    distribution = simulate(picks, 2500, seed=7)
+    assert len(distribution.scores) == 2500
+    assert all(0 <= score <= 15 for score in distribution.scores)
+    assert distribution.max_points == 15
+    assert distribution.mean == pytest.approx(expected_points(picks), abs=0.3)
+    assert distribution.percentile(0) <= distribution.percentile(50) <= distribution.percentile(100)
+    assert str(distribution).startswith("ScoreDistribution: weeks=2500 mean=")
+    assert simulate(picks, 2500, seed=7) == distribution
+    assert simulate(picks, 2500, seed=8) != distribution
+
+
+def test_simulate_across_processes() -> None:
+    pytest.importorskip("numpy")
+    picks = [Pick(game, game.home_team, 0.75, ndx + 1) for ndx, game in enumerate(make_games([-7, -7, -7]))]
+    weeks = confidence.WEEKS_PER_CHUNK + 10
+    assert simulate(picks, weeks, seed=3, processes=2) == simulate(picks, weeks, seed=3)
+
+
+@responses.activate
+def test_main(monkeypatch: pytest.MonkeyPatch, tmp_path: Any) -> None:
+    os.environ[ENV_API_TOKEN] = "mock-api-token"
+    responses.add(responses.GET, GET_ODDS_URL, json=mock_response_from_file("nflpickem/mock_odds.json"))
+    argv = ["nflpicker-confidence", f"--cache-dir={tmp_path}", "--weeks=100", "--processes=1"]
+    distributions = []
+    monkeypatch.setattr(confidence, "simulate", lambda *args: distributions.append(simulate(*args)))
+    run_and_expect(lambda: main(), argv)
+    assert [len(distribution.scores) for distribution in distributions] == [100]
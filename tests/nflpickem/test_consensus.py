@@ -0,0 +1,113 @@
+import math
+import statistics
+from typing import Any
+
+import pytest
+
+import pysandbox.common as common
+import pysandbox.nflpickem.consensus as consensus
+from pysandbox.common_test import mock_response_from_file
+from pysandbox.nflpickem.consensus import (
+    AGGREGATORS,
+    SPREADS,
+    MarketConsensus,
+    flatten_spreads,
+    implied_probability,
+    market_consensus,
+    spread_consensus,
+)
+
+
+def make_game(home_points: list[float], away_points: list[float], markets: str = "spreads") -> dict[str, Any]:
+    bookmakers = []
+    for home_point, away_point in zip(home_points, away_points):
+        outcomes = [{"name": "Home", "point": home_point}, {"name": "Away", "point": away_point}]
+        bookmakers.append({"markets": [{"key": "h2h", "outcomes": []}, {"key": markets, "outcomes": outcomes}]})
+    return {"home_team": "Home", "away_team": "Away", "bookmakers": bookmakers}
+
+
+def reference_averages(game: dict[str, Any]) -> tuple[float, float]:
+    """The original nested-loop averages"""
+    home_points = away_points = 0.0
+    for bm in game["bookmakers"]:
+        spread_market = [market for market in bm["markets"] if market["key"] == "spreads"][0]
+        for outcome in spread_market["outcomes"]:
+            if outcome["name"] == game["home_team"]:
+                home_points += outcome["point"]
+            if outcome["name"] == game["away_team"]:
+                away_points += outcome["point"]
+    return home_points / len(game["bookmakers"]), away_points / len(game["bookmakers"])
+
+
+def test_flatten_spreads() -> None:
+    columns = flatten_spreads([make_game([-3.5, -3], [3.5, 3]), make_game([1], [-1], markets="totals")])
+    assert columns.num_games == 2
+    assert list(columns.bookmakers) == [2, 0]
+    assert list(columns.groups) == [0, 1, 0, 1]
+    assert list(columns.points) == [-3.5, 3.5, -3.0, 3.0]
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_spread_consensus(engine: str) -> None:
+    pytest.importorskip("numpy")
+    games = [make_game([-3, -4, -3.5, -7], [3, 4, 3.5, 6]), make_game([2], [-2])]
+    lopsided, single = spread_consensus(games, engine)
+    assert (lopsided.home_avg, lopsided.away_avg, lopsided.bookmakers) == (-4.375, 4.125, 4)
+    assert (lopsided.home_median, lopsided.away_median) == (-3.75, 3.75)
+    assert lopsided.home_stdev == pytest.approx(statistics.pstdev([-3, -4, -3.5, -7]))
+    assert lopsided.away_stdev == pytest.approx(statistics.pstdev([3, 4, 3.5, 6]))
+    assert single == MarketConsensus(2.0, -2.0, 2.0, -2.0, 0.0, 0.0, 1)
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_spread_consensus_without_spreads(engine: str) -> None:
+    pytest.importorskip("numpy")
+    (missing,) = spread_consensus([make_game([1], [-1], markets="totals")], engine)
+    assert missing.bookmakers == 0
+    assert all(math.isnan(value) for value in [missing.home_avg, missing.home_median, missing.away_stdev])
+    assert spread_consensus([], engine) == []
+
+
+def test_engines_identical_on_fixture() -> None:
+    pytest.importorskip("numpy")
+    games = mock_response_from_file("nflpickem/mock_odds.json")
+    python_results = spread_consensus(games, "python")
+    assert spread_consensus(games, "numpy") == python_results
+    assert [(result.home_avg, result.away_avg) for result in python_results] == [
+        reference_averages(game) for game in games
+    ]
+
+
+def test_engine_validation(monkeypatch: pytest.MonkeyPatch) -> None:
+    with pytest.raises(RuntimeError, match="must be one of"):
+        spread_consensus([], "fortran")
+
+    monkeypatch.setattr(common, "get_numpy", lambda: None)
+    monkeypatch.setattr(consensus, "HAS_NUMPY", False)
+    with pytest.raises(RuntimeError, match="requires NumPy"):
+        spread_consensus([], "numpy")
+    assert spread_consensus([make_game([2], [-2])], "auto")[0].home_avg == 2.0
+
+
+def test_implied_probability() -> None:
+    assert implied_probability(-110) == pytest.approx(0.5238, abs=1e-4)
+    assert implied_probability(100) == 0.5
+    assert implied_probability(300) == 0.25
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_other_markets(engine: str) -> None:
+    pytest.importorskip("numpy")
+    outcomes = {
+        "totals": [{"name": "Over", "price": -110, "point": 44.5}, {"name": "Under", "price": -110, "point": 44.5}],
+        "h2h": [{"name": "Home", "price": -300}, {"name": "Away", "price": 250}],
+    }
+    bookmaker = {"markets": [{"key": key, "outcomes": market} for key, market in outcomes.items()]}
+    game = {"home_team": "Home", "away_team": "Away", "bookmakers": [bookmaker, bookmaker]}
+
+    (totals,) = market_consensus([game], AGGREGATORS["totals"], engine)
+    assert (totals.home_avg, totals.away_avg, totals.bookmakers) == (44.5, 44.5, 2)
+    (h2h,) = market_consensus([game], AGGREGATORS["h2h"], engine)
+    assert (h2h.home_median, h2h.away_median) == (0.75, implied_probability(250))
+    (spreads,) = market_consensus([game], SPREADS, engine)
+    assert spreads.bookmakers == 0
@@ -0,0 +1,93 @@
+import copy
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import pysandbox.nflpickem.odds_archive as odds_archive
+from pysandbox.common_test import mock_response_from_file, run_and_expect
+from pysandbox.nflpickem.consensus import MarketConsensus
+from pysandbox.nflpickem.consensus import spread_consensus as original_spread_consensus
+from pysandbox.nflpickem.odds_archive import OddsArchive, main
+
+START = datetime(2022, 9, 12, tzinfo=timezone.utc)
+
+
+def moved(games: list[Any], points: float) -> list[Any]:
+    """`games` with every home spread moved by `points` (and away spreads the opposite way)"""
+    games = copy.deepcopy(games)
+    for game in games:
+        for bookmaker in game["bookmakers"]:
+            for outcome in bookmaker["markets"][0]["outcomes"]:
+                outcome["point"] += points if outcome["name"] == game["home_team"] else -points
+    return games
+
+
+@pytest.fixture
+def games() -> list[Any]:
+    games: list[Any] = mock_response_from_file("nflpickem/mock_odds.json")
+    return games
+
+
+@pytest.fixture
+def archive(tmp_path: Path, games: list[Any]) -> OddsArchive:
+    archive = OddsArchive(tmp_path / "archive")
+    for day in range(3):
+        archive.append(moved(games, day * 0.5), START + timedelta(days=day))
+    return archive
+
+
+def test_append_and_reload(archive: OddsArchive, games: list[Any]) -> None:
+    reloaded = OddsArchive(archive.directory)
+    assert reloaded.entries == archive.entries
+    assert [entry.fetched_at for entry in reloaded.entries] == [START + timedelta(days=day) for day in range(3)]
+    assert all(len(entry.game_ids) == 30 for entry in reloaded.entries)
+
+    fetched_at, snapshot = next(reloaded.snapshots())
+    assert (fetched_at, snapshot) == (START, games)
+
+
+def test_select_and_lazy_snapshots(archive: OddsArchive, games: list[Any]) -> None:
+    assert len(archive.select(since=START + timedelta(hours=1))) == 2
+    assert len(archive.select(until=START + timedelta(days=1))) == 2
+    assert archive.select(game_id="missing") == []
+
+    game_id = games[3]["id"]
+    snapshots = list(archive.snapshots(game_id=game_id))
+    assert [[game["id"] for game in snapshot] for _, snapshot in snapshots] == [[game_id]] * 3
+    assert list(OddsArchive(archive.directory / "empty").snapshots()) == []
+
+
+def test_line_movement(archive: OddsArchive, games: list[Any]) -> None:
+    movements = archive.line_movement()
+    assert len(movements) == 30
+    movement = movements[games[0]["id"]]
+    assert (movement.home_team, movement.away_team) == (games[0]["home_team"], games[0]["away_team"])
+    assert [point.fetched_at for point in movement.points] == [START + timedelta(days=day) for day in range(3)]
+    assert movement.movement == pytest.approx(1.0)
+    assert movement.closing.away_spread_avg == pytest.approx(movement.opening.away_spread_avg - 1.0)
+    assert "+1.00 over 3 snapshots" in str(movement)
+
+    single = archive.line_movement(since=START + timedelta(days=1), game_id=games[0]["id"])
+    assert list(single) == [games[0]["id"]]
+    assert single[games[0]["id"]].movement == pytest.approx(0.5)
+
+
+def test_line_movement_summarizes_one_snapshot_at_a_time(archive: OddsArchive, monkeypatch: pytest.MonkeyPatch) -> None:
+    batch_sizes = []
+
+    def spread_consensus(games: list[Any], engine: str) -> list[MarketConsensus]:
+        batch_sizes.append(len(games))
+        return original_spread_consensus(games, engine)
+
+    monkeypatch.setattr(odds_archive, "spread_consensus", spread_consensus)
+    assert len(archive.line_movement()) == 30
+    assert batch_sizes == [30, 30, 30]
+
+
+def test_main(archive: OddsArchive, capsys: pytest.CaptureFixture[str]) -> None:
+    run_and_expect(main, ["odds_archive", f"--archive-dir={archive.directory}", "--since=2022-09-13"])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 30
+    assert all("+0.50 over 2 snapshots" in line for line in lines)
@@ -0,0 +1,78 @@
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+import requests
+import responses
+
+from pysandbox.common import create_session
+from pysandbox.nflpickem.odds_cache import OddsCache, Quota
+
+URL = "https://api.the-odds-api.com/v4/sports/americanfootball_nfl/odds"
+PARAMS = {"apiKey": "secret", "regions": "us", "markets": "spreads"}
+QUOTA_HEADERS = {"x-requests-remaining": "480", "x-requests-used": "20"}
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> OddsCache:
+    return OddsCache(tmp_path / "odds-cache", ttl=60)
+
+
+@responses.activate
+def test_reuses_fresh_odds(cache: OddsCache) -> None:
+    session = create_session()
+    responses.add(responses.GET, URL, json=[{"id": "game"}], headers=QUOTA_HEADERS)
+    first = cache.get(session, URL, PARAMS)
+    assert (first.json(), first.from_cache) == ([{"id": "game"}], False)
+    assert (first.quota.remaining, first.quota.used) == (480, 20)
+
+    # a different API key (or a new process) still hits the cache
+    fresh_cache = OddsCache(cache.directory, ttl=60)
+    second = fresh_cache.get(session, URL, {**PARAMS, "apiKey": "other"})
+    assert (second.body, second.from_cache, second.quota) == (first.body, True, first.quota)
+    assert fresh_cache.quota == first.quota
+    assert len(responses.calls) == 1
+    assert all(b"secret" not in path.read_bytes() for path in cache.directory.iterdir())
+
+
+@responses.activate
+def test_refetches_stale_or_refreshed_odds(cache: OddsCache, monkeypatch: pytest.MonkeyPatch) -> None:
+    session = create_session()
+    responses.add(responses.GET, URL, json=[], headers=QUOTA_HEADERS)
+    cache.get(session, URL, PARAMS)
+    assert cache.get(session, URL, PARAMS, refresh=True).from_cache is False
+    assert cache.get(session, URL, {**PARAMS, "markets": "totals"}).from_cache is False
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get(session, URL, PARAMS).from_cache is False
+    assert len(responses.calls) == 4
+
+
+@responses.activate
+def test_serves_stale_odds_when_the_api_fails(cache: OddsCache) -> None:
+    session = create_session()
+    with pytest.raises(requests.ConnectionError):
+        responses.add(responses.GET, URL, body=requests.ConnectionError("offline"))
+        cache.get(session, URL, PARAMS)
+
+    responses.replace(responses.GET, URL, json=[1], headers=QUOTA_HEADERS)
+    cache.get(session, URL, PARAMS)
+    responses.replace(responses.GET, URL, status=401, json={"message": "quota exhausted"})
+    stale = cache.get(session, URL, PARAMS, refresh=True)
+    assert (stale.json(), stale.from_cache) == ([1], True)
+
+
+@responses.activate
+def test_failed_store_still_serves(cache: OddsCache) -> None:
+    responses.add(responses.GET, URL, json=[1], headers=QUOTA_HEADERS)
+    shutil.rmtree(cache.directory)
+    odds = cache.get(create_session(), URL, PARAMS)
+    assert (odds.json(), odds.from_cache) == ([1], False)
+
+
+def test_quota_from_headers() -> None:
+    assert Quota.from_headers(QUOTA_HEADERS, 1.0) == Quota(480, 20, 1.0)
+    assert Quota.from_headers({"x-requests-remaining": "12.0"}, 2.0) == Quota(12, None, 2.0)
+    assert str(Quota(480, 20, 1.0)) == "20 used, 480 remaining"
@@ -1,16 +1,28 @@
 import os
-from datetime import date
+from collections import Counter
+from datetime import date, datetime, timezone
+from pathlib import Path
 from typing import Any
 
 import pytest
 import responses
+from responses import matchers
 
-from pysandbox.common_test import mock_response_from_file
+import pysandbox.common as common
+import pysandbox.nflpickem.picker as picker
+from pysandbox.common_test import mock_response_from_file, run_and_expect
+from pysandbox.nflpickem.odds_archive import OddsArchive
+from pysandbox.nflpickem.odds_cache import OddsCache
 from pysandbox.nflpickem.picker import (
+    DEFAULT_SPORT,
     ENV_API_TOKEN,
     GET_ODDS_URL,
+    ParsedGame,
+    Picker,
     _call_odds_api,
     generate_picks,
+    main,
+    odds_url,
 )
 
 
@@ -53,3 +65,113 @@ def test_e2e(mock_today: date, mock_response: Any) -> None:
         assert abs(game.home_spread_avg) <= abs(prev_game.home_spread_avg)
 
     assert len(mock_response.calls) == 1
+
+
+@responses.activate
+def test_engines_give_identical_games(mock_today: date, mock_response: Any) -> None:
+    pytest.importorskip("numpy")
+    python_games = generate_picks(mock_today, engine="python")
+    assert generate_picks(mock_today, engine="numpy") == python_games
+    assert all(game.bookmaker_count > 0 and game.home_spread_stdev >= 0 for game in python_games)
+    assert python_games[0].home_spread_median == -10.0
+
+
+@responses.activate
+def test_skips_games_without_spreads(mock_today: date) -> None:
+    games = mock_response_from_file("nflpickem/mock_odds.json")
+    for bookmaker in games[0]["bookmakers"]:
+        bookmaker["markets"][0]["key"] = "totals"
+    responses.add(responses.GET, GET_ODDS_URL, json=games, status=200)
+    assert len(generate_picks(mock_today)) == 14
+
+
+@responses.activate
+def test_cached_odds(mock_today: date, mock_response: Any, tmp_path: Path) -> None:
+    cache = OddsCache(tmp_path, ttl=60)
+    assert generate_picks(mock_today, cache=cache) == generate_picks(mock_today, cache=cache)
+    assert len(mock_response.calls) == 1
+
+
+@responses.activate
+def test_main(mock_response: Any, tmp_path: Path) -> None:
+    run_and_expect(main, ["nflpicker-gen", f"--cache-dir={tmp_path}", "--ttl=60"])
+    run_and_expect(main, ["nflpicker-gen", f"--cache-dir={tmp_path}"])
+    run_and_expect(main, ["nflpicker-gen", "--no-cache", "--markets", "spreads", "totals", "--concurrency=2"])
+    assert len(mock_response.calls) == 2
+
+
+@responses.activate
+def test_archived_odds(mock_today: date, mock_response: Any, tmp_path: Path) -> None:
+    archive = OddsArchive(tmp_path / "archive")
+    cache = OddsCache(tmp_path / "cache", ttl=60)
+    generate_picks(mock_today, cache=cache, archive=archive)
+    generate_picks(mock_today, cache=cache, archive=archive)  # served from the cache, so not archived again
+    generate_picks(mock_today, archive=archive)
+    assert len(archive.entries) == 2
+    assert len(archive.line_movement()) == 30
+
+
+def test_parsed_game() -> None:
+    game = {"home_team": "Home", "away_team": "Away", "commence_time": "2022-09-18T17:00:00Z"}
+    parsed = ParsedGame.parse(game)
+    assert (parsed.home_team, parsed.away_team, parsed.raw) == ("Home", "Away", game)
+    assert parsed.start_time == datetime(2022, 9, 18, 17, tzinfo=timezone.utc)
+
+
+@responses.activate
+def test_reusable_picker(mock_today: date, mock_response: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    initialize_calls = []
+    monkeypatch.setattr(common, "initialize_logging_from_file", lambda: initialize_calls.append(1))
+    picker._initialize_logging.cache_clear()
+
+    reused = Picker(engine="python")
+    first = reused.picks(mock_today)
+    assert reused.timings.total >= reused.timings.fetch > 0
+    assert str(reused.timings).startswith("PickTimings: fetch=")
+    assert reused.picks(mock_today) == first == generate_picks(mock_today)
+    assert len(initialize_calls) == 1
+    assert len(mock_response.calls) == 3
+
+
+def with_all_markets(games: list[Any]) -> list[Any]:
+    """Adds totals and h2h markets next to every bookmaker's spreads"""
+    for game in games:
+        for bookmaker in game["bookmakers"]:
+            over_under = [{"name": side, "price": -110, "point": 44.5} for side in ["Over", "Under"]]
+            moneyline = [{"name": game["home_team"], "price": -150}, {"name": game["away_team"], "price": 130}]
+            bookmaker["markets"] += [{"key": "totals", "outcomes": over_under}, {"key": "h2h", "outcomes": moneyline}]
+    return games
+
+
+@responses.activate
+def test_multiple_sports_and_markets(mock_today: date) -> None:
+    nfl = with_all_markets(mock_response_from_file("nflpickem/mock_odds.json"))
+    ncaaf = with_all_markets(mock_response_from_file("nflpickem/mock_odds.json")[:4])
+    markets_matcher = matchers.query_param_matcher({"markets": "spreads,totals,h2h"}, strict_match=False)
+    responses.add(responses.GET, GET_ODDS_URL, json=nfl, match=[markets_matcher])
+    responses.add(responses.GET, odds_url("americanfootball_ncaaf"), json=ncaaf, match=[markets_matcher])
+
+    multi = Picker(sports=[DEFAULT_SPORT, "americanfootball_ncaaf"], markets=["spreads", "totals", "h2h"])
+    lines = multi.lines(mock_today)
+    assert Counter((line.sport, line.market) for line in lines) == {
+        (sport, market): count
+        for sport, count in [(DEFAULT_SPORT, 15), ("americanfootball_ncaaf", 4)]
+        for market in ["spreads", "totals", "h2h"]
+    }
+    totals = next(line for line in lines if line.market == "totals")
+    assert (totals.sides, totals.consensus.home_avg) == (("Over", "Under"), 44.5)
+    assert "Over 44.5 / Under 44.5" in str(totals)
+
+    games = multi.rank(lines)
+    assert len(games) == 19
+    assert {game.sport for game in games} == {DEFAULT_SPORT, "americanfootball_ncaaf"}
+    spreads_matcher = matchers.query_param_matcher({"markets": "spreads"}, strict_match=False)
+    responses.add(responses.GET, GET_ODDS_URL, json=nfl, match=[spreads_matcher])
+    assert [game for game in games if game.sport == DEFAULT_SPORT] == generate_picks(mock_today)
+
+
+def test_picker_validation() -> None:
+    with pytest.raises(RuntimeError, match="must be among"):
+        Picker(markets=["spreads", "props"])
+    with pytest.raises(RuntimeError, match="need the 'spreads' market"):
+        Picker(markets=["totals"]).picks()
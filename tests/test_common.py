@@ -0,0 +1,98 @@
+import subprocess
+import sys
+import time
+
+import pytest
+import responses
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+import pysandbox.common as common
+from pysandbox.common import (
+    RateLimitRetry,
+    create_session,
+    get_numpy,
+    get_session,
+    require_numpy,
+)
+
+URL = "https://api.example.com/things"
+
+
+def test_get_session() -> None:
+    session = get_session()
+    assert get_session() is session
+    adapter = session.get_adapter(URL)
+    assert isinstance(adapter, HTTPAdapter)
+    assert isinstance(adapter.max_retries, RateLimitRetry)
+    assert "gzip" in str(session.headers["Accept-Encoding"])
+
+
+@responses.activate
+def test_retries_server_errors() -> None:
+    responses.add(responses.GET, URL, status=503)
+    responses.add(responses.GET, URL, status=502)
+    responses.add(responses.GET, URL, json=["ok"], status=200)
+    r = create_session(backoff_factor=0).get(URL)
+    assert r.json() == ["ok"]
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_gives_up_after_retries() -> None:
+    responses.add(responses.GET, URL, status=500)
+    r = create_session(retries=2, backoff_factor=0).get(URL)
+    assert r.status_code == 500
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_forbidden_is_not_retried() -> None:
+    responses.add(responses.GET, URL, status=403, headers={"X-RateLimit-Remaining": "42"})
+    r = create_session(backoff_factor=0).get(URL)
+    assert r.status_code == 403
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_rate_limit_is_retried() -> None:
+    reset = str(int(time.time()) - 1)
+    responses.add(responses.GET, URL, status=403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset})
+    responses.add(responses.GET, URL, json=["ok"], status=200)
+    r = create_session(backoff_factor=0).get(URL)
+    assert r.json() == ["ok"]
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_long_retry_after_is_not_retried() -> None:
+    responses.add(responses.GET, URL, status=429, headers={"Retry-After": "3600"})
+    r = create_session(backoff_factor=0).get(URL)
+    assert r.status_code == 429
+    assert len(responses.calls) == 1
+
+
+def test_get_retry_after() -> None:
+    retry = RateLimitRetry()
+    assert retry.get_retry_after(HTTPResponse(status=503, headers={"Retry-After": "7"})) == 7
+
+    reset = time.time() + 30
+    rate_limited = HTTPResponse(status=403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)})
+    assert retry.get_retry_after(rate_limited) == pytest.approx(30, abs=2)
+
+    expired = HTTPResponse(status=403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0"})
+    assert retry.get_retry_after(expired) == 0
+    assert retry.get_retry_after(HTTPResponse(status=500)) is None
+
+
+def test_numpy_is_imported_lazily() -> None:
+    code = "import sys, pysandbox.common; assert 'numpy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_require_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("numpy")
+    assert require_numpy("Plotting") is get_numpy()
+    monkeypatch.setattr(common, "get_numpy", lambda: None)
+    with pytest.raises(RuntimeError, match="^Plotting requires NumPy. Install it with: pip install numpy$"):
+        require_numpy("Plotting")
@@ -0,0 +1,49 @@
+import threading
+from pathlib import Path
+
+from pysandbox.file_cache import FileCache
+
+KEY = {"url": "https://example.com/odds", "params": {"markets": "spreads"}}
+
+
+def test_store_and_load(tmp_path: Path) -> None:
+    files = FileCache(tmp_path / "files")
+    assert files.load(KEY) is None
+    size = files.store(KEY, {"fetched_at": 1.5}, b"[1, 2]\n[3]")
+    assert size == files.path(KEY).stat().st_size
+    assert files.load(KEY) == ({"fetched_at": 1.5, "key": KEY}, b"[1, 2]\n[3]")
+    assert files.load({**KEY, "params": {}}) is None
+
+
+def test_corrupt_or_mismatched(tmp_path: Path) -> None:
+    files = FileCache(tmp_path / "files")
+    files.path("url").write_bytes(b"not json\n[]")
+    assert files.load("url") is None
+    files.path("url").write_bytes(b'{"key": "other url"}\n[]')
+    assert files.load("url") is None
+
+
+def test_failed_store(tmp_path: Path) -> None:
+    files = FileCache(tmp_path / "files")
+    files.directory.rmdir()
+    assert files.store(KEY, {}, b"[]") is None
+    assert files.load(KEY) is None
+
+
+def test_concurrent_stores(tmp_path: Path) -> None:
+    files = FileCache(tmp_path / "files")
+    sizes: list[object] = []
+
+    def store(thread: int) -> None:
+        for _ in range(50):
+            sizes.append(files.store(KEY, {"thread": thread}, b"x" * 10_000))
+
+    threads = [threading.Thread(target=store, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert None not in sizes
+    cached = files.load(KEY)
+    assert cached is not None and cached[1] == b"x" * 10_000
+    assert list(files.directory.iterdir()) == [files.path(KEY)]
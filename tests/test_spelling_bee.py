@@ -1,11 +1,31 @@
+import io
+import json
+import os
 import shutil
 from pathlib import Path
 from typing import Generator
 
 import pytest
 
-from pysandbox.common_test import run_and_expect
-from pysandbox.spelling_bee import main, solve_puzzle
+import pysandbox.spelling_bee as spelling_bee
+from pysandbox.common_test import run_and_expect, run_with_argv
+from pysandbox.spelling_bee import (
+    CACHE_SUFFIX,
+    OTHER_CHARACTER_BIT,
+    PANGRAM_BONUS,
+    DictionaryIndex,
+    Puzzle,
+    acceptable_word,
+    iter_words,
+    letter_mask,
+    load_dictionary_index,
+    main,
+    parse_puzzles,
+    score_word,
+    solve_puzzle,
+    solve_puzzles,
+    top_words,
+)
 
 TEST_DICTIONARY: list[str] = [
     "apple",
@@ -72,16 +92,231 @@ def test_bad_dictionary(tmp_path: Path) -> None:
     assert "does not exist" in str(excinfo.value)
 
 
+def test_letter_mask() -> None:
+    assert letter_mask("") == 0
+    assert letter_mask("a") == 0b1
+    assert letter_mask("abba") == 0b11
+    assert letter_mask("Zz") == 1 << 25
+    assert letter_mask("can't") & OTHER_CHARACTER_BIT
+
+
+def test_acceptable_word() -> None:
+    assert acceptable_word("apple", "a", ["p", "l", "e"])
+    assert not acceptable_word("ale", "a", ["l", "e"])
+    assert not acceptable_word("peel", "a", ["p", "l", "e"])
+    assert not acceptable_word("apples", "a", ["p", "l", "e"])
+    assert not acceptable_word("can't", "c", ["a", "n", "t"])
+
+
+def test_index_lookup_matches_scan() -> None:
+    """Both the subset lookup (few letters) and the group scan (many letters) agree with `acceptable_word`"""
+    words = TEST_DICTIONARY + ["pale", "leap", "plea", "peal", "apple's"]
+    index = DictionaryIndex.from_words(words)
+    assert len(index.group_masks) < len(words)
+    for must_letter, may_letters in [("a", "ple"), ("a", "plebnorgsty"), ("e", "aplgr"), ("q", "u")]:
+        expected = [word for word in words if acceptable_word(word, must_letter, list(may_letters))]
+        expected.sort(key=lambda s: -len(s))
+        assert index.solve(must_letter, may_letters) == expected
+
+
+def test_load_dictionary_index_reused(tmp_path: Path) -> None:
+    dictionary_path = tmp_path / "reused-dictionary.txt"
+    dictionary_path.write_text("apple\n")
+    index = load_dictionary_index(dictionary_path)
+    assert load_dictionary_index(dictionary_path) is index
+
+    dictionary_path.write_text("apple\nbanana\n")
+    rebuilt = load_dictionary_index(dictionary_path)
+    assert rebuilt is not index
+    assert list(rebuilt.words) == ["apple", "banana"]
+
+
+def test_dictionary_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    dictionary_path = tmp_path / "cached-dictionary.txt"
+    dictionary_path.write_text("\n".join(TEST_DICTIONARY + ["café"]) + "\n")
+    cache_path = tmp_path / f"cached-dictionary.txt{CACHE_SUFFIX}"
+
+    built = load_dictionary_index(dictionary_path)
+    assert cache_path.exists()
+
+    spelling_bee._index_cache.clear()
+    mapped = load_dictionary_index(dictionary_path)
+    assert isinstance(mapped.masks, memoryview)
+    assert list(mapped.words) == list(built.words)
+    assert mapped.words[-1] == "café" and mapped.words[1:3] == ["banana", "orange"]
+    assert list(mapped.group_members) == list(built.group_members)
+    assert mapped.solve("a", "plebn") == ["banana", "apple"]
+    with pytest.raises(IndexError):
+        mapped.words[len(TEST_DICTIONARY) + 1]
+
+    # Touched but unchanged: the digest still matches, so the cache is reused
+    spelling_bee._index_cache.clear()
+    stat = dictionary_path.stat()
+    os.utime(dictionary_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert isinstance(load_dictionary_index(dictionary_path).masks, memoryview)
+
+    # ... and now records the new timestamp, so the next load doesn't hash the dictionary
+    spelling_bee._index_cache.clear()
+    monkeypatch.setattr(spelling_bee, "_file_digest", lambda data: pytest.fail("hashed the dictionary again"))
+    assert isinstance(load_dictionary_index(dictionary_path).masks, memoryview)
+    monkeypatch.undo()
+
+    # Changed: the stale cache is rebuilt
+    spelling_bee._index_cache.clear()
+    dictionary_path.write_text("pale\nleap\n")
+    assert list(load_dictionary_index(dictionary_path).words) == ["pale", "leap"]
+    spelling_bee._index_cache.clear()
+    assert list(load_dictionary_index(dictionary_path).words) == ["pale", "leap"]
+
+
+def test_dictionary_cache_corrupt(tmp_path: Path) -> None:
+    dictionary_path = tmp_path / "corrupt-dictionary.txt"
+    dictionary_path.write_text("apple\n")
+    cache_path = tmp_path / f"corrupt-dictionary.txt{CACHE_SUFFIX}"
+    for contents in [b"", b"garbage", b"x" * 200]:
+        cache_path.write_bytes(contents)
+        spelling_bee._index_cache.clear()
+        assert list(load_dictionary_index(dictionary_path).words) == ["apple"]
+
+    spelling_bee._index_cache.clear()
+    cache_path.write_bytes(cache_path.read_bytes()[:-1])  # truncated
+    assert list(load_dictionary_index(dictionary_path).words) == ["apple"]
+
+
+def test_dictionary_cache_disabled(tmp_path: Path) -> None:
+    dictionary_path = tmp_path / "uncached-dictionary.txt"
+    dictionary_path.write_text("apple\n")
+    load_dictionary_index(dictionary_path, use_cache=False)
+    assert not (tmp_path / f"uncached-dictionary.txt{CACHE_SUFFIX}").exists()
+
+
+def test_dictionary_cache_unwritable(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail_replace(src: Path, dst: Path) -> None:
+        raise PermissionError("read-only")
+
+    dictionary_path = tmp_path / "read-only-dictionary.txt"
+    dictionary_path.write_text("apple\n")
+    monkeypatch.setattr(os, "replace", fail_replace)
+    assert list(load_dictionary_index(dictionary_path).words) == ["apple"]
+    assert list(tmp_path.iterdir()) == [dictionary_path]
+
+
+def test_iter_words(test_dictionary_path: Path) -> None:
+    words = iter_words("a", "plebn", dictionary_file=test_dictionary_path)
+    assert sorted(words) == ["apple", "banana"]
+    assert list(iter_words("a", "le", dictionary_file=test_dictionary_path)) == []
+
+    with pytest.raises(RuntimeError):
+        next(iter_words("a", "", dictionary_file=test_dictionary_path))
+
+
+def test_score_word() -> None:
+    assert score_word("pale", letter_mask("aplebn")) == 1
+    assert score_word("apple", letter_mask("aplebn")) == 5
+    assert score_word("planes", letter_mask("aplens")) == 6 + PANGRAM_BONUS
+
+
+def test_top_words(tmp_path: Path) -> None:
+    dictionary_path = tmp_path / "top-dictionary.txt"
+    dictionary_path.write_text("pale\nleap\napple\nbanana\nplane\nbeanpole\nappellee\n")
+    assert top_words("a", "plebno", 3, dictionary_file=dictionary_path) == [
+        ("beanpole", 8 + PANGRAM_BONUS),
+        ("appellee", 8),
+        ("banana", 6),
+    ]
+    assert top_words("a", "le", 3, dictionary_file=dictionary_path) == []
+    assert top_words("a", "plebno", 100, dictionary_file=dictionary_path)[-2:] == [("pale", 1), ("leap", 1)]
+
+
+def test_solve_puzzle_does_not_print(test_dictionary_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    solve_puzzle("a", "plebn", dictionary_file=test_dictionary_path)
+    assert capsys.readouterr().out == ""
+
+
 def test_parse_help() -> None:
     test_argv = ["pysandbox/spelling_bee.py", "--help"]
     run_and_expect(lambda: main(), test_argv, raises=SystemExit, check_code=True)
 
 
-def test_e2e(test_dictionary_path: Path) -> None:
+def test_e2e(test_dictionary_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    test_argv = [
+        "pysandbox/spelling_bee.py",
+        "--must-letter=a",
+        "--optional-letters=plebn",
+        f"--dictionary-file={test_dictionary_path}",
+    ]
+    run_and_expect(lambda: main(), test_argv)
+    assert capsys.readouterr().out == "banana\napple\n"
+
+
+def test_e2e_top(test_dictionary_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
     test_argv = [
         "pysandbox/spelling_bee.py",
         "--must-letter=a",
         "--optional-letters=plebn",
         f"--dictionary-file={test_dictionary_path}",
+        "--top=1",
+    ]
+    run_and_expect(lambda: main(), test_argv)
+    assert capsys.readouterr().out == "  6 banana\n"
+
+    for bad_args in [["--top=0"], ["--top=-1"], ["--engine=python"], ["--engine=numpy"]]:
+        with pytest.raises(RuntimeError):
+            run_with_argv(lambda: main(), test_argv + bad_args)
+    with pytest.raises(RuntimeError, match="--engine=numpy can't be combined"):
+        run_with_argv(lambda: main(), ["pysandbox/spelling_bee.py", "--batch-file=-", "--engine=numpy"])
+
+
+def test_parse_puzzles() -> None:
+    lines = ["# must may", "a plebn", "", "  z abcdef  "]
+    assert list(parse_puzzles(lines)) == [Puzzle("a", "plebn"), Puzzle("z", "abcdef")]
+
+    with pytest.raises(RuntimeError) as excinfo:
+        list(parse_puzzles(["a plebn", "a"]))
+    assert "Line 2: 'a' must be" in str(excinfo.value)
+
+    with pytest.raises(RuntimeError):
+        list(parse_puzzles(["ab plebn"]))
+
+
+def test_solve_puzzles(test_dictionary_path: Path) -> None:
+    puzzles = [
+        Puzzle("a", "plebn"),
+        Puzzle("a", "le"),
+        Puzzle("A", "NBELP"),
+        Puzzle("r", "abcdefghijklmnopqstuvwxyz"),
+        Puzzle("e", "abcdfghijklmnopqrstuvwxyz"),
+    ]
+    actual = list(solve_puzzles(puzzles, dictionary_file=test_dictionary_path))
+    assert [puzzle for puzzle, _ in actual] == puzzles
+    for puzzle, words in actual:
+        assert words == solve_puzzle(puzzle.must_letter, puzzle.may_letters, dictionary_file=test_dictionary_path)
+    assert actual[3][1] == ["strawberry", "orange", "grape"]
+
+    with pytest.raises(RuntimeError):
+        list(solve_puzzles([Puzzle("a", "")], dictionary_file=test_dictionary_path))
+
+
+def test_e2e_batch(test_dictionary_path: Path, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    puzzles_path = tmp_path / "puzzles.txt"
+    puzzles_path.write_text("a plebn\nz abcdef\n")
+    test_argv = [
+        "pysandbox/spelling_bee.py",
+        f"--batch-file={puzzles_path}",
+        f"--dictionary-file={test_dictionary_path}",
     ]
     run_and_expect(lambda: main(), test_argv)
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"must_letter": "a", "may_letters": "plebn", "words": ["banana", "apple"]},
+        {"must_letter": "z", "may_letters": "abcdef", "words": []},
+    ]
+
+
+def test_e2e_batch_stdin(
+    test_dictionary_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setattr("sys.stdin", io.StringIO("a le\n"))
+    test_argv = ["pysandbox/spelling_bee.py", "--batch-file=-", f"--dictionary-file={test_dictionary_path}"]
+    run_and_expect(lambda: main(), test_argv)
+    assert json.loads(capsys.readouterr().out)["words"] == []
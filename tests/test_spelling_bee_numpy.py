@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+import pysandbox.spelling_bee as spelling_bee
+from pysandbox.spelling_bee import (
+    DictionaryIndex,
+    get_solver,
+    load_dictionary_index,
+    solve_puzzle,
+)
+
+np = pytest.importorskip("numpy")
+
+from pysandbox.spelling_bee_numpy import (  # noqa: E402
+    NumpyMatcher,
+    numpy_matcher,
+    solve_auto,
+)
+
+WORDS: list[str] = ["apple", "banana", "orange", "grape", "strawberry", "ale", "pale", "leap", "can't"]
+PUZZLES: list[tuple[str, str]] = [("a", "plebn"), ("a", "le"), ("e", "aplgr"), ("r", "abegnopstwy"), ("z", "q")]
+
+
+def test_matches_python_engine() -> None:
+    index = DictionaryIndex.from_words(WORDS)
+    matcher = NumpyMatcher(index)
+    for must_letter, may_letters in PUZZLES:
+        assert matcher.solve(must_letter, may_letters) == index.solve(must_letter, may_letters)
+        assert solve_auto(index, must_letter, may_letters) == index.solve(must_letter, may_letters)
+
+
+def test_memory_mapped_arrays(tmp_path: Path) -> None:
+    dictionary_path = tmp_path / "numpy-dictionary.txt"
+    dictionary_path.write_text("\n".join(WORDS) + "\n")
+    load_dictionary_index(dictionary_path)
+    spelling_bee._index_cache.clear()
+    index = load_dictionary_index(dictionary_path)
+    assert isinstance(index.masks, memoryview)
+
+    matcher = numpy_matcher(index)
+    assert numpy_matcher(index) is matcher
+    assert not matcher.masks.flags.owndata  # shares the mmap
+    assert matcher.solve("a", "plebn") == ["banana", "apple", "pale", "leap"]
+
+
+def test_engines(tmp_path: Path) -> None:
+    dictionary_path = tmp_path / "engine-dictionary.txt"
+    dictionary_path.write_text("\n".join(WORDS) + "\n")
+    for engine in ["auto", "python", "numpy"]:
+        assert solve_puzzle("a", "plebn", dictionary_path, engine=engine) == ["banana", "apple", "pale", "leap"]
+
+    with pytest.raises(RuntimeError) as excinfo:
+        get_solver(load_dictionary_index(dictionary_path), "fortran")
+    assert "must be one of" in str(excinfo.value)
@@ -0,0 +1,62 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Generator
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from pysandbox.common_test import run_and_expect
+from pysandbox.spelling_bee_server import SolverServer, main
+
+
+@pytest.fixture
+def solver_server(tmp_path: Path) -> Generator[SolverServer, None, None]:
+    dictionary_path = tmp_path / "server-dictionary.txt"
+    dictionary_path.write_text("apple\nbanana\norange\ngrape\nstrawberry\nale\n")
+    server = SolverServer(("127.0.0.1", 0), dictionary_path, cache_size=2)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _get(server: SolverServer, path: str) -> Any:
+    with urlopen(f"http://127.0.0.1:{server.server_address[1]}{path}") as response:
+        return json.load(response)
+
+
+def test_solve(solver_server: SolverServer) -> None:
+    body = _get(solver_server, "/solve?must_letter=a&may_letters=plebn")
+    assert body == {"must_letter": "a", "may_letters": "plebn", "words": ["banana", "apple"]}
+
+    # Same letter set in a different order/case is served from the cache
+    assert _get(solver_server, "/solve?must_letter=A&may_letters=NBELP")["words"] == ["banana", "apple"]
+    cache_info = solver_server.solve_letters.cache_info()
+    assert (cache_info.hits, cache_info.misses) == (1, 1)
+
+
+def test_cache_eviction(solver_server: SolverServer) -> None:
+    for may_letters in ["plebn", "le", "gpre", "plebn"]:
+        _get(solver_server, f"/solve?must_letter=a&may_letters={may_letters}")
+    cache_info = solver_server.solve_letters.cache_info()
+    assert (cache_info.hits, cache_info.misses, cache_info.currsize) == (0, 4, 2)
+
+
+def test_bad_requests(solver_server: SolverServer) -> None:
+    with pytest.raises(HTTPError) as excinfo:
+        _get(solver_server, "/solve?must_letter=ab&may_letters=plebn")
+    assert excinfo.value.code == 400
+    assert "must be of length one" in json.load(excinfo.value)["error"]
+
+    with pytest.raises(HTTPError) as excinfo:
+        _get(solver_server, "/unknown")
+    assert excinfo.value.code == 404
+
+
+def test_parse_help() -> None:
+    test_argv = ["pysandbox/spelling_bee_server.py", "--help"]
+    run_and_expect(lambda: main(), test_argv, raises=SystemExit, check_code=True)